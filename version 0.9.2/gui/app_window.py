@@ -3,15 +3,9 @@
 import customtkinter as ctk
 import os
 import json
-import shutil
-import numpy as np
+import queue
 from datetime import datetime
 from tkinter import filedialog
-try:
-    import win32com.client
-    IS_WINDOWS = True
-except ImportError:
-    IS_WINDOWS = False
 
 from gui.widgets.file_selector import load_seed_file
 from gui.widgets.channel_selector import ChannelSelector
@@ -21,12 +15,20 @@ from gui.windows.admin_data_popup import AdminDataPopup
 from gui.windows.digitizer_popup import DigitizerPopup
 from gui.windows.frequency_domain_popup import FrequencyDomainPopup
 from gui.plotting.plot_frame import PlotFrame
-from modules.freq_detector import detect_frequency_boundaries, detect_dominant_frequency
-from modules.amplitude_extractor import find_best_amplitude_pairs
+from gui.plotting.figure_manager import format_figure_stats
+from modules.freq_detector import (BOUNDARY_RULES, boundaries_from_band_power, cached_band_power_track,
+                                   change_point_boundaries_from_band_power)
+from modules.progressive_loader import ProgressiveSeedLoader, SeedFileOpener
+from modules.seed_cache import is_channel_cached
+from modules.segment_table import SegmentTable
+from modules.track_cache import TrackCache
+from modules.workbook_session import WorkbookSession
+from modules.excel_sheets import (ADMIN_SHEET, AMPLITUDE_SHEET, AMPLITUDE_WORKBOOK, DIGITIZER_SHEET, read_admin_sheet,
+                                  write_admin_sheet, write_amplitude_sheet, write_digitizer_sheet)
+from modules.amplitude_extractor import AMPLITUDE_METHODS, AmplitudePairs, extract_amplitude_batch
+from modules.batch_pipeline import collect_amplitude_results, default_channel_keys
+from modules.certificate_pdf import CERTIFICATE_SHEET, render_certificate_pdf
 from obspy import Trace
-import openpyxl
-from openpyxl.drawing.image import Image
-from openpyxl.styles import Alignment, Font, PatternFill
 from tkinter import messagebox
 
 ctk.set_appearance_mode("dark")
@@ -39,6 +41,10 @@ class KalibrasiApp(ctk.CTk):
         self.geometry("1200x700")
         self.protocol("WM_DELETE_WINDOW", self.on_closing)
         self.after(100, self._maximize)
+        # F12: cetak jumlah figure/canvas yang hidup dan memori datanya (debug kebocoran)
+        self.bind("<F12>", lambda e: print(format_figure_stats()))
+        # Workbook data dibuka sekali; penulisan sheet dan penyimpanan berjalan di background
+        self.workbook = WorkbookSession(AMPLITUDE_WORKBOOK)
 
         # === Sidebar ===
         self.sidebar_scrollable = ctk.CTkScrollableFrame(self, width=280)
@@ -53,13 +59,40 @@ class KalibrasiApp(ctk.CTk):
         self.admin_button.pack(pady=10, fill="x")
         
         # Widget yang disembunyikan
+        self.load_progress = ctk.CTkProgressBar(self.sidebar_scrollable)
+        self.load_progress.pack_forget()
+        self.cancel_load_button = ctk.CTkButton(self.sidebar_scrollable, text="Batalkan Pemuatan", fg_color="#8B0000", hover_color="#5C0000", command=self.cancel_channel_loading)
+        self.cancel_load_button.pack_forget()
         self.channel_selector = ChannelSelector(self.sidebar_scrollable)
         self.channel_selector.pack_forget()
         self.set_boundary_button = ctk.CTkButton(self.sidebar_scrollable, text="1. Set Boundary & Identifikasi Frekuensi", command=self.set_boundary)
         self.set_boundary_button.pack_forget()
+        self.tuning_frame = ctk.CTkFrame(self.sidebar_scrollable, fg_color="transparent")
+        self.boundary_rule = ctk.StringVar(value=BOUNDARY_RULES[0])
+        self.boundary_rule_menu = ctk.CTkSegmentedButton(self.tuning_frame, values=list(BOUNDARY_RULES), variable=self.boundary_rule, command=self._schedule_retune)
+        self.boundary_rule_menu.pack(fill="x", pady=(0,5))
+        self.gap_label = ctk.CTkLabel(self.tuning_frame, text="")
+        self.gap_label.pack(anchor="w")
+        self.gap_slider = ctk.CTkSlider(self.tuning_frame, from_=1, to=60, number_of_steps=59, command=self._schedule_retune)
+        self.gap_slider.set(5.0)
+        self.gap_slider.pack(fill="x")
+        self.ratio_label = ctk.CTkLabel(self.tuning_frame, text="")
+        self.ratio_label.pack(anchor="w")
+        self.ratio_slider = ctk.CTkSlider(self.tuning_frame, from_=0.1, to=1.0, number_of_steps=18, command=self._schedule_retune)
+        self.ratio_slider.set(0.5)
+        self.ratio_slider.pack(fill="x")
+        # Slider ini ambang dominasi daya band (aturan ratio), bukan rasio perubahan frekuensi
+        self.ratio_hint = ctk.CTkLabel(self.tuning_frame, text="Frame dipakai bila daya band terkuat > (1 + rasio) x band kedua;\nframe lain dianggap transisi dan tidak memicu boundary.",
+                                       font=("Arial", 10), text_color="gray", justify="left", wraplength=260)
+        self.ratio_hint.pack(anchor="w")
+        self._update_tuning_labels()
+        self.tuning_frame.pack_forget()
         self.delete_mode = ctk.BooleanVar(value=False)
         self.delete_mode_checkbox = ctk.CTkCheckBox(self.sidebar_scrollable, text="Aktifkan Mode Hapus Area (Drag)", variable=self.delete_mode)
         self.delete_mode_checkbox.pack_forget()
+        self.amplitude_method = ctk.StringVar(value=AMPLITUDE_METHODS[0])
+        self.amplitude_method_menu = ctk.CTkSegmentedButton(self.sidebar_scrollable, values=list(AMPLITUDE_METHODS), variable=self.amplitude_method)
+        self.amplitude_method_menu.pack_forget()
         self.extract_button = ctk.CTkButton(self.sidebar_scrollable, text="2. Ekstrak Amplitudo", fg_color="green", hover_color="#006400", command=self.extract_amplitude)
         self.extract_button.pack_forget()
         self.cert_button = ctk.CTkButton(self.sidebar_scrollable, text="3. Buat Sertifikat", command=self.export_certificate)
@@ -70,29 +103,41 @@ class KalibrasiApp(ctk.CTk):
         self.plot_frame.pack(side="right", fill="both", expand=True, padx=10, pady=10)
 
         # === State Variables ===
-        self.stream = None
-        self.boundary_trace = None
+        self.channel_store = None
+        self.boundary_channel = None
+        self.band_track = None
+        self.segment_table = None
         self.boundaries = []
         self.identified_segments = []
         self.latest_admin_data = {}
         self.latest_digitizer_data = {}
         self.latest_amplitude_data = {}
         self.latest_freq_states = {}
+        self.track_cache = TrackCache(cache_dir=os.path.join("data", "cache"))
+        self._retune_job = None
+        self.seed_loader = None
+        self._load_queue = None
+        self._load_poll_job = None
 
     def _maximize(self): self.state("zoomed")
-    def on_closing(self): self.destroy(); self.quit()
+    def on_closing(self): self.stop_channel_loading(); self.workbook.close(); self.plot_frame.figures.destroy(); self.destroy(); self.quit()
 
     def reset_ui_to_initial_state(self):
         print("[INFO] Mereset UI ke kondisi awal.")
+        self.stop_channel_loading()
         self.channel_selector.pack_forget()
         self.set_boundary_button.pack_forget()
+        self.tuning_frame.pack_forget()
         self.delete_mode_checkbox.pack_forget()
         self.delete_mode.set(False)
+        self.amplitude_method_menu.pack_forget()
         self.extract_button.pack_forget()
         self.cert_button.pack_forget()
         self.plot_frame.clear_plot()
-        self.stream = None
-        self.boundary_trace = None
+        self.channel_store = None
+        self.boundary_channel = None
+        self.band_track = None
+        self.segment_table = None
         self.boundaries = []
         self.identified_segments = []
         self.latest_admin_data = {}
@@ -100,23 +145,104 @@ class KalibrasiApp(ctk.CTk):
         self.latest_amplitude_data = {}
         self.latest_freq_states = {}
 
+    def _default_channel_keys(self):
+        """Channel default untuk plot: East-West, North-South, Up-Down (dari akhiran kode channel)."""
+        return default_channel_keys(self.channel_store.keys())
+
     def update_plot_selected_channels(self):
         self.channel_selector.pack(pady=10, fill="x")
         self.set_boundary_button.pack(pady=10, fill="x")
         
-        all_keys = sorted(set(f"{tr.stats.station}.{tr.stats.location}.{tr.stats.channel}" for tr in self.stream))
-        key_map = {"East-West": None, "North-South": None, "Up-Down": None}
-        available_for_mapping = list(all_keys)
-        ch_ending_map = {"Up-Down": ('Z', 'UD'), "North-South": ('N', 'NS'), "East-West": ('E', 'EW')}
-        for label, endings in ch_ending_map.items():
-            found_key = next((key for key in available_for_mapping if key.split('.')[-1].upper().endswith(endings)), None)
-            if found_key: key_map[label] = found_key; available_for_mapping.remove(found_key)
-        remaining_keys = iter(available_for_mapping)
-        for label in key_map:
-            if key_map[label] is None: key_map[label] = next(remaining_keys, "")
-        selected_keys = [key_map["East-West"], key_map["North-South"], key_map["Up-Down"]]; selected_keys = [k for k in selected_keys if k]
-        self.channel_selector.set_channels(all_keys, selected_keys)
-        self.plot_frame.plot_stream(self.stream, self.channel_selector.get_all_selected())
+        self.channel_selector.set_channels(self.channel_store.keys(), self._default_channel_keys())
+        self.plot_frame.plot_stream(self.channel_store, self.channel_selector.get_all_selected())
+
+    def open_seed_file(self, filepath):
+        """
+        Membuka file SEED di thread background (signature + header); setelah metadata siap,
+        channel default dimuat lewat start_channel_loading.
+        """
+        self._start_loader(SeedFileOpener(filepath, queue.Queue()))
+
+    def _on_seed_file_opened(self, store, filepath):
+        self.channel_store = store
+        print(f"File berhasil dimuat: {filepath}")
+        print("Stream Info:")
+        for key in store.keys():
+            meta = store.metadata[key]
+            gaps = f", {len(meta['gaps'])} gap" if meta.get('gaps') else ""
+            print(f"  {key} | {meta['starttime']} | {meta['sampling_rate']} Hz, {meta['npts']} samples{gaps}")
+        # Channel default di-decode di background; plot terisi bertahap, menu berikutnya
+        # muncul setelah pemuatan selesai
+        self.start_channel_loading(filepath)
+
+    def start_channel_loading(self, filepath):
+        """
+        Memuat channel default. Channel yang belum ada di cache di-decode di thread background;
+        overview plot terisi bertahap dan pemuatan bisa dibatalkan. Menu analisis baru muncul
+        setelah semua channel selesai dimuat.
+        """
+        keys = self._default_channel_keys()
+        if all(is_channel_cached(self.channel_store, key) for key in keys):
+            self.update_plot_selected_channels(); return
+
+        self.plot_frame.begin_progressive_plot(self.channel_store, keys)
+        self._start_loader(ProgressiveSeedLoader(filepath, self.channel_store.metadata, keys, queue.Queue(),
+                                                 persist=self.channel_store.persist))
+
+    def _start_loader(self, loader):
+        """Satu worker pemuatan aktif dengan satu poll after(); worker lama dihentikan dulu."""
+        self.stop_channel_loading()
+        self.seed_loader, self._load_queue = loader, loader.out_queue
+        self.load_progress.set(0)
+        self.load_progress.pack(pady=(10,0), fill="x")
+        self.cancel_load_button.pack(pady=(5,10), fill="x")
+        loader.start()
+        self._load_poll_job = self.after(100, self._poll_channel_loading)
+
+    def cancel_channel_loading(self):
+        """Tombol batal: worker diberi tanda, hasil ("cancelled") tetap diterima lewat poll."""
+        if self.seed_loader is not None: self.seed_loader.cancel()
+
+    def stop_channel_loading(self):
+        """Menghentikan worker dan poll-nya seketika (reset/tutup); pesan yang tersisa di queue dibuang."""
+        if self._load_poll_job is not None: self.after_cancel(self._load_poll_job)
+        if self.seed_loader is not None: self.seed_loader.cancel()
+        self.seed_loader = self._load_queue = self._load_poll_job = None
+        self.load_progress.pack_forget()
+        self.cancel_load_button.pack_forget()
+
+    def _poll_channel_loading(self):
+        self._load_poll_job = None
+        if self.seed_loader is None: return
+        finished = None
+        try:
+            while finished is None:
+                msg = self._load_queue.get_nowait()
+                if msg[0] == "chunk": self.plot_frame.append_progressive_chunk(*msg[1:])
+                elif msg[0] == "progress": self.load_progress.set(msg[1])
+                else: finished = msg
+        except queue.Empty:
+            pass
+        self.plot_frame.refresh_progressive_plot()
+        if finished is None:
+            self._load_poll_job = self.after(100, self._poll_channel_loading); return
+
+        self.stop_channel_loading()
+        if finished[0] == "opened":
+            self._on_seed_file_opened(*finished[1:])
+        elif finished[0] == "done":
+            # Sidecar sudah ditulis worker; di thread Tk data hanya dimasukkan ke memori
+            for key, data in finished[1].items():
+                self.channel_store.put(key, data, persist=False)
+            self.update_plot_selected_channels()
+        elif finished[0] == "cancelled":
+            print("[INFO] Pemuatan file SEED dibatalkan.")
+            self.plot_frame.clear_plot()
+            self.channel_store = None
+        else:
+            messagebox.showerror("Error", f"Gagal memuat file SEED:\n{finished[1]}")
+            self.plot_frame.clear_plot()
+            self.channel_store = None
 
     def show_admin_popup(self):
         existing_data = self.load_admin_data_from_excel()
@@ -129,64 +255,77 @@ class KalibrasiApp(ctk.CTk):
             channel_key = self.channel_selector.get_selected_channels()
             if not channel_key: return
             try:
-                station, location, channel = channel_key.split(".")
-                trace = self.stream.select(station=station, location=location, channel=channel).merge(method=1)[0]
+                data, fs = self.channel_store.data(channel_key), self.channel_store.sampling_rate(channel_key)
             except Exception as e:
                 print(f"Error selecting trace: {e}"); return
             
-            self.boundary_trace = trace
-            self.boundaries = detect_frequency_boundaries(trace)
+            self.boundary_channel = channel_key
+            # Track daya di frekuensi standar dipakai untuk deteksi boundary sekaligus klasifikasi segmen
+            gaps = self.channel_store.gap_index(channel_key)
+            self.band_track = cached_band_power_track(self.track_cache, data, fs, gaps=gaps)
+            self.segment_table = SegmentTable(data, fs, band_track=self.band_track, gaps=gaps)
+            self.boundaries = self._boundaries_from_track()
             self.plot_frame.add_boundaries(self.boundaries)
             
             self._identify_and_annotate_segments()
             
             self.set_boundary_button.configure(text="Reload Boundary & Identifikasi Ulang")
+            self.tuning_frame.pack(pady=(0,10), fill="x")
             self.delete_mode_checkbox.pack(pady=(10,5), anchor="w")
+            self.amplitude_method_menu.pack(pady=(5,0), fill="x")
             self.extract_button.pack(pady=5, fill="x")
         finally:
             loading.stop()
 
+    def _update_tuning_labels(self):
+        self.gap_label.configure(text=f"Jarak min. boundary: {self.gap_slider.get():.0f} s")
+        self.ratio_label.configure(text=f"Rasio dominasi daya band: {self.ratio_slider.get():.2f}")
+
+    def _schedule_retune(self, _value=None):
+        """Debounce slider: ambang ulang hanya dijalankan setelah slider berhenti digeser."""
+        self._update_tuning_labels()
+        if self._retune_job: self.after_cancel(self._retune_job)
+        self._retune_job = self.after(250, self._retune_boundaries)
+
+    def _boundaries_from_track(self):
+        """Boundary dari self.band_track sesuai aturan dan parameter di sidebar."""
+        if self.boundary_rule.get() == "changepoint":
+            change_points = change_point_boundaries_from_band_power(*self.band_track, min_gap_seconds=self.gap_slider.get())
+            for t, confidence in change_points:
+                print(f"[CHANGE-POINT] {t:.1f}s (confidence {confidence:.2f})")
+            return [t for t, _ in change_points]
+        return boundaries_from_band_power(*self.band_track, min_gap_seconds=self.gap_slider.get(), change_ratio=self.ratio_slider.get())
+
+    def _retune_boundaries(self):
+        """Menghitung ulang boundary dari track yang sudah ada (tanpa spektogram/FFT ulang)."""
+        self._retune_job = None
+        if self.band_track is None: return
+        self.boundaries = self._boundaries_from_track()
+        self.plot_frame.add_boundaries(self.boundaries)
+        self._identify_and_annotate_segments()
+
     def _identify_and_annotate_segments(self):
         """
         Mengidentifikasi segmen frekuensi berdasarkan self.boundaries saat ini
         dan langsung menggambar anotasinya di plot.
         """
-        if not self.boundary_trace: return
-
-        # Tambahkan awal dan akhir sinyal ke daftar boundary untuk analisis lengkap
-        start_time = 0
-        end_time = self.boundary_trace.stats.npts / self.boundary_trace.stats.sampling_rate
-        full_boundaries = sorted(list(set([start_time] + self.boundaries + [end_time])))
-
-        standard_freqs = np.array([0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1, 2, 5, 10, 15, 20])
-        minimum_duration_seconds = 50
-        self.identified_segments.clear()
+        if self.segment_table is None: return
+        self.segment_table.set_boundaries(self.boundaries)
+        self.identified_segments = self.segment_table.segments()
 
         print("\n--- Mengidentifikasi Ulang Segmen Frekuensi ---")
-        for i in range(len(full_boundaries) - 1):
-            t_start = full_boundaries[i]
-            t_end = full_boundaries[i+1]
-
-            if (t_end - t_start) < minimum_duration_seconds:
-                continue
-
-            segment = self.boundary_trace.slice(self.boundary_trace.stats.starttime + t_start, self.boundary_trace.stats.starttime + t_end)
-            if len(segment.data) == 0: continue
-
-            detected_freq = detect_dominant_frequency(segment.data, segment.stats.sampling_rate)
-            classified_freq = standard_freqs[np.argmin(np.abs(standard_freqs - detected_freq))]
-            
-            self.identified_segments.append((t_start, t_end, classified_freq))
-            print(f"Segmen ({t_start:.1f}s-{t_end:.1f}s): Teridentifikasi -> {classified_freq} Hz")
+        for segment in self.identified_segments:
+            print(f"Segmen ({segment.t_start:.1f}s-{segment.t_end:.1f}s): Teridentifikasi -> {segment.freq} Hz")
 
         self.plot_frame.add_frequency_annotations(self.identified_segments)
 
     def delete_boundaries_in_range(self, times_to_delete):
-        times_set = set(times_to_delete)
-        self.boundaries = [b for b in self.boundaries if b not in times_set]
-        print(f"{len(times_set)} data boundary dihapus dari list.")
+        if self.segment_table is None: return
+        removed = self.segment_table.remove_boundaries(times_to_delete)
+        self.boundaries = list(self.segment_table.boundaries)
+        print(f"{removed} data boundary dihapus dari list.")
         
-        # Panggil ulang identifikasi dan anotasi setelah menghapus
+        # Identifikasi ulang: hanya segmen gabungan baru yang dianalisis, sisanya dari cache
         self._identify_and_annotate_segments()
 
     def extract_amplitude(self):
@@ -196,29 +335,30 @@ class KalibrasiApp(ctk.CTk):
             if not self.identified_segments:
                 messagebox.showwarning("Perhatian", "Tidak ada segmen teridentifikasi untuk diekstrak.")
                 return
-            all_results = {}
-            points_to_plot = {}
             standard_freqs = set([0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1, 2, 5, 10, 15, 20])
-            for t_start, t_end, freq in self.identified_segments:
-                values_by_ch = {}
-                for ch_key in self.channel_selector.get_all_selected():
-                    if not ch_key: continue
-                    station, loc, ch = ch_key.split(".")
-                    trace_ch = self.stream.select(station=station, location=loc, channel=ch).merge(method=1)[0]
-                    segment_ch = trace_ch.slice(trace_ch.stats.starttime + t_start, trace_ch.stats.starttime + t_end)
-                    best_pairs_info = find_best_amplitude_pairs(segment_ch.data)
-                    simple_pairs = [(p['peak']['value'], p['trough']['value']) for p in best_pairs_info]
-                    simple_name = "UD" if ch.upper().endswith(('Z', 'UD')) else "NS" if ch.upper().endswith(('N', 'NS')) else "EW" if ch.upper().endswith(('E', 'EW')) else None
-                    if simple_name: values_by_ch[simple_name] = simple_pairs
-                    if ch_key not in points_to_plot: points_to_plot[ch_key] = []
-                    fs = segment_ch.stats.sampling_rate
-                    for pair in best_pairs_info:
-                        points_to_plot[ch_key].append((t_start + (pair['peak']['index'] / fs), pair['peak']['value']))
-                        points_to_plot[ch_key].append((t_start + (pair['trough']['index'] / fs), pair['trough']['value']))
-                if freq in all_results:
-                    for ch_name, pairs in values_by_ch.items(): all_results[freq].setdefault(ch_name, []).extend(pairs)
-                else:
-                    all_results[freq] = values_by_ch
+
+            # Data setiap channel diambil dari ChannelStore; tiap Segment diambil sebagai view dari array ini
+            channel_data = {}
+            for ch_key in self.channel_selector.get_all_selected():
+                if not ch_key or ch_key in channel_data: continue
+                channel_data[ch_key] = self.channel_store.data(ch_key)
+            if not channel_data: return
+
+            method = self.amplitude_method.get()
+            diagnostics = {}
+            try:
+                pairs_by_ch = extract_amplitude_batch(channel_data, self.identified_segments, method=method, diagnostics=diagnostics,
+                                                      gaps={ch_key: self.channel_store.gap_index(ch_key) for ch_key in channel_data},
+                                                      channel_timing=self.channel_store.channel_timing(channel_data, self.boundary_channel))
+            except ValueError as e:
+                messagebox.showerror("Error", f"Ekstraksi amplitudo gagal:\n{e}")
+                return
+            for ch_key, fits in diagnostics.items():
+                for segment, fit in zip(self.identified_segments, fits):
+                    if fit: print(f"[SINEFIT] {ch_key} {segment.freq} Hz ({segment.t_start:.1f}s-{segment.t_end:.1f}s): p-p={fit['peak_to_peak']:.1f}, residual RMS={fit['residual_rms']:.1f}, confidence={fit['confidence']:.3f}")
+
+            all_results = collect_amplitude_results(self.identified_segments, pairs_by_ch)
+            points_to_plot = {ch_key: AmplitudePairs.concatenate(per_segment) for ch_key, per_segment in pairs_by_ch.items()}
             
             self.latest_amplitude_data = all_results
             self.latest_freq_states = {freq: (freq in all_results) for freq in standard_freqs}
@@ -231,10 +371,6 @@ class KalibrasiApp(ctk.CTk):
             loading.stop()
 
     def export_certificate(self):
-        source_excel_path = os.path.join("data", "amplitudo_ekstraksi.xlsx")
-        if not os.path.exists(source_excel_path):
-            messagebox.showerror("Error", f"File data '{os.path.basename(source_excel_path)}' tidak ditemukan."); return
-        
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         suggested_name = f"Sertifikat_Final_{timestamp}.pdf"
         
@@ -252,25 +388,15 @@ class KalibrasiApp(ctk.CTk):
         loading = LoadingIndicator(self, "Membuat Sertifikat...")
         self.update_idletasks()
         try:
-            temp_excel_path = pdf_path.replace(".pdf", ".xlsx")
-            shutil.copy(source_excel_path, temp_excel_path)
-            
-            wb = openpyxl.load_workbook(temp_excel_path)
-            if 'SERTIF_SEISMO' not in wb.sheetnames:
-                messagebox.showerror("Error", "Sheet 'SERTIF_SEISMO' tidak ditemukan."); wb.close(); return
-            
-            ws_cert = wb['SERTIF_SEISMO']
             plot_image_path = "data/plots/clean_plot.png"
-            if os.path.exists(plot_image_path):
-                img = Image(plot_image_path); img.width *= 0.90; img.height *= 0.50
-                ws_cert.add_image(img, 'B136')
-            
-            wb.save(temp_excel_path)
-            
-            self._export_sheet_to_pdf(temp_excel_path, 'SERTIF_SEISMO', pdf_path)
-            
-            os.remove(temp_excel_path)
-            
+            extra_images = [(plot_image_path, 'B136', 0.90, 0.50)] if os.path.exists(plot_image_path) else []
+            # Tulisan yang masih antre (mis. amplitudo yang baru diekstrak) diselesaikan dan disimpan dulu,
+            # lalu dirender langsung dari workbook di memori WorkbookSession: tanpa salinan xlsx maupun Excel
+            self.workbook.flush()
+            self.workbook.read(lambda wb: render_certificate_pdf(wb, pdf_path, CERTIFICATE_SHEET, extra_images))
+            messagebox.showinfo("Sukses", f"Berhasil ekspor sertifikat ke:\n{os.path.abspath(pdf_path)}")
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
         except Exception as e:
             messagebox.showerror("Error", f"Gagal membuat file sertifikat:\n{e}")
         finally:
@@ -278,34 +404,13 @@ class KalibrasiApp(ctk.CTk):
 
     # ... Sisa file (fungsi helper) tidak berubah ...
     def load_admin_data_from_excel(self):
-        filepath = os.path.join("data", "amplitudo_ekstraksi.xlsx")
-        if not os.path.exists(filepath): return {}
         try:
-            wb = openpyxl.load_workbook(filepath, data_only=True)
-            if "data_administrasi" not in wb.sheetnames: return {}
-            ws = wb["data_administrasi"]; data = {}
-            for row in ws.iter_rows(min_row=1, max_col=2):
-                key_cell, value_cell = row
-                if key_cell.value and value_cell.value is not None: data[str(key_cell.value)] = str(value_cell.value)
-            return data
+            return self.workbook.read(read_admin_sheet)
         except Exception as e:
             print(f"Gagal memuat data admin: {e}"); return {}
-    def _get_or_create_workbook_and_sheet(self, filepath, sheet_name):
-        try: wb = openpyxl.load_workbook(filepath)
-        except FileNotFoundError:
-            wb = openpyxl.Workbook()
-            if 'Sheet' in wb.sheetnames: wb.remove(wb['Sheet'])
-        if sheet_name in wb.sheetnames: wb.remove(wb[sheet_name])
-        ws = wb.create_sheet(sheet_name)
-        return wb, ws
     def save_admin_data_to_excel(self, data):
-        self.latest_admin_data = data; output_file = os.path.join("data", "amplitudo_ekstraksi.xlsx")
-        wb, ws = self._get_or_create_workbook_and_sheet(output_file, 'data_administrasi')
-        ws.column_dimensions['A'].width = 35; ws.column_dimensions['B'].width = 50
-        row = 1
-        for key, value in data.items():
-            ws.cell(row=row, column=1, value=key).font = Font(bold=True); ws.cell(row=row, column=2, value=value); row += 1
-        wb.save(output_file); print(f"Data admin disimpan ke {output_file}")
+        self.latest_admin_data = data
+        self.workbook.write_sheet(ADMIN_SHEET, write_admin_sheet, dict(data)); print("Data admin dijadwalkan untuk disimpan.")
     def save_selected_digitizer_to_excel(self, selected_name):
         if selected_name == "Add New...": return
         try:
@@ -313,51 +418,11 @@ class KalibrasiApp(ctk.CTk):
         except (FileNotFoundError, json.JSONDecodeError): return
         selected_data = next((d for d in digitizers if d.get("Name") == selected_name), None)
         if not selected_data: return
-        self.latest_digitizer_data = selected_data; output_file = os.path.join("data", "amplitudo_ekstraksi.xlsx")
-        wb, ws = self._get_or_create_workbook_and_sheet(output_file, 'data_digitizer')
-        ws.column_dimensions['A'].width = 25; ws.column_dimensions['B'].width = 40
-        row = 1
-        for key, value in selected_data.items():
-            ws.cell(row=row, column=1, value=key).font = Font(bold=True); ws.cell(row=row, column=2, value=value); row += 1
-        wb.save(output_file); print(f"Data digitizer disimpan ke {output_file}")
-    def _write_amplitude_data_to_sheet(self, ws, processed_data, all_freq_states):
-        headers = ["FREKUENSI (Hz)", "NS Max", "NS Min", "EW Max", "EW Min", "UD Max", "UD Min"]
-        for col, h in enumerate(headers, start=2):
-            cell = ws.cell(row=4, column=col, value=h); cell.font = Font(bold=True); cell.alignment = Alignment(horizontal="center")
-            if "NS" in h: cell.fill = PatternFill(fill_type="solid", start_color="BDD7EE")
-            elif "EW" in h: cell.fill = PatternFill(fill_type="solid", start_color="FFE699")
-            elif "UD" in h: cell.fill = PatternFill(fill_type="solid", start_color="C6E0B4")
-        row_idx = 5
-        for freq in sorted(all_freq_states.keys()):
-            is_enabled = all_freq_states.get(freq, False)
-            ws.cell(row=row_idx, column=2, value=float(freq)).font = Font(bold=True)
-            if is_enabled and freq in processed_data:
-                ch_data = processed_data.get(freq, {}); ns_pairs = ch_data.get("NS", []); ew_pairs = ch_data.get("EW", []); ud_pairs = ch_data.get("UD", []); max_rows_for_freq = max(len(ns_pairs), len(ew_pairs), len(ud_pairs), 1)
-                for i in range(max_rows_for_freq):
-                    current_row = row_idx + i
-                    if i < len(ns_pairs): ws.cell(row=current_row, column=3, value=ns_pairs[i][0]); ws.cell(row=current_row, column=4, value=ns_pairs[i][1])
-                    if i < len(ew_pairs): ws.cell(row=current_row, column=5, value=ew_pairs[i][0]); ws.cell(row=current_row, column=6, value=ew_pairs[i][1])
-                    if i < len(ud_pairs): ws.cell(row=current_row, column=7, value=ud_pairs[i][0]); ws.cell(row=current_row, column=8, value=ud_pairs[i][1])
-                row_idx += max_rows_for_freq
-            else: row_idx += 1
+        self.latest_digitizer_data = selected_data
+        self.workbook.write_sheet(DIGITIZER_SHEET, write_digitizer_sheet, dict(selected_data)); print("Data digitizer dijadwalkan untuk disimpan.")
     def save_amplitude_data_to_excel(self):
-        output_file = os.path.join("data", "amplitudo_ekstraksi.xlsx")
-        wb, ws = self._get_or_create_workbook_and_sheet(output_file, 'data_auto')
-        self._write_amplitude_data_to_sheet(ws, self.latest_amplitude_data, self.latest_freq_states)
-        wb.save(output_file); print(f"Data amplitudo disimpan ke {output_file}")
-    def _export_sheet_to_pdf(self, excel_path, sheet_name, pdf_path):
-        if not IS_WINDOWS:
-            messagebox.showerror("Error", "Ekspor PDF otomatis hanya di Windows dengan Excel."); return False
-        excel = None
-        try:
-            excel = win32com.client.Dispatch("Excel.Application"); excel.Visible = False; excel_path_abs = os.path.abspath(excel_path); pdf_path_abs = os.path.abspath(pdf_path)
-            workbook = excel.Workbooks.Open(excel_path_abs); workbook.Worksheets(sheet_name).Activate(); workbook.ActiveSheet.ExportAsFixedFormat(0, pdf_path_abs)
-            messagebox.showinfo("Sukses", f"Berhasil ekspor sertifikat ke:\n{pdf_path_abs}"); return True
-        except Exception as e:
-            messagebox.showerror("Error", f"Gagal ekspor ke PDF:\n{e}\n\nPastikan MS Excel terinstal & sheet '{sheet_name}' ada."); return False
-        finally:
-            if excel and hasattr(excel, 'ActiveWorkbook') and excel.ActiveWorkbook: excel.ActiveWorkbook.Close(SaveChanges=False)
-            if excel: excel.Quit()
+        self.workbook.write_sheet(AMPLITUDE_SHEET, write_amplitude_sheet, dict(self.latest_amplitude_data), dict(self.latest_freq_states))
+        print("Data amplitudo dijadwalkan untuk disimpan.")
 
 if __name__ == '__main__':
     app = KalibrasiApp()
@@ -0,0 +1,33 @@
+# kalibrasi_app/gui/plotting/decimated_line.py
+
+from modules.minmax_pyramid import MinMaxPyramid
+
+class DecimatedLine:
+    """
+    Line2D waveform yang hanya berisi envelope min/max dari rentang x yang terlihat
+    (lihat MinMaxPyramid.envelope). Data garis dihitung ulang setiap xlim berubah
+    (zoom/pan, termasuk lewat sharex) atau ukuran sumbu berubah, sehingga biaya
+    draw bergantung pada lebar sumbu dalam piksel, bukan panjang data.
+    """
+    def __init__(self, ax, data, sampling_rate, **line_kwargs):
+        self.ax = ax
+        self.pyramid = MinMaxPyramid(data, sampling_rate)
+        self.duration = len(data) / float(sampling_rate)
+        # Envelope seluruh durasi dipakai untuk data awal, sehingga autoscale sumbu y mencakup semua puncak
+        self._view = (0.0, self.duration, self._width())
+        self.line, = ax.plot(*self.pyramid.envelope(*self._view), **line_kwargs)
+        self._cid = ax.callbacks.connect('xlim_changed', lambda _ax: self.update())
+
+    def _width(self):
+        return max(int(self.ax.bbox.width), 100)
+
+    def update(self):
+        """Menghitung ulang envelope jika rentang x atau lebar sumbu (piksel) berubah."""
+        view = (*self.ax.get_xlim(), self._width())
+        if view == self._view: return
+        self._view = view
+        self.line.set_data(*self.pyramid.envelope(*view))
+
+    def remove(self):
+        self.ax.callbacks.disconnect(self._cid)
+        self.line.remove()
@@ -0,0 +1,86 @@
+# kalibrasi_app/gui/plotting/figure_manager.py
+
+import gc
+import weakref
+
+from matplotlib import _pylab_helpers
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from matplotlib.collections import Collection
+from matplotlib.figure import Figure
+from matplotlib.image import AxesImage
+from matplotlib.lines import Line2D
+
+_managers = weakref.WeakSet()
+
+class FigureManager:
+    """
+    Satu Figure + satu FigureCanvasTkAgg per frame/jendela, tanpa pyplot.
+
+    Figure dibuat langsung dari matplotlib.figure.Figure sehingga tidak pernah masuk
+    registry global pyplot; new_figure() memakai ulang figure dan canvas yang sama
+    (callback mpl_connect tetap terpasang), reset() membuang semua axes beserta datanya,
+    dan destroy() melepas canvas saat frame/jendela ditutup.
+    """
+    def __init__(self, master, name):
+        self.master = master
+        self.name = name
+        self.figure = None
+        self.canvas = None
+        self.created = 0
+        self.resets = 0
+        _managers.add(self)
+
+    def new_figure(self, figsize, facecolor=None):
+        """Figure kosong siap diisi (subplots/add_subplot) dengan ukuran dan warna latar yang diminta."""
+        if self.figure is None:
+            self.figure = Figure(figsize=figsize, facecolor=facecolor)
+            self.canvas = FigureCanvasTkAgg(self.figure, master=self.master)
+            self.created += 1
+        else:
+            self.reset()
+            self.figure.set_size_inches(figsize, forward=False)
+            if facecolor is not None: self.figure.set_facecolor(facecolor)
+        return self.figure
+
+    def reset(self):
+        """Membuang semua axes/artist (dan data sampel yang dipegangnya) dari figure."""
+        if self.figure is None: return
+        self.figure.clear()
+        self.resets += 1
+
+    def destroy(self):
+        if self.canvas is not None: self.canvas.get_tk_widget().destroy()
+        if self.figure is not None: self.figure.clear()
+        self.figure = self.canvas = None
+        _managers.discard(self)
+
+    def data_bytes(self):
+        """Perkiraan byte array data yang dipegang artist di figure (garis, koleksi, gambar)."""
+        if self.figure is None: return 0
+        total = 0
+        for artist in self.figure.findobj(lambda a: isinstance(a, (Line2D, Collection, AxesImage))):
+            if isinstance(artist, Line2D): total += artist.get_xydata().nbytes
+            elif isinstance(artist, Collection): total += artist.get_offsets().nbytes + sum(p.vertices.nbytes for p in artist.get_paths())
+            elif artist.get_array() is not None: total += artist.get_array().nbytes
+        return total
+
+def figure_stats():
+    """
+    Ringkasan untuk debug kebocoran figure: manager yang hidup, figure di registry pyplot,
+    semua objek Figure yang masih hidup (lewat gc), dan byte data per manager.
+    """
+    managers = sorted(_managers, key=lambda manager: manager.name)
+    return {
+        'managers': [{'name': manager.name, 'active': manager.figure is not None, 'axes': len(manager.figure.axes) if manager.figure else 0,
+                      'created': manager.created, 'resets': manager.resets, 'data_bytes': manager.data_bytes()} for manager in managers],
+        'pyplot_figures': _pylab_helpers.Gcf.get_num_fig_managers(),
+        'live_figures': sum(isinstance(obj, Figure) for obj in gc.get_objects()),
+    }
+
+def format_figure_stats(stats=None):
+    stats = figure_stats() if stats is None else stats
+    lines = [f"[FIGURE] figure hidup: {stats['live_figures']}, registry pyplot: {stats['pyplot_figures']}, manager: {len(stats['managers'])}"]
+    for manager in stats['managers']:
+        lines.append(f"  {manager['name']}: {'aktif' if manager['active'] else 'kosong'}, {manager['axes']} axes, "
+                     f"{manager['data_bytes'] / 2**20:.1f} MB data, dibuat {manager['created']}x, reset {manager['resets']}x")
+    return "\n".join(lines)
@@ -0,0 +1,96 @@
+# kalibrasi_app/gui/plotting/overlay_layers.py
+
+import matplotlib
+import numpy as np
+from matplotlib.collections import LineCollection, PolyCollection
+
+SEGMENT_COLORS = matplotlib.colormaps['tab10'].colors
+
+class BoundaryLayer:
+    """
+    Garis boundary vertikal di semua subplot: satu LineCollection per sumbu (x = data,
+    y = koordinat sumbu 0..1) yang segmennya diganti di tempat, bukan satu axvline per
+    boundary per sumbu.
+    """
+    def __init__(self, axes, color='red', linewidth=1.5):
+        self.times = np.empty(0)
+        self.collections = []
+        for ax in axes:
+            collection = LineCollection([], colors=color, linewidths=linewidth, transform=ax.get_xaxis_transform(), animated=True)
+            ax.add_collection(collection, autolim=False)
+            self.collections.append(collection)
+
+    @property
+    def artists(self):
+        return self.collections
+
+    def set_times(self, times):
+        self.times = np.sort(np.asarray(times, dtype=float))
+        segments = np.zeros((len(self.times), 2, 2))
+        segments[:, :, 0] = self.times[:, None]
+        segments[:, 1, 1] = 1.0
+        for collection in self.collections:
+            collection.set_segments(segments)
+
+    def times_in_range(self, t_min, t_max):
+        """Waktu boundary di dalam [t_min, t_max]."""
+        return self.times[(self.times >= t_min) & (self.times <= t_max)]
+
+class SegmentSpanLayer:
+    """
+    Pita warna + label frekuensi per segmen di satu sumbu: semua pita dalam satu
+    PolyCollection; label memakai pool Text yang dipakai ulang (teks di matplotlib tidak
+    punya bentuk koleksi), label yang tidak terpakai hanya disembunyikan. Hanya label
+    segmen yang terlihat dan cukup lebar (min_label_pixels) yang digambar, sehingga
+    jumlah label per draw dibatasi lebar sumbu, bukan jumlah segmen.
+    """
+    def __init__(self, ax, alpha=0.3, label_y=0.95, min_label_pixels=40):
+        self.ax = ax
+        self.label_y = label_y
+        self.min_label_pixels = min_label_pixels
+        self.extents = np.empty((0, 2))
+        self.spans = PolyCollection([], alpha=alpha, edgecolors='none', transform=ax.get_xaxis_transform(), animated=True)
+        ax.add_collection(self.spans, autolim=False)
+        self.labels = []
+
+    @property
+    def artists(self):
+        if len(self.extents) == 0: return [self.spans]
+        x_min, x_max = sorted(self.ax.get_xlim())
+        pixels_per_second = self.ax.bbox.width / max(x_max - x_min, 1e-12)
+        shown = np.flatnonzero((self.extents[:, 1] >= x_min) & (self.extents[:, 0] <= x_max)
+                               & ((self.extents[:, 1] - self.extents[:, 0]) * pixels_per_second >= self.min_label_pixels))
+        return [self.spans] + [self.labels[i] for i in shown]
+
+    def _label(self, i):
+        while len(self.labels) <= i:
+            self.labels.append(self.ax.text(0, self.label_y, "", transform=self.ax.get_xaxis_transform(), ha='center', va='top',
+                                            color='white', fontweight='bold', fontsize=10, animated=True, visible=False,
+                                            bbox=dict(alpha=0.7, edgecolor='none', boxstyle='round,pad=0.3')))
+        return self.labels[i]
+
+    def set_segments(self, segments):
+        """segments: list Segment (t_start, t_end, freq); warna bergiliran dari SEGMENT_COLORS."""
+        colors = [SEGMENT_COLORS[i % len(SEGMENT_COLORS)] for i in range(len(segments))]
+        self.extents = np.array([(segment.t_start, segment.t_end) for segment in segments], dtype=float).reshape(-1, 2)
+        self.spans.set_verts([[(s.t_start, 0), (s.t_start, 1), (s.t_end, 1), (s.t_end, 0)] for s in segments])
+        self.spans.set_facecolor(colors)
+        for i, (segment, color) in enumerate(zip(segments, colors)):
+            label = self._label(i)
+            label.set_position(((segment.t_start + segment.t_end) / 2, self.label_y))
+            label.set_text(f"{segment.freq} Hz")
+            label.get_bbox_patch().set_facecolor(color)
+            label.set_visible(True)
+        for label in self.labels[len(segments):]:
+            label.set_visible(False)
+
+class MarkerLayer:
+    """Titik amplitudo terpilih di satu sumbu sebagai satu scatter yang offset-nya diganti di tempat."""
+    def __init__(self, ax, color='blue', size=25, label='Amplitudo Terpilih'):
+        self.scatter = ax.scatter([], [], s=size, c=color, label=label, zorder=10)
+
+    def set_points(self, times, values):
+        self.scatter.set_offsets(np.column_stack((times, values)) if len(times) else np.empty((0, 2)))
+
+    def __len__(self):
+        return len(self.scatter.get_offsets())
@@ -1,12 +1,15 @@
 # kalibrasi_app/gui/plotting/plot_frame.py
 
 import customtkinter as ctk
-import matplotlib.pyplot as plt
 import numpy as np
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
-from obspy import Stream
+from matplotlib.backends.backend_tkagg import NavigationToolbar2Tk
 import os
 
+from gui.plotting.decimated_line import DecimatedLine
+from gui.plotting.figure_manager import FigureManager
+from gui.plotting.overlay_layers import BoundaryLayer, MarkerLayer, SegmentSpanLayer
+from gui.widgets.amplitude_table import AmplitudeTable
+
 class PlotFrame(ctk.CTkFrame):
     def __init__(self, parent, on_boundaries_deleted_in_range=None):
         super().__init__(parent)
@@ -21,93 +24,114 @@ class PlotFrame(ctk.CTkFrame):
         
         self.current_ax = None
         self.fig = None
-        self.plotted_points = []
-        self.annotations = []
-        self.boundary_lines = []
+        # Satu Figure + canvas + toolbar untuk frame ini, dipakai ulang di setiap plot (lihat FigureManager)
+        self.figures = FigureManager(self, "PlotFrame")
+        # Lapisan overlay/marker: satu koleksi per lapisan, dibuat sekali per figure lalu diperbarui di tempat
+        self.boundary_layer = None
+        self.span_layer = None
+        self.marker_layers = {}
+        self.progressive_lines = {}
+        self.waveform_lines = []
+        # Latar (waveform) hasil draw penuh terakhir; overlay di-blit di atasnya
+        self._background = None
 
         # Variabel untuk drag-delete
         self.drag_start_x = None
         self.selection_rect = None
 
     def clear_plot(self):
-        """Membersihkan semua elemen plot, toolbar, tabel, dan anotasi secara tuntas."""
-        if self.canvas: self.canvas.get_tk_widget().destroy()
-        if self.bottom_frame: self.bottom_frame.destroy()
-        if self.amplitude_table: self.amplitude_table.pack_forget(); self.amplitude_table.destroy()
+        """
+        Membersihkan plot, tabel, dan anotasi: canvas dan toolbar disembunyikan (dipakai
+        ulang untuk plot berikutnya) dan semua axes beserta datanya dibuang dari figure.
+        """
+        if self.canvas: self.canvas.get_tk_widget().pack_forget()
+        if self.bottom_frame: self.bottom_frame.pack_forget()
+        if self.amplitude_table: self.amplitude_table.pack_forget(); self.amplitude_table.clear()
+        self.figures.reset()
 
-        self.clear_annotations()
-        self.clear_points()
-        self.clear_boundaries()
-        
-        # Reset semua referensi widget ke None
-        self.canvas = self.toolbar = self.amplitude_table = self.bottom_frame = None
+        # Lapisan overlay ikut hilang bersama axes-nya
+        self.canvas = None
         self.current_ax = self.fig = None
+        self.boundary_layer = self.span_layer = None
+        self.marker_layers = {}
+        self.selection_rect = None
+        self.progressive_lines = {}
+        self.waveform_lines = []
+        self._background = None
 
     def clear_annotations(self):
-        """Menghapus semua kotak warna dan teks anotasi dari plot."""
-        for annotation in self.annotations:
-            annotation.remove()
-        self.annotations.clear()
-        if self.canvas:
-            self.canvas.draw()
+        """Mengosongkan kotak warna dan teks anotasi segmen."""
+        if self.span_layer is None: return
+        self.span_layer.set_segments([])
+        self.refresh_overlay()
 
     def clear_points(self):
-        """Menghapus semua titik sampel biru dari plot."""
-        for point in self.plotted_points:
-            point.remove()
-        self.plotted_points.clear()
+        """Mengosongkan titik amplitudo terpilih."""
+        for layer in self.marker_layers.values():
+            layer.set_points([], [])
 
     def clear_boundaries(self):
-        """Menghapus semua garis boundary merah dari plot."""
-        for line in self.boundary_lines:
-            line.remove()
-        self.boundary_lines.clear()
+        """Mengosongkan garis boundary merah."""
+        if self.boundary_layer is None: return
+        self.boundary_layer.set_times([])
+        self.refresh_overlay()
 
     def add_boundaries(self, boundaries):
-        """Menambahkan garis boundary ke semua subplot yang ada."""
+        """Menampilkan garis boundary (detik) di semua subplot, menggantikan yang sebelumnya."""
         if not self.fig or not self.fig.axes: return
-        self.clear_boundaries()
-        for ax in self.fig.axes:
-            for t in boundaries:
-                line = ax.axvline(x=t, color='red', linewidth=1.5, linestyle='-')
-                self.boundary_lines.append(line)
-        self.canvas.draw()
+        if self.boundary_layer is None: self.boundary_layer = BoundaryLayer(self.fig.axes)
+        self.boundary_layer.set_times(boundaries)
+        self.refresh_overlay()
         
     def add_frequency_annotations(self, segments):
-        """Menggambar kotak berwarna dan teks untuk setiap segmen frekuensi yang teridentifikasi."""
+        """Menampilkan kotak berwarna dan teks untuk setiap Segment yang teridentifikasi, di sumbu utama."""
         if not self.fig or not self.fig.axes: return
-        self.clear_annotations()
-        colors = plt.cm.get_cmap('tab10', 10).colors
-        main_ax = self.fig.axes[0] # Anotasi digambar relatif terhadap sumbu utama
-        for i, (start_time, end_time, freq) in enumerate(segments):
-            color = colors[i % len(colors)]
-            span = main_ax.axvspan(start_time, end_time, color=color, alpha=0.3)
-            text_x = start_time + (end_time - start_time) / 2
-            text_y = main_ax.get_ylim()[1] * 0.9
-            text = main_ax.text(text_x, text_y, f"{freq} Hz", 
-                                        ha='center', va='top', color='white', 
-                                        fontweight='bold', fontsize=10,
-                                        bbox=dict(facecolor=color, alpha=0.7, edgecolor='none', boxstyle='round,pad=0.3'))
-            self.annotations.append(span)
-            self.annotations.append(text)
-        self.canvas.draw()
+        if self.span_layer is None: self.span_layer = SegmentSpanLayer(self.fig.axes[0])
+        self.span_layer.set_segments(segments)
+        self.refresh_overlay()
+
+    def _overlay_artists(self):
+        """Artist overlay (animated): anotasi frekuensi, garis boundary, dan kotak seleksi drag."""
+        artists = (self.span_layer.artists if self.span_layer else []) + (self.boundary_layer.artists if self.boundary_layer else [])
+        if self.selection_rect: artists.append(self.selection_rect)
+        return sorted(artists, key=lambda artist: artist.get_zorder())
+
+    def _on_draw(self, event):
+        """Setelah setiap draw penuh (zoom, pan, resize, data baru): simpan latar lalu gambar overlay di atasnya."""
+        self._background = self.canvas.copy_from_bbox(self.fig.bbox)
+        for artist in self._overlay_artists():
+            self.fig.draw_artist(artist)
 
-    def plot_stream(self, stream: Stream, channel_keys: list):
+    def refresh_overlay(self):
+        """
+        Menggambar ulang hanya overlay di atas latar yang di-cache (blit), tanpa
+        merasterisasi ulang waveform. Draw penuh hanya jika latar belum ada.
+        """
+        if not self.canvas: return
+        if self._background is None:
+            self.canvas.draw(); return
+        self.canvas.restore_region(self._background)
+        for artist in self._overlay_artists():
+            self.fig.draw_artist(artist)
+        self.canvas.blit(self.fig.bbox)
+
+    def plot_stream(self, channel_store, channel_keys: list):
         self.clear_plot()
         num_channels = len(channel_keys)
         if num_channels == 0: return
 
-        self.fig, axs = plt.subplots(nrows=num_channels, ncols=1, figsize=(10, 2 * num_channels), sharex=True, facecolor="#2b2b2b")
-        if num_channels == 1: axs = [axs]
+        self.fig = self.figures.new_figure(figsize=(10, 2 * num_channels), facecolor="#2b2b2b")
+        axs = self.fig.subplots(nrows=num_channels, ncols=1, sharex=True, squeeze=False)[:, 0]
         
         self.current_ax = axs[0]
 
         for i, key in enumerate(channel_keys):
             try:
-                station, loc, ch = key.split(".")
-                tr = stream.select(station=station, location=loc, channel=ch).merge(method=1)[0]
-                times = np.arange(len(tr.data)) / tr.stats.sampling_rate
-                axs[i].plot(times, tr.data, label=key, color='cyan')
+                # Hanya envelope min/max rentang yang terlihat yang digambar (dihitung ulang saat zoom/pan)
+                line = DecimatedLine(axs[i], channel_store.data(key), channel_store.sampling_rate(key), label=key, color='cyan')
+                self.waveform_lines.append(line)
+                axs[i].set_xlim(0, line.duration)
+                self._mark_gaps(axs[i], channel_store.gap_index(key).gap_times(channel_store.sampling_rate(key)))
                 axs[i].set_ylabel(key, rotation=0, labelpad=40, ha='right', color='white')
                 axs[i].legend(loc="upper right")
                 axs[i].tick_params(axis='y', colors='white')
@@ -118,25 +142,94 @@ class PlotFrame(ctk.CTkFrame):
         axs[-1].set_xlabel("Waktu (detik)", color='white')
         axs[-1].tick_params(axis='x', colors='white')
         self.fig.tight_layout()
+        self._refresh_waveform_lines()
+        self._embed_plot()
+
+    def _refresh_waveform_lines(self, event=None):
+        """Envelope dihitung ulang jika lebar sumbu (piksel) berubah, mis. setelah layout atau resize jendela."""
+        for line in self.waveform_lines:
+            line.update()
+
+    def _mark_gaps(self, ax, gap_times):
+        """Menandai gap data (detik, [n, 2]) sebagai pita abu-abu setinggi sumbu, dalam satu koleksi."""
+        if len(gap_times) == 0: return
+        ax.broken_barh([(start, end - start) for start, end in gap_times], (0, 1), transform=ax.get_xaxis_transform(),
+                       facecolors='gray', alpha=0.4, hatch='//', label='gap')
+
+    def begin_progressive_plot(self, channel_store, channel_keys: list):
+        """
+        Menyiapkan subplot kosong (sumbu waktu penuh) yang diisi bertahap oleh
+        append_progressive_chunk selama file masih di-decode di background.
+        """
+        self.clear_plot()
+        self.progressive_lines = {}
+        num_channels = len(channel_keys)
+        if num_channels == 0: return
+
+        self.fig = self.figures.new_figure(figsize=(10, 2 * num_channels), facecolor="#2b2b2b")
+        axs = self.fig.subplots(nrows=num_channels, ncols=1, sharex=True, squeeze=False)[:, 0]
+        self.current_ax = axs[0]
+
+        for ax, key in zip(axs, channel_keys):
+            meta = channel_store.metadata[key]
+            line, = ax.plot([], [], label=key, color='cyan')
+            self.progressive_lines[key] = {'line': line, 'fs': meta['sampling_rate'], 't': [], 'y': []}
+            ax.set_xlim(0, meta['npts'] / meta['sampling_rate'])
+            self._mark_gaps(ax, channel_store.gap_index(key).gap_times(meta['sampling_rate']))
+            ax.set_ylabel(key, rotation=0, labelpad=40, ha='right', color='white')
+            ax.legend(loc="upper right")
+            ax.tick_params(axis='y', colors='white')
+            ax.set_facecolor("#212121")
+        axs[-1].set_xlabel("Waktu (detik)", color='white')
+        axs[-1].tick_params(axis='x', colors='white')
+        self.fig.tight_layout()
         self._embed_plot()
 
+    def append_progressive_chunk(self, key, start_sample, data, points_per_chunk=2000):
+        """Menambahkan potongan data (diringkas min/max per bucket) ke garis overview channel key."""
+        entry = self.progressive_lines.get(key)
+        if entry is None or len(data) == 0: return
+        bucket = max(1, len(data) // (points_per_chunk // 2))
+        n = len(data) // bucket * bucket
+        if bucket > 1 and n > 0:
+            blocks = np.asarray(data[:n], dtype=float).reshape(-1, bucket)
+            y = np.column_stack((blocks.min(axis=1), blocks.max(axis=1))).ravel()
+            idx = np.repeat(np.arange(0, n, bucket), 2) + start_sample
+        else:
+            y = np.asarray(data, dtype=float)
+            idx = np.arange(len(data)) + start_sample
+        entry['t'].append(idx / entry['fs'])
+        entry['y'].append(y)
+
+    def refresh_progressive_plot(self):
+        """Menggambar ulang garis overview dengan semua potongan yang sudah diterima (draw_idle)."""
+        if not self.canvas or not self.progressive_lines: return
+        for entry in self.progressive_lines.values():
+            if not entry['t']: continue
+            order = np.argsort(np.concatenate(entry['t']), kind='stable')
+            t, y = np.concatenate(entry['t'])[order], np.concatenate(entry['y'])[order]
+            entry['t'], entry['y'] = [t], [y]
+            entry['line'].set_data(t, y)
+            ax = entry['line'].axes
+            ax.relim(); ax.autoscale_view(scalex=False)
+        self.canvas.draw_idle()
+
     def _embed_plot(self):
-        self.canvas = FigureCanvasTkAgg(self.fig, master=self)
-        self.canvas.draw()
-        widget = self.canvas.get_tk_widget()
-        widget.pack(fill="both", expand=True)
-        
-        self.bottom_frame = ctk.CTkFrame(self, fg_color="transparent")
+        self.canvas = self.figures.canvas
+        if self.toolbar is None:
+            # Canvas dari FigureManager tidak berganti: toolbar dan event cukup dipasang sekali
+            self.bottom_frame = ctk.CTkFrame(self, fg_color="transparent")
+            self.toolbar = NavigationToolbar2Tk(self.canvas, self.bottom_frame, pack_toolbar=False)
+            self.toolbar.pack(side="left", fill="x", expand=True)
+            self.canvas.mpl_connect("draw_event", self._on_draw)
+            self.canvas.mpl_connect("resize_event", self._refresh_waveform_lines)
+            self.canvas.mpl_connect("button_press_event", self.on_press)
+            self.canvas.mpl_connect("motion_notify_event", self.on_motion)
+            self.canvas.mpl_connect("button_release_event", self.on_release)
+        self.canvas.get_tk_widget().pack(fill="both", expand=True)
         self.bottom_frame.pack(fill="x", pady=5)
-        
-        self.toolbar = NavigationToolbar2Tk(self.canvas, self.bottom_frame, pack_toolbar=False)
-        self.toolbar.update()
-        self.toolbar.pack(side="left", fill="x", expand=True)
-        
-        # Hubungkan semua event mouse yang dibutuhkan
-        self.fig.canvas.mpl_connect("button_press_event", self.on_press)
-        self.fig.canvas.mpl_connect("motion_notify_event", self.on_motion)
-        self.fig.canvas.mpl_connect("button_release_event", self.on_release)
+        self.toolbar.update()  # riwayat zoom/pan plot sebelumnya dibuang
+        self.canvas.draw()
 
     def on_press(self, event):
         """Dipanggil saat mouse diklik, memulai proses drag."""
@@ -144,8 +237,8 @@ class PlotFrame(ctk.CTkFrame):
             return
         
         self.drag_start_x = event.xdata
-        self.selection_rect = self.current_ax.axvspan(self.drag_start_x, self.drag_start_x, color='yellow', alpha=0.3)
-        self.canvas.draw()
+        self.selection_rect = self.current_ax.axvspan(self.drag_start_x, self.drag_start_x, color='yellow', alpha=0.3, animated=True)
+        self.refresh_overlay()
 
     def on_motion(self, event):
         """Dipanggil saat mouse digeser, mengupdate visual drag."""
@@ -155,8 +248,9 @@ class PlotFrame(ctk.CTkFrame):
         end_x = event.xdata
         if end_x is None: return
         
-        self.selection_rect.set_xy([[self.drag_start_x, 0], [self.drag_start_x, 1], [end_x, 1], [end_x, 0], [self.drag_start_x, 0]])
-        self.canvas.draw_idle()
+        self.selection_rect.set_x(min(self.drag_start_x, end_x))
+        self.selection_rect.set_width(abs(end_x - self.drag_start_x))
+        self.refresh_overlay()
 
     def on_release(self, event):
         """Dipanggil saat klik mouse dilepas, mengeksekusi hapus area."""
@@ -172,78 +266,46 @@ class PlotFrame(ctk.CTkFrame):
 
         if end_x is None:
             self.drag_start_x = None
-            self.canvas.draw()
+            self.refresh_overlay()
             return
             
         selection_min = min(start_x, end_x)
         selection_max = max(start_x, end_x)
 
-        lines_to_delete = []
-        times_to_delete = []
-        
-        for line in self.boundary_lines:
-            line_time = line.get_xdata()[0]
-            if selection_min <= line_time <= selection_max:
-                lines_to_delete.append(line)
-                times_to_delete.append(line_time)
+        times_to_delete = self.boundary_layer.times_in_range(selection_min, selection_max).tolist() if self.boundary_layer else []
         
-        if lines_to_delete:
-            for line in lines_to_delete:
-                line.remove()
+        if times_to_delete:
+            remaining = self.boundary_layer.times
+            self.boundary_layer.set_times(remaining[(remaining < selection_min) | (remaining > selection_max)])
             
             if self.on_boundaries_deleted_in_range:
                 self.on_boundaries_deleted_in_range(times_to_delete)
             
             print(f"{len(times_to_delete)} boundary dihapus.")
 
-        self.canvas.draw()
+        self.refresh_overlay()
         self.drag_start_x = None
             
     def plot_selected_points(self, points_to_plot):
         if not self.fig or not self.fig.axes: return
         self.clear_points()
 
-        for ax in self.fig.axes:
-            if not ax.get_legend(): continue
-            legend_label = ax.get_legend().get_texts()[0].get_text()
-            
-            if legend_label in points_to_plot:
-                points = points_to_plot[legend_label]
-                times = [p[0] for p in points]
-                values = [p[1] for p in points]
-                
-                plotted = ax.plot(times, values, 'bo', markersize=5, label='Amplitudo Terpilih', zorder=10)
-                self.plotted_points.extend(plotted)
+        for waveform in self.waveform_lines:
+            key = waveform.line.get_label()
+            if key not in points_to_plot: continue
+            if waveform.ax not in self.marker_layers: self.marker_layers[waveform.ax] = MarkerLayer(waveform.ax)
+            points = points_to_plot[key]
+            self.marker_layers[waveform.ax].set_points(points.point_times(), points.point_values())
 
         handles, labels = self.fig.axes[-1].get_legend_handles_labels()
         by_label = dict(zip(labels, handles))
         self.fig.axes[-1].legend(by_label.values(), by_label.keys(), loc='upper right')
 
         self.canvas.draw()
-        print(f"[INFO] {len(self.plotted_points)} titik sampel ditampilkan.")
+        print(f"[INFO] {sum(len(layer) for layer in self.marker_layers.values())} titik sampel ditampilkan.")
 
     def show_amplitude_table(self, data_by_freq):
-        if self.amplitude_table: self.amplitude_table.destroy()
-        self.amplitude_table = ctk.CTkScrollableFrame(self, height=200)
-        self.amplitude_table.pack(fill="x", padx=10, pady=5)
-        headers = ["Freq (Hz)", "NS Max", "NS Min", "EW Max", "EW Min", "UD Max", "UD Min"]
-        for col, h in enumerate(headers):
-            ctk.CTkLabel(self.amplitude_table, text=h, font=("Arial", 12, "bold")).grid(row=0, column=col, padx=5, pady=2, sticky="w")
-        row_idx = 1
-        for freq in sorted(data_by_freq.keys()):
-            ch_data = data_by_freq[freq]
-            ctk.CTkLabel(self.amplitude_table, text=str(freq), font=("Arial", 12, "bold")).grid(row=row_idx, column=0, padx=5, sticky="w")
-            ns_pairs = ch_data.get("NS", []); ew_pairs = ch_data.get("EW", []); ud_pairs = ch_data.get("UD", [])
-            max_rows = max(len(ns_pairs), len(ew_pairs), len(ud_pairs), 1)
-            for i in range(max_rows):
-                cr = row_idx + i
-                if i < len(ns_pairs):
-                    ctk.CTkLabel(self.amplitude_table, text=f"{ns_pairs[i][0]:.2f}").grid(row=cr, column=1, sticky="w")
-                    ctk.CTkLabel(self.amplitude_table, text=f"{ns_pairs[i][1]:.2f}").grid(row=cr, column=2, sticky="w")
-                if i < len(ew_pairs):
-                    ctk.CTkLabel(self.amplitude_table, text=f"{ew_pairs[i][0]:.2f}").grid(row=cr, column=3, sticky="w")
-                    ctk.CTkLabel(self.amplitude_table, text=f"{ew_pairs[i][1]:.2f}").grid(row=cr, column=4, sticky="w")
-                if i < len(ud_pairs):
-                    ctk.CTkLabel(self.amplitude_table, text=f"{ud_pairs[i][0]:.2f}").grid(row=cr, column=5, sticky="w")
-                    ctk.CTkLabel(self.amplitude_table, text=f"{ud_pairs[i][1]:.2f}").grid(row=cr, column=6, sticky="w")
-            row_idx += max_rows
+        # Tabel dibuat sekali lalu diperbarui di tempat pada setiap ekstraksi ulang
+        if self.amplitude_table is None: self.amplitude_table = AmplitudeTable(self)
+        if not self.amplitude_table.winfo_manager(): self.amplitude_table.pack(fill="x", padx=10, pady=5)
+        self.amplitude_table.set_results(data_by_freq)
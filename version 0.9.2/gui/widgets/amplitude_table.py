@@ -0,0 +1,70 @@
+# kalibrasi_app/gui/widgets/amplitude_table.py
+
+import tkinter.ttk as ttk
+import customtkinter as ctk
+
+HEADERS = ["Freq (Hz)", "NS Max", "NS Min", "EW Max", "EW Min", "UD Max", "UD Min"]
+COMPONENTS = ("NS", "EW", "UD")
+
+def amplitude_rows(data_by_freq):
+    """
+    Meratakan hasil {freq: {"NS"/"EW"/"UD": pairs}} menjadi baris tabel (iid, values).
+    Satu baris per pasangan puncak/lembah; frekuensi hanya ditulis di baris pertamanya.
+    """
+    rows = []
+    for freq in sorted(data_by_freq.keys()):
+        ch_data = data_by_freq[freq]
+        columns = [ch_data[c].rows() if ch_data.get(c) is not None else [] for c in COMPONENTS]
+        for i in range(max(max(len(r) for r in columns), 1)):
+            values = [str(freq) if i == 0 else ""]
+            for r in columns:
+                values += [f"{r[i][0]:.2f}", f"{r[i][1]:.2f}"] if i < len(r) else ["", ""]
+            rows.append((f"{freq}:{i}", tuple(values)))
+    return rows
+
+class AmplitudeTable(ctk.CTkFrame):
+    """
+    Tabel hasil amplitudo berbasis ttk.Treeview: satu widget native yang hanya menggambar
+    baris yang terlihat, bukan satu CTkLabel per sel. set_results() memperbarui baris di
+    tempat (ubah nilai yang berubah, tambah/hapus sisanya) sehingga posisi scroll tetap.
+    """
+    def __init__(self, master, height=8):
+        super().__init__(master)
+        self._style()
+        self.tree = ttk.Treeview(self, columns=HEADERS, show="headings", height=height, style="Amplitude.Treeview")
+        for h in HEADERS:
+            self.tree.heading(h, text=h, anchor="w")
+            self.tree.column(h, width=90, minwidth=60, anchor="w", stretch=True)
+        scrollbar = ctk.CTkScrollbar(self, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree.pack(side="left", fill="both", expand=True)
+        scrollbar.pack(side="right", fill="y")
+        self._values = {}
+
+    def _style(self):
+        # Warna mengikuti tema CustomTkinter (gelap/terang) agar Treeview tidak tampil ala Tk klasik
+        theme = ctk.ThemeManager.theme
+        bg = self._apply_appearance_mode(theme["CTkFrame"]["fg_color"])
+        fg = self._apply_appearance_mode(theme["CTkLabel"]["text_color"])
+        accent = self._apply_appearance_mode(theme["CTkButton"]["fg_color"])
+        style = ttk.Style(self)
+        style.configure("Amplitude.Treeview", background=bg, fieldbackground=bg, foreground=fg, borderwidth=0, rowheight=22, font=("Arial", 11))
+        style.configure("Amplitude.Treeview.Heading", background=bg, foreground=fg, relief="flat", font=("Arial", 12, "bold"))
+        style.map("Amplitude.Treeview", background=[("selected", accent)])
+
+    def set_results(self, data_by_freq):
+        rows = amplitude_rows(data_by_freq)
+        keep = {iid for iid, _ in rows}
+        stale = [iid for iid in self._values if iid not in keep]
+        if stale: self.tree.delete(*stale)
+        for index, (iid, values) in enumerate(rows):
+            old = self._values.get(iid)
+            if old is None: self.tree.insert("", index, iid=iid, values=values)
+            else:
+                if old != values: self.tree.item(iid, values=values)
+                self.tree.move(iid, "", index)
+        self._values = dict(rows)
+
+    def clear(self):
+        if self._values: self.tree.delete(*self._values)
+        self._values = {}
@@ -3,8 +3,8 @@
 import customtkinter as ctk
 import numpy as np
 from scipy.fft import rfft, rfftfreq
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+
+from gui.plotting.figure_manager import FigureManager
 
 class FrequencyDomainPopup(ctk.CTkToplevel):
     def __init__(self, master, trace):
@@ -17,6 +17,8 @@ class FrequencyDomainPopup(ctk.CTkToplevel):
         # Frame utama untuk plot
         plot_frame = ctk.CTkFrame(self)
         plot_frame.pack(fill="both", expand=True, padx=10, pady=10)
+        self.figures = FigureManager(plot_frame, "FrequencyDomainPopup")
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
 
         # Panggil fungsi untuk menghitung dan menggambar plot
         self._calculate_and_plot_fft(plot_frame)
@@ -24,6 +26,11 @@ class FrequencyDomainPopup(ctk.CTkToplevel):
         # Agar window ini menjadi fokus utama
         self.grab_set()
 
+    def _on_close(self):
+        # Figure (beserta spektrumnya) dilepas bersama jendela
+        self.figures.destroy()
+        self.destroy()
+
     def _calculate_and_plot_fft(self, parent_frame):
         data = self.trace.data
         fs = self.trace.stats.sampling_rate
@@ -38,7 +45,8 @@ class FrequencyDomainPopup(ctk.CTkToplevel):
         xf = rfftfreq(N, 1 / fs)
 
         # Buat plot menggunakan Matplotlib
-        fig, ax = plt.subplots(figsize=(8, 5), facecolor="#2b2b2b")
+        fig = self.figures.new_figure(figsize=(8, 5), facecolor="#2b2b2b")
+        ax = fig.add_subplot()
         ax.plot(xf, np.abs(yf), color="cyan")
         
         # Styling plot agar sesuai tema
@@ -55,6 +63,6 @@ class FrequencyDomainPopup(ctk.CTkToplevel):
         fig.tight_layout()
 
         # Masukkan plot Matplotlib ke dalam window CustomTkinter
-        canvas = FigureCanvasTkAgg(fig, master=parent_frame)
+        canvas = self.figures.canvas
         canvas.draw()
         canvas.get_tk_widget().pack(fill="both", expand=True)
\ No newline at end of file
@@ -0,0 +1,161 @@
+# kalibrasi_app/kalibrasi/__main__.py
+
+"""
+Perintah tanpa GUI:
+
+    python -m kalibrasi batch <folder_seed> [--workers N] [--output folder] ...
+    python -m kalibrasi synth <file.mseed> [--noise X] [--gap MULAI:DURASI] [--clip N] ...
+    python -m kalibrasi bench [--output hasil.json] [--baseline baseline.json] ...
+
+batch: setiap file SEED di folder diproses di ProcessPoolExecutor (load, boundary, klasifikasi,
+ekstraksi amplitudo, workbook, PDF sertifikat), lalu ringkasan durasi dan hasil per file
+ditulis ke summary.json di folder output. Sidecar cache SEED juga ditulis di folder output
+(<output>/seed_cache), folder sumber hanya dibaca. File tanpa data administrasi/digitizer
+berstatus 'incomplete' (sheet-nya dikosongkan); exit code 1 hanya jika ada file yang gagal.
+synth: file SEED sintetis 3 komponen (sinus bertingkat di 12 frekuensi standar).
+bench: waktu dan memori tiap stage pada data sintetis, opsional dibandingkan dengan baseline
+(exit code 1 jika ada regresi di atas ambang).
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from modules.amplitude_extractor import AMPLITUDE_METHODS
+from modules.batch_pipeline import SEED_CACHE_FOLDER, calibrate_file, find_seed_files
+from modules.benchmark import (DEFAULT_MEMORY_THRESHOLD, DEFAULT_TIME_THRESHOLD, compare_with_baseline, load_results,
+                               run_benchmarks, save_results)
+from modules.excel_sheets import AMPLITUDE_TEMPLATE, APP_DIR
+from modules.freq_detector import BOUNDARY_RULES
+from modules.synthetic_seed import stepped_sine_schedule, write_synthetic_seed
+
+def _load_digitizer(name, config_path=os.path.join(APP_DIR, "data", "digitizer_config.json")):
+    with open(config_path, "r") as f: digitizers = json.load(f)
+    selected = next((d for d in digitizers if d.get("Name") == name), None)
+    if selected is None: raise SystemExit(f"Digitizer '{name}' tidak ada di {config_path}.")
+    return selected
+
+def run_batch(args):
+    files = find_seed_files(args.directory)
+    if not files:
+        print(f"Tidak ada file SEED di {args.directory}."); return 1
+    output_dir = args.output or os.path.join(args.directory, "hasil_kalibrasi")
+    os.makedirs(output_dir, exist_ok=True)
+    admin_data = None
+    if args.admin:
+        with open(args.admin, "r") as f: admin_data = json.load(f)
+    digitizer_data = _load_digitizer(args.digitizer) if args.digitizer else None
+    options = dict(template_path=args.template, method=args.method, boundary_rule=args.rule, min_gap_seconds=args.min_gap,
+                   change_ratio=args.ratio, admin_data=admin_data, digitizer_data=digitizer_data, render_pdf=not args.no_pdf,
+                   cache_dir=args.cache_dir or os.path.join(output_dir, SEED_CACHE_FOLDER))
+
+    print(f"Memproses {len(files)} file dengan {args.workers} worker -> {output_dir}")
+    started = time.perf_counter()
+    results = []
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        futures = {executor.submit(calibrate_file, path, output_dir, **options): path for path in files}
+        for i, future in enumerate(as_completed(futures), start=1):
+            try:
+                summary = future.result()
+            except Exception as e:
+                # Proses pekerja mati (mis. BrokenProcessPool): file tetap dicatat sebagai gagal
+                summary = {'file': futures[future], 'status': 'error', 'timings': {'total': 0.0}, 'error': f"{type(e).__name__}: {e}"}
+            results.append(summary)
+            detail = summary.get('error') or f"{len(summary['frequencies'])} frekuensi"
+            if summary.get('missing'): detail += f", tanpa data {'/'.join(summary['missing'])}"
+            print(f"[{i}/{len(files)}] {os.path.basename(summary['file'])}: {summary['status']} ({summary['timings']['total']:.1f}s, {detail})")
+
+    results.sort(key=lambda summary: summary['file'])
+    report = {
+        'directory': os.path.abspath(args.directory), 'output': os.path.abspath(output_dir), 'workers': args.workers,
+        'options': {key: value for key, value in options.items() if key not in ('admin_data', 'digitizer_data')},
+        'n_files': len(results), 'n_failed': sum(summary['status'] == 'error' for summary in results),
+        'n_incomplete': sum(summary['status'] == 'incomplete' for summary in results),
+        'wall_time': round(time.perf_counter() - started, 3), 'files': results,
+    }
+    summary_path = args.summary or os.path.join(output_dir, "summary.json")
+    with open(summary_path, "w") as f: json.dump(report, f, indent=2)
+    print(f"Selesai dalam {report['wall_time']:.1f}s, {report['n_failed']} gagal, {report['n_incomplete']} tidak lengkap. "
+          f"Ringkasan: {summary_path}")
+    return 1 if report['n_failed'] else 0
+
+def _gap(text):
+    try:
+        start, duration = (float(part) for part in text.split(":"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Gap harus berformat MULAI:DURASI (detik), bukan '{text}'.")
+    return start, duration
+
+def _add_signal_arguments(parser):
+    parser.add_argument("--fs", type=float, default=100.0, help="Sampling rate (Hz).")
+    parser.add_argument("--step", type=float, default=120.0, help="Durasi minimum tiap langkah frekuensi (detik).")
+    parser.add_argument("--noise", type=float, default=2000.0, help="Simpangan baku noise (count).")
+    parser.add_argument("--clip", type=float, help="Batas saturasi |count| (default: tanpa clipping).")
+    parser.add_argument("--gap", type=_gap, action="append", default=[], help="Gap MULAI:DURASI dalam detik (boleh berulang).")
+    parser.add_argument("--seed", type=int, default=0, help="Seed generator acak.")
+
+def run_synth(args):
+    schedule = write_synthetic_seed(args.output, stepped_sine_schedule(step_seconds=args.step), sampling_rate=args.fs,
+                                    noise=args.noise, clip=args.clip, gaps=args.gap, seed=args.seed)
+    for t_start, t_end, freq in schedule:
+        print(f"{t_start:8.1f}s - {t_end:8.1f}s: {freq} Hz")
+    print(f"File sintetis ditulis ke {args.output}")
+    return 0
+
+def run_bench(args):
+    results = run_benchmarks(sampling_rate=args.fs, step_seconds=args.step, noise=args.noise, clip=args.clip, gaps=args.gap,
+                             seed=args.seed, repeat=args.repeat, stages=args.stage or None)
+    if args.output:
+        save_results(results, args.output); print(f"Hasil benchmark ditulis ke {args.output}")
+    if not args.baseline: return 0
+    comparison = compare_with_baseline(results, load_results(args.baseline), args.time_threshold, args.memory_threshold)
+    print(f"\nPerbandingan dengan baseline {args.baseline}:")
+    for item in comparison:
+        status = ("REGRESI " if item['regression'] else "") + ", ".join(item['reasons']) or "ok"
+        if item['time_ratio'] is None:
+            print(f"{item['stage']:45s} {'-':>13s}  {'-':>13s}  {status}"); continue
+        print(f"{item['stage']:45s} waktu x{item['time_ratio']:.2f}  memori x{item['memory_ratio']:.2f}  {status}")
+    return 1 if any(item['regression'] for item in comparison) else 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m kalibrasi", description="Kalibrasi seismometer tanpa GUI.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    batch = commands.add_parser("batch", help="Proses semua file SEED di satu folder.")
+    batch.add_argument("directory", help="Folder berisi file SEED (.mseed, .miniseed, .seed, .msd).")
+    batch.add_argument("-w", "--workers", type=int, default=os.cpu_count() or 1, help="Jumlah proses pekerja (default: jumlah CPU).")
+    batch.add_argument("-o", "--output", help="Folder hasil (default: <folder>/hasil_kalibrasi).")
+    batch.add_argument("--summary", help="Path ringkasan JSON (default: <output>/summary.json).")
+    batch.add_argument("--template", default=AMPLITUDE_TEMPLATE, help="Workbook template berisi sheet sertifikat (default: data/ di folder aplikasi).")
+    batch.add_argument("--cache-dir", help=f"Folder sidecar cache SEED (default: <output>/{SEED_CACHE_FOLDER}); folder sumber tidak ditulisi.")
+    batch.add_argument("--method", choices=AMPLITUDE_METHODS, default=AMPLITUDE_METHODS[0], help="Metode ekstraksi amplitudo.")
+    batch.add_argument("--rule", choices=BOUNDARY_RULES, default=BOUNDARY_RULES[0], help="Aturan deteksi boundary.")
+    batch.add_argument("--min-gap", type=float, default=5.0, help="Jarak minimum antar boundary (detik).")
+    batch.add_argument("--ratio", type=float, default=0.5, help="Rasio dominasi daya band (aturan ratio): frame dipakai bila band terkuat > (1 + rasio) x band kedua.")
+    batch.add_argument("--admin", help="JSON data administrasi untuk semua file (default: <file_seed>.json jika ada).")
+    batch.add_argument("--digitizer", help="Nama digitizer dari data/digitizer_config.json.")
+    batch.add_argument("--no-pdf", action="store_true", help="Hanya workbook, tanpa PDF sertifikat.")
+    batch.set_defaults(handler=run_batch)
+
+    synth = commands.add_parser("synth", help="Tulis file SEED sintetis (sinus bertingkat 3 komponen).")
+    synth.add_argument("output", help="Path file MiniSEED keluaran.")
+    _add_signal_arguments(synth)
+    synth.set_defaults(handler=run_synth)
+
+    bench = commands.add_parser("bench", help="Benchmark waktu dan memori tiap stage pada data sintetis.")
+    _add_signal_arguments(bench)
+    bench.add_argument("-o", "--output", help="Simpan hasil ke JSON ini (mis. untuk dijadikan baseline).")
+    bench.add_argument("--baseline", help="JSON hasil sebelumnya untuk dibandingkan.")
+    bench.add_argument("--repeat", type=int, default=3, help="Jumlah pengulangan tiap stage.")
+    bench.add_argument("--stage", action="append", help="Hanya stage ini (boleh berulang).")
+    bench.add_argument("--time-threshold", type=float, default=DEFAULT_TIME_THRESHOLD, help="Ambang regresi waktu (relatif).")
+    bench.add_argument("--memory-threshold", type=float, default=DEFAULT_MEMORY_THRESHOLD, help="Ambang regresi memori (relatif).")
+    bench.set_defaults(handler=run_bench)
+
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -3,82 +3,445 @@
 import numpy as np
 from scipy.signal import find_peaks
 
-def find_best_amplitude_pairs(data_segment: np.ndarray, max_pairs=5):
+from modules.segment import Segment, seconds_to_sample_range
+
+MINIMUM_AMPLITUDE_THRESHOLD = 30000
+
+# Metode ekstraksi yang bisa dipilih per run
+AMPLITUDE_METHODS = ("peaks", "sinefit")
+
+# Segmen yang lebih panjang dari 2x ukuran ini diekstrak per potongan (lihat iter_amplitude_pairs_chunked)
+STREAMING_CHUNK_SIZE = 1_000_000
+
+# Satu baris per pasangan puncak-lembah. Indeks relatif terhadap awal data yang dianalisis.
+PAIR_DTYPE = np.dtype([
+    ('peak_idx', np.int64),
+    ('trough_idx', np.int64),
+    ('peak_val', np.float64),
+    ('trough_val', np.float64),
+    ('amplitude', np.float64),
+])
+
+def _empty_pairs():
+    return np.empty(0, dtype=PAIR_DTYPE)
+
+class AmplitudePairs:
+    """
+    Wadah hasil ekstraksi yang dipakai di seluruh pipeline (tabel, plot, Excel).
+    Dibungkus di atas satu array PAIR_DTYPE sehingga tidak ada dict per puncak/lembah;
+    semua accessor mengembalikan array numpy (vektor).
+    """
+    __slots__ = ("data", "sampling_rate")
+
+    def __init__(self, data=None, sampling_rate=None):
+        self.data = _empty_pairs() if data is None else data
+        self.sampling_rate = sampling_rate
+
+    @classmethod
+    def concatenate(cls, items):
+        items = [item for item in items if item is not None]
+        if not items:
+            return cls()
+        return cls(np.concatenate([item.data for item in items]), items[0].sampling_rate)
+
+    def __len__(self):
+        return len(self.data)
+
+    def __bool__(self):
+        return len(self.data) > 0
+
+    @property
+    def peak_values(self):
+        return self.data['peak_val']
+
+    @property
+    def trough_values(self):
+        return self.data['trough_val']
+
+    @property
+    def amplitudes(self):
+        return self.data['amplitude']
+
+    def _times(self, field):
+        if self.sampling_rate is None:
+            if not len(self.data):
+                return np.empty(0)
+            raise ValueError("AmplitudePairs tanpa sampling_rate: waktu puncak/lembah tidak bisa dihitung.")
+        return self.data[field] / self.sampling_rate
+
+    @property
+    def peak_times(self):
+        return self._times('peak_idx')
+
+    @property
+    def trough_times(self):
+        return self._times('trough_idx')
+
+    def point_times(self):
+        """Waktu (detik) puncak dan lembah berselang-seling, untuk penanda di plot."""
+        return np.column_stack((self.peak_times, self.trough_times)).ravel()
+
+    def point_values(self):
+        return np.column_stack((self.peak_values, self.trough_values)).ravel()
+
+    def rows(self):
+        """List (max, min) berupa float Python untuk tabel dan sel Excel."""
+        return list(zip(self.peak_values.tolist(), self.trough_values.tolist()))
+
+def _detect_extrema(data_segment: np.ndarray):
+    """Mendeteksi indeks puncak dan lembah dengan ambang prominence 0.2 * std."""
+    prominence_threshold = np.std(data_segment) * 0.2
+    peak_indices, _ = find_peaks(data_segment, prominence=prominence_threshold)
+    trough_indices, _ = find_peaks(-data_segment, prominence=prominence_threshold)
+    return peak_indices, trough_indices
+
+def _pair_sorted_extrema(peak_idx, peak_val, trough_idx, trough_val):
+    """
+    Inti pemasangan untuk pair_peaks_and_troughs dan versi streaming.
+
+    Karena lembah yang terpakai selalu naik monoton, kandidat lembah untuk puncak ke-k
+    adalah c_k = max(s_k, c_{k-1} + 1) dengan s_k = searchsorted(lembah, puncak_k).
+    Rekurens ini diselesaikan dengan np.maximum.accumulate; hanya pasangan yang
+    ditolak (puncak <= lembah) yang memaksa perhitungan diulang dari titik itu.
+
+    Mengembalikan (pairs, n_matched_or_rejected): puncak mulai dari indeks kedua
+    belum punya lembah setelahnya dan bisa dibawa ke potongan data berikutnya.
+    """
+    n_peaks, n_troughs = len(peak_idx), len(trough_idx)
+    if n_peaks == 0 or n_troughs == 0:
+        return _empty_pairs(), 0
+
+    first_after = np.searchsorted(trough_idx, peak_idx, side='right')
+    chosen_peaks, chosen_troughs = [], []
+    k, last_used = 0, -1
+
+    while k < n_peaks:
+        offsets = np.arange(n_peaks - k)
+        shifted = first_after[k:] - offsets
+        shifted[0] = max(shifted[0], last_used + 1)
+        candidates = np.maximum.accumulate(shifted) + offsets
+
+        # Kandidat tidak pernah turun, jadi setelah lembah habis semua puncak sisanya tanpa pasangan
+        n_valid = int(np.searchsorted(candidates, n_troughs, side='left'))
+        if n_valid == 0:
+            break
+        candidates = candidates[:n_valid]
+        accepted = peak_val[k:k + n_valid] > trough_val[candidates]
+
+        rejected = np.flatnonzero(~accepted)
+        stop = rejected[0] if len(rejected) else n_valid
+        if stop > 0:
+            chosen_peaks.append(np.arange(k, k + stop))
+            chosen_troughs.append(candidates[:stop])
+            last_used = int(candidates[stop - 1])
+        if stop == n_valid:
+            k += n_valid
+            break
+        # Puncak yang ditolak dilewati, lembahnya tetap tersedia untuk puncak berikutnya
+        k += stop + 1
+
+    if not chosen_peaks:
+        return _empty_pairs(), k
+
+    peaks_pos = np.concatenate(chosen_peaks)
+    troughs_pos = np.concatenate(chosen_troughs)
+    pairs = np.empty(len(peaks_pos), dtype=PAIR_DTYPE)
+    pairs['peak_idx'] = peak_idx[peaks_pos]
+    pairs['trough_idx'] = trough_idx[troughs_pos]
+    pairs['peak_val'] = peak_val[peaks_pos]
+    pairs['trough_val'] = trough_val[troughs_pos]
+    pairs['amplitude'] = pairs['peak_val'] - pairs['trough_val']
+    return pairs, k
+
+def pair_peaks_and_troughs(data_segment: np.ndarray, peak_indices: np.ndarray, trough_indices: np.ndarray):
     """
-    Menerima segmen data dan menemukan pasangan amplitudo max-min terbaik.
-    DIUBAH: Logika pemasangan sekarang memastikan setiap puncak/lembah hanya
-    digunakan dalam satu pasangan unik.
+    Memasangkan setiap puncak dengan lembah terdekat setelahnya tanpa loop bersarang.
+    Aturannya sama dengan versi lama: puncak diproses berurutan, lembah yang sudah
+    dipakai tidak boleh dipakai lagi, dan pasangan ditolak jika puncak <= lembah.
     """
-    MINIMUM_AMPLITUDE_THRESHOLD = 30000
+    peak_indices = np.asarray(peak_indices, dtype=np.int64)
+    trough_indices = np.asarray(trough_indices, dtype=np.int64)
+    pairs, _ = _pair_sorted_extrema(peak_indices, data_segment[peak_indices],
+                                    trough_indices, data_segment[trough_indices])
+    return pairs
 
+def select_best_pairs(pairs: np.ndarray, max_pairs=5, threshold=MINIMUM_AMPLITUDE_THRESHOLD):
+    """
+    Membuang pasangan di bawah ambang batas lalu memilih max_pairs pasangan yang
+    amplitudonya paling dekat ke rata-rata. Memakai np.argpartition (bukan sort penuh);
+    urutan hasil sama dengan sort stabil pada versi lama.
+    """
+    pairs = pairs[pairs['amplitude'] >= threshold]
+    if len(pairs) <= max_pairs:
+        return pairs
+
+    deviation = np.abs(pairs['amplitude'] - pairs['amplitude'].mean())
+    kth_value = deviation[np.argpartition(deviation, max_pairs - 1)[max_pairs - 1]]
+    # Nilai yang sama dengan batas ke-k diambil sesuai urutan kemunculan (perilaku sort stabil)
+    below = np.flatnonzero(deviation < kth_value)
+    ties = np.flatnonzero(deviation == kth_value)[:max_pairs - len(below)]
+    chosen = np.concatenate([below, ties])
+    chosen = chosen[np.lexsort((chosen, deviation[chosen]))]
+    return pairs[chosen]
+
+def find_amplitude_pairs(data_segment: np.ndarray, max_pairs=5):
+    """
+    Menemukan pasangan amplitudo max-min terbaik dalam satu segmen. Mengembalikan array terstruktur
+    PAIR_DTYPE (peak_idx, trough_idx, peak_val, trough_val, amplitude).
+    """
     if len(data_segment) < 20:
-        return []
+        return _empty_pairs()
 
-    # 1. Deteksi Indeks Puncak dan Lembah
     try:
-        prominence_threshold = np.std(data_segment) * 0.2
-        peak_indices, _ = find_peaks(data_segment, prominence=prominence_threshold)
-        trough_indices, _ = find_peaks(-data_segment, prominence=prominence_threshold)
+        peak_indices, trough_indices = _detect_extrema(data_segment)
     except Exception:
-        return []
-
-    if len(peak_indices) == 0 or len(trough_indices) == 0:
-        return []
-
-    # 2. Siapkan Daftar Kandidat
-    # Buat daftar dictionary untuk setiap puncak dan lembah
-    peaks = [{'index': i, 'value': data_segment[i], 'used': False} for i in peak_indices]
-    troughs = [{'index': i, 'value': data_segment[i], 'used': False} for i in trough_indices]
-    
-    # 3. Logika Pemasangan Unik
-    pairs_with_indices = []
-    
-    # Iterasi melalui setiap puncak untuk mencari pasangan lembahnya
-    for peak in peaks:
-        if peak['used']: continue # Lewati jika puncak ini sudah dipasangkan
-
-        # Cari lembah terdekat yang valid (setelah puncak dan belum digunakan)
-        closest_trough = None
-        min_distance = float('inf')
-
-        for trough in troughs:
-            if trough['used']: continue # Lewati lembah yang sudah dipasangkan
-            
-            # Cek apakah lembah berada setelah puncak
-            if trough['index'] > peak['index']:
-                distance = trough['index'] - peak['index']
-                if distance < min_distance:
-                    min_distance = distance
-                    closest_trough = trough
-        
-        # Jika pasangan ditemukan
-        if closest_trough:
-            # Pastikan nilai puncak memang lebih besar dari lembah
-            if peak['value'] > closest_trough['value']:
-                pairs_with_indices.append({'peak': peak, 'trough': closest_trough})
-                # Tandai keduanya sebagai sudah digunakan
-                peak['used'] = True
-                closest_trough['used'] = True
-
-    if not pairs_with_indices:
-        return []
-
-    # 4. Filter berdasarkan ambang batas amplitudo minimum
-    filtered_pairs = [
-        p for p in pairs_with_indices
-        if (p['peak']['value'] - p['trough']['value']) >= MINIMUM_AMPLITUDE_THRESHOLD
-    ]
-
-    if not filtered_pairs:
-        return []
-    
-    if len(filtered_pairs) <= max_pairs:
-        return filtered_pairs
-
-    # 5. Pilih 5 Pasangan Terbaik dari yang sudah difilter
-    amplitudes = [p['peak']['value'] - p['trough']['value'] for p in filtered_pairs]
-    mean_amplitude = np.mean(amplitudes)
-    
-    filtered_pairs.sort(key=lambda p: abs((p['peak']['value'] - p['trough']['value']) - mean_amplitude))
-    
-    return filtered_pairs[:max_pairs]
+        return _empty_pairs()
+
+    pairs = pair_peaks_and_troughs(data_segment, peak_indices, trough_indices)
+    return select_best_pairs(pairs, max_pairs)
+
+def find_best_amplitude_pairs(data_segment: np.ndarray, max_pairs=5):
+    """
+    Bentuk keluaran lama untuk pemanggil yang belum pindah ke find_amplitude_pairs: list
+    {'peak': {'index', 'value'}, 'trough': {'index', 'value'}} dengan pasangan yang sama.
+    """
+    return [{'peak': {'index': int(p['peak_idx']), 'value': p['peak_val']},
+             'trough': {'index': int(p['trough_idx']), 'value': p['trough_val']}}
+            for p in find_amplitude_pairs(data_segment, max_pairs)]
+
+def _streaming_std(data: np.ndarray, chunk_size):
+    """Standar deviasi seluruh data dihitung per potongan (gabungan Chan), tanpa salinan penuh."""
+    count, mean, m2 = 0, 0.0, 0.0
+    for start in range(0, len(data), chunk_size):
+        chunk = np.asarray(data[start:start + chunk_size], dtype=np.float64)
+        n_b = len(chunk)
+        mean_b = chunk.mean()
+        m2_b = float(np.sum((chunk - mean_b) ** 2))
+        delta = mean_b - mean
+        total = count + n_b
+        mean += delta * n_b / total
+        m2 += m2_b + delta * delta * count * n_b / total
+        count = total
+    return np.sqrt(m2 / count) if count else 0.0
+
+def iter_amplitude_pairs_chunked(data: np.ndarray, chunk_size=STREAMING_CHUNK_SIZE, margin=None):
+    """
+    Generator ekstraksi pasangan amplitudo per potongan berukuran tetap untuk rekaman panjang.
+
+    Setiap potongan dianalisis bersama margin di kiri-kanannya agar prominence puncak
+    di tepi potongan sama dengan analisis utuh; hanya puncak/lembah di dalam inti potongan
+    yang diambil. Puncak yang belum mendapat lembah dibawa ke potongan berikutnya, sehingga
+    pemasangan sama dengan find_amplitude_pairs selama margin mencakup beberapa periode sinyal.
+    Memori yang dipakai sebanding dengan chunk_size + 2*margin, bukan panjang rekaman
+    (data boleh berupa np.memmap).
+
+    Menghasilkan array PAIR_DTYPE (indeks absolut) yang sudah lolos ambang batas minimum.
+    """
+    n = len(data)
+    if n < 20:
+        return
+    if margin is None:
+        margin = max(chunk_size // 8, 1)
+    prominence_threshold = _streaming_std(data, chunk_size) * 0.2
+
+    pending_idx = np.empty(0, dtype=np.int64)
+    pending_val = np.empty(0, dtype=np.float64)
+    for core_start in range(0, n, chunk_size):
+        core_end = min(core_start + chunk_size, n)
+        win_start = max(core_start - margin, 0)
+        window = np.asarray(data[win_start:min(core_end + margin, n)], dtype=np.float64)
+
+        peaks, _ = find_peaks(window, prominence=prominence_threshold)
+        np.negative(window, out=window)
+        troughs, _ = find_peaks(window, prominence=prominence_threshold)
+        np.negative(window, out=window)
+
+        peaks = peaks[(peaks >= core_start - win_start) & (peaks < core_end - win_start)]
+        troughs = troughs[(troughs >= core_start - win_start) & (troughs < core_end - win_start)]
+
+        peak_idx = np.concatenate([pending_idx, peaks + win_start])
+        peak_val = np.concatenate([pending_val, window[peaks]])
+        pairs, n_done = _pair_sorted_extrema(peak_idx, peak_val, troughs + win_start, window[troughs])
+        # Lembah di potongan ini yang tidak terpakai tidak akan pernah dipakai lagi (semua puncak
+        # yang tersisa berada setelahnya), jadi cukup puncak yang tertunda yang dibawa.
+        pending_idx, pending_val = peak_idx[n_done:], peak_val[n_done:]
+
+        pairs = pairs[pairs['amplitude'] >= MINIMUM_AMPLITUDE_THRESHOLD]
+        if len(pairs):
+            yield pairs
+
+def find_amplitude_pairs_chunked(data: np.ndarray, max_pairs=5, chunk_size=STREAMING_CHUNK_SIZE, margin=None):
+    """Versi streaming dari find_amplitude_pairs untuk data yang terlalu panjang untuk diproses utuh."""
+    chunks = list(iter_amplitude_pairs_chunked(data, chunk_size, margin))
+    if not chunks:
+        return _empty_pairs()
+    return select_best_pairs(np.concatenate(chunks), max_pairs)
+
+def find_amplitude_pairs_in_runs(data: np.ndarray, runs, max_pairs=5):
+    """
+    find_amplitude_pairs untuk segmen yang terpotong gap. Setiap rentang tanpa gap
+    (runs, indeks absolut) dipasangkan sendiri sehingga tidak ada pasangan yang melintasi
+    gap, lalu max_pairs terbaik dipilih dari gabungannya. Indeks hasil absolut.
+    """
+    collected = []
+    for start, end in runs:
+        segment = data[start:end]
+        if len(segment) > 2 * STREAMING_CHUNK_SIZE:
+            pairs = np.concatenate(list(iter_amplitude_pairs_chunked(segment)) or [_empty_pairs()])
+        elif len(segment) >= 20:
+            try:
+                peak_indices, trough_indices = _detect_extrema(segment)
+            except Exception:
+                continue
+            pairs = pair_peaks_and_troughs(segment, peak_indices, trough_indices)
+        else:
+            continue
+        pairs['peak_idx'] += start
+        pairs['trough_idx'] += start
+        collected.append(pairs)
+    if not collected:
+        return _empty_pairs()
+    return select_best_pairs(np.concatenate(collected), max_pairs)
+
+def fit_sine(data_segment: np.ndarray, sampling_rate, freq):
+    """
+    Mencocokkan model A*sin(wt) + B*cos(wt) + C pada frekuensi yang sudah diklasifikasi
+    dengan satu least-squares solve (O(N), tanpa find_peaks).
+
+    Mengembalikan dict berisi amplitudo (R = sqrt(A^2 + B^2)), peak_to_peak (2R),
+    offset (C), phase, residual_rms, dan confidence (R^2 model, 0..1).
+    """
+    n = len(data_segment)
+    omega = 2 * np.pi * freq
+    t = np.arange(n) / sampling_rate
+    design = np.column_stack((np.sin(omega * t), np.cos(omega * t), np.ones(n)))
+    y = np.asarray(data_segment, dtype=np.float64)
+    (a, b, c), _, _, _ = np.linalg.lstsq(design, y, rcond=None)
+
+    residual = y - design @ np.array([a, b, c])
+    ss_res = float(residual @ residual)
+    centered = y - y.mean()
+    ss_tot = float(centered @ centered)
+    amplitude = float(np.hypot(a, b))
+    return {
+        'amplitude': amplitude,
+        'peak_to_peak': 2 * amplitude,
+        'offset': float(c),
+        'phase': float(np.arctan2(b, a)),
+        'residual_rms': float(np.sqrt(ss_res / n)),
+        'confidence': float(np.clip(1 - ss_res / ss_tot, 0, 1)) if ss_tot > 0 else 0.0,
+    }
+
+def find_sine_fit_pairs(data_segment: np.ndarray, sampling_rate, freq, max_pairs=5, fit=None):
+    """
+    Alternatif find_amplitude_pairs berbasis fit_sine. Keluarannya berbentuk sama
+    (array PAIR_DTYPE) agar bisa langsung dipakai tabel dan Excel: max_pairs siklus
+    di tengah segmen, dengan nilai puncak/lembah = offset +/- amplitudo hasil fit.
+    """
+    n = len(data_segment)
+    if n < 20 or freq <= 0:
+        return _empty_pairs()
+    if fit is None:
+        fit = fit_sine(data_segment, sampling_rate, freq)
+    if fit['peak_to_peak'] < MINIMUM_AMPLITUDE_THRESHOLD:
+        return _empty_pairs()
+
+    # Puncak model terjadi saat w*t + phase = pi/2 + 2*pi*k; lembah setengah periode kemudian
+    period = sampling_rate / freq
+    first_peak = ((np.pi / 2 - fit['phase']) / (2 * np.pi)) % 1.0 * period
+    n_cycles = int((n - 1 - first_peak - period / 2) // period) + 1
+    if n_cycles <= 0:
+        return _empty_pairs()
+    skip = max((n_cycles - max_pairs) // 2, 0)
+    cycles = np.arange(skip, min(skip + max_pairs, n_cycles))
+
+    pairs = np.empty(len(cycles), dtype=PAIR_DTYPE)
+    pairs['peak_idx'] = np.rint(first_peak + cycles * period)
+    pairs['trough_idx'] = np.minimum(np.rint(first_peak + (cycles + 0.5) * period), n - 1)
+    pairs['peak_val'] = fit['offset'] + fit['amplitude']
+    pairs['trough_val'] = fit['offset'] - fit['amplitude']
+    pairs['amplitude'] = fit['peak_to_peak']
+    return pairs
+
+def _check_shared_timing(channel_timing, sampling_rate):
+    """
+    Rentang sampel channel referensi hanya menunjuk sampel yang sama di channel lain jika
+    sampling rate dan waktu awalnya sama (selisih < setengah sampel); selain itu ValueError.
+    """
+    for key, (fs, offset) in channel_timing.items():
+        if (sampling_rate is not None and fs != sampling_rate) or abs(offset) * fs >= 0.5:
+            raise ValueError(f"Channel {key} ({fs} Hz, mulai {offset:+.3f} s dari channel referensi) tidak sejajar "
+                             f"dengan channel referensi ({sampling_rate} Hz); rentang sampel tidak bisa dipakai bersama.")
+
+def extract_amplitude_batch(channel_data: dict, segments, max_pairs=5, method="peaks",
+                            sampling_rate=None, freqs=None, diagnostics=None, gaps=None, channel_timing=None):
+    """
+    Mengekstrak pasangan amplitudo untuk semua segmen di semua channel dalam satu panggilan.
+
+    channel_data: {channel_key: array 1D kontinu} - satu array per channel.
+    segments: list Segment (waktu; batas sampel dihitung per channel dari sampling rate dan
+        waktu awal channel tersebut), atau tuple (start_sample, end_sample) setengah-terbuka
+        yang berlaku sama untuk semua channel.
+    method: "peaks" (find_amplitude_pairs) atau "sinefit" (find_sine_fit_pairs, butuh
+        sampling rate dan freqs = frekuensi terklasifikasi per segmen; freqs diambil dari
+        Segment jika tidak diberikan).
+    sampling_rate: sampling rate channel yang tidak ada di channel_timing.
+    diagnostics: dict opsional; untuk "sinefit" diisi {channel_key: [hasil fit_sine per segmen]}.
+    gaps: {channel_key: GapIndex} opsional. Segmen yang berisi gap dipecah menjadi rentang
+        tanpa gap: "peaks" memakai find_amplitude_pairs_in_runs, "sinefit" memakai rentang terpanjang.
+    channel_timing: {channel_key: (sampling_rate, selisih waktu awal terhadap channel referensi
+        dalam detik)} opsional (ChannelStore.channel_timing). Segment dipetakan ke sampel tiap
+        channel dengan nilai ini; untuk tuple sampel, channel dengan sampling rate atau waktu
+        awal berbeda ditolak (ValueError) alih-alih diekstrak dari sampel yang salah.
+
+    Setiap segmen diambil sebagai view (tanpa salinan). Mengembalikan
+    {channel_key: [AmplitudePairs per segmen]} dengan indeks absolut terhadap awal channel.
+    """
+    if method not in AMPLITUDE_METHODS:
+        raise ValueError(f"Metode amplitudo tidak dikenal: {method}")
+    timed = bool(segments) and all(isinstance(segment, Segment) for segment in segments)
+    if timed and freqs is None:
+        freqs = [segment.freq for segment in segments]
+    channel_timing = channel_timing or {}
+    if channel_timing and not timed:
+        if sampling_rate is None:
+            # Channel referensi adalah yang selisih waktu awalnya nol
+            timings = list(channel_timing.values())
+            sampling_rate = next((fs for fs, offset in timings if offset == 0), timings[0][0])
+        _check_shared_timing(channel_timing, sampling_rate)
+    if method == "sinefit" and freqs is None:
+        raise ValueError("Metode 'sinefit' membutuhkan freqs.")
+
+    gaps = gaps or {}
+    results = {}
+    for key, data in channel_data.items():
+        data = np.ascontiguousarray(data)
+        fs, offset = channel_timing.get(key, (sampling_rate, 0.0))
+        if fs is None and (timed or method == "sinefit"):
+            raise ValueError(f"Sampling rate channel {key} tidak diketahui.")
+        bounds = [segment.bounds(fs, len(data), offset) for segment in segments] if timed else segments
+        per_segment = []
+        fits = []
+        for seg_idx, (start, end) in enumerate(bounds):
+            runs = gaps[key].valid_runs(start, end) if key in gaps else [(start, end)]
+            if runs != [(start, end)]:
+                if method != "sinefit":
+                    per_segment.append(AmplitudePairs(find_amplitude_pairs_in_runs(data, runs, max_pairs), fs))
+                    continue
+                start, end = max(runs, key=lambda run: run[1] - run[0], default=(start, start))
+            segment = data[start:end]
+            if method == "sinefit":
+                fit = fit_sine(segment, fs, freqs[seg_idx]) if len(segment) >= 20 else None
+                pairs = find_sine_fit_pairs(segment, fs, freqs[seg_idx], max_pairs, fit=fit)
+                fits.append(fit)
+            elif len(segment) > 2 * STREAMING_CHUNK_SIZE:
+                pairs = find_amplitude_pairs_chunked(segment, max_pairs)
+            else:
+                pairs = find_amplitude_pairs(segment, max_pairs)
+            pairs['peak_idx'] += start
+            pairs['trough_idx'] += start
+            per_segment.append(AmplitudePairs(pairs, fs))
+        results[key] = per_segment
+        if diagnostics is not None and method == "sinefit":
+            diagnostics[key] = fits
+    return results
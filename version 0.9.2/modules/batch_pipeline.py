@@ -0,0 +1,179 @@
+# kalibrasi_app/modules/batch_pipeline.py
+
+import json
+import os
+import time
+
+import openpyxl
+from matplotlib.figure import Figure
+
+from modules.amplitude_extractor import AMPLITUDE_METHODS, AmplitudePairs, extract_amplitude_batch
+from modules.certificate_pdf import CERTIFICATE_SHEET, render_certificate_pdf
+from modules.excel_sheets import (ADMIN_SHEET, AMPLITUDE_SHEET, AMPLITUDE_TEMPLATE, DIGITIZER_SHEET, write_admin_sheet,
+                                  write_amplitude_sheet, write_digitizer_sheet)
+from modules.freq_detector import (BOUNDARY_RULES, STANDARD_FREQUENCIES, boundaries_from_band_power, cached_band_power_track,
+                                   change_point_boundaries_from_band_power)
+from modules.minmax_pyramid import MinMaxPyramid
+from modules.seed_loader import open_seed_file
+from modules.segment_table import SegmentTable
+from modules.track_cache import TrackCache
+
+SEED_EXTENSIONS = ('.mseed', '.miniseed', '.seed', '.msd')
+COMPONENT_ENDINGS = {"UD": ('Z', 'UD'), "NS": ('N', 'NS'), "EW": ('E', 'EW')}
+# Ukuran gambar sinyal relatif terhadap PNG yang disimpan, sama dengan ekspor dari GUI
+PLOT_IMAGE_CELL, PLOT_IMAGE_SCALE = 'B136', (0.90, 0.50)
+# Sidecar cache batch ditulis di folder output, bukan di samping data sumber
+SEED_CACHE_FOLDER = "seed_cache"
+
+def component_name(key):
+    """Nama komponen sertifikat (UD, NS, EW) dari akhiran kode channel, atau None."""
+    channel = key.split(".")[-1].upper()
+    return next((name for name, endings in COMPONENT_ENDINGS.items() if channel.endswith(endings)), None)
+
+def default_channel_keys(keys):
+    """Channel default [East-West, North-South, Up-Down] dari akhiran kode channel; sisanya mengisi yang kosong."""
+    available = list(keys)
+    key_map = {}
+    for name in ("UD", "NS", "EW"):
+        found = next((key for key in available if component_name(key) == name), None)
+        if found: key_map[name] = found; available.remove(found)
+    remaining = iter(available)
+    selected = [key_map.get(name) or next(remaining, "") for name in ("EW", "NS", "UD")]
+    return [key for key in selected if key]
+
+def boundaries_from_track(band_track, rule=BOUNDARY_RULES[0], min_gap_seconds=5.0, change_ratio=0.5):
+    """Boundary (detik) dari track daya band menurut aturan "ratio" atau "changepoint"."""
+    if rule == "changepoint":
+        return [t for t, _ in change_point_boundaries_from_band_power(*band_track, min_gap_seconds=min_gap_seconds)]
+    return boundaries_from_band_power(*band_track, min_gap_seconds=min_gap_seconds, change_ratio=change_ratio)
+
+def collect_amplitude_results(segments, pairs_by_ch):
+    """
+    Menyusun hasil extract_amplitude_batch menjadi {freq: {"UD"/"NS"/"EW": AmplitudePairs}};
+    segmen dengan frekuensi yang sama digabung.
+    """
+    results = {}
+    for seg_idx, segment in enumerate(segments):
+        values = results.setdefault(segment.freq, {})
+        for key, per_segment in pairs_by_ch.items():
+            name = component_name(key)
+            if name: values[name] = AmplitudePairs.concatenate([values.get(name), per_segment[seg_idx]])
+    return results
+
+def save_signal_plot(channel_store, keys, image_path, max_points=5000):
+    """PNG sinyal kalibrasi per channel (tanpa pyplot/Tk) untuk ditempel di sertifikat."""
+    fig = Figure(figsize=(10, 2 * len(keys)), facecolor="#2b2b2b")
+    axs = fig.subplots(nrows=len(keys), ncols=1, sharex=True, squeeze=False)[:, 0]
+    for ax, key in zip(axs, keys):
+        data, fs = channel_store.data(key), channel_store.sampling_rate(key)
+        ax.set_facecolor("#222222")
+        # Envelope min/max (bukan sampel per langkah) agar puncak sinyal tidak hilang
+        ax.plot(*MinMaxPyramid(data, fs).envelope(0, len(data) / fs, max_points // 2), color="cyan", linewidth=0.8, label=key)
+        ax.legend(loc="upper right", fontsize=7)
+        ax.tick_params(colors="white", labelsize=7)
+    axs[-1].set_xlabel("Waktu (detik)", color="white")
+    fig.tight_layout()
+    fig.savefig(image_path, dpi=150, facecolor=fig.get_facecolor())
+
+def output_stem(filepath):
+    """Nama dasar file keluaran, ekstensi ikut (a.mseed -> a_mseed) agar a.mseed dan a.seed tidak saling menimpa."""
+    root, ext = os.path.splitext(os.path.basename(filepath))
+    return f"{root}_{ext[1:]}" if ext else root
+
+def find_seed_files(directory, extensions=SEED_EXTENSIONS):
+    """File SEED di directory (tidak rekursif), terurut menurut nama."""
+    return sorted(os.path.join(directory, name) for name in os.listdir(directory)
+                  if name.lower().endswith(extensions) and os.path.isfile(os.path.join(directory, name)))
+
+def calibrate_file(filepath, output_dir, template_path=AMPLITUDE_TEMPLATE, method=AMPLITUDE_METHODS[0],
+                   boundary_rule=BOUNDARY_RULES[0], min_gap_seconds=5.0, change_ratio=0.5,
+                   admin_data=None, digitizer_data=None, render_pdf=True, cache_dir=None):
+    """
+    Alur lengkap satu file SEED tanpa GUI: load -> deteksi boundary -> klasifikasi segmen ->
+    ekstraksi amplitudo -> workbook (salinan template) -> PDF sertifikat.
+
+    admin_data: dict data administrasi; jika None dipakai file JSON bernama sama di samping
+        file SEED (mis. sensor01.json) bila ada.
+    digitizer_data: dict data digitizer (entri dari digitizer_config.json) atau None.
+        Sheet yang datanya tidak ada dikosongkan (isi template bisa berasal dari sesi GUI
+        terakhir), namanya dicatat di 'missing' dan status menjadi 'incomplete'.
+    cache_dir: folder sidecar cache; None = <output_dir>/seed_cache, sehingga folder data
+        sumber hanya dibaca.
+
+    File keluaran diberi nama output_stem(filepath) (.pdf, .xlsx, _plot.png).
+    Mengembalikan dict ringkasan (file, status, durasi tiap tahap, segmen, path keluaran)
+    yang bisa langsung ditulis ke JSON; exception dicatat di 'error', tidak dilempar.
+    """
+    stem = output_stem(filepath)
+    summary = {'file': filepath, 'status': 'ok', 'timings': {}}
+    timings = summary['timings']
+    started = stage_started = time.perf_counter()
+
+    def lap(stage):
+        nonlocal stage_started
+        now = time.perf_counter()
+        timings[stage] = round(now - stage_started, 4)
+        stage_started = now
+
+    try:
+        channel_store, _ = open_seed_file(filepath, cache_dir=cache_dir or os.path.join(output_dir, SEED_CACHE_FOLDER))
+        keys = default_channel_keys(channel_store.keys())
+        if not keys: raise ValueError("Tidak ada channel di file SEED.")
+        channel_data = {key: channel_store.data(key) for key in keys}
+        gaps = {key: channel_store.gap_index(key) for key in keys}
+        lap('load')
+
+        # Channel referensi boundary: komponen UD jika ada (seperti pilihan default di GUI)
+        reference = next((key for key in keys if component_name(key) == "UD"), keys[0])
+        fs = channel_store.sampling_rate(reference)
+        band_track = cached_band_power_track(TrackCache(max_entries=1), channel_data[reference], fs, gaps=gaps[reference])
+        boundaries = boundaries_from_track(band_track, boundary_rule, min_gap_seconds, change_ratio)
+        lap('boundary')
+
+        table = SegmentTable(channel_data[reference], fs, band_track=band_track, gaps=gaps[reference])
+        table.set_boundaries(boundaries)
+        segments = table.segments()
+        lap('classify')
+
+        pairs_by_ch = extract_amplitude_batch(channel_data, segments, method=method, gaps=gaps,
+                                              channel_timing=channel_store.channel_timing(keys, reference))
+        results = collect_amplitude_results(segments, pairs_by_ch)
+        freq_states = {freq: (freq in results) for freq in STANDARD_FREQUENCIES.tolist()}
+        lap('extract')
+
+        if admin_data is None:
+            admin_path = os.path.splitext(filepath)[0] + ".json"
+            if os.path.exists(admin_path):
+                with open(admin_path, "r") as f: admin_data = json.load(f)
+        wb = openpyxl.load_workbook(template_path)
+        summary['missing'] = []
+        for name, sheet_name, writer, args in (("amplitude", AMPLITUDE_SHEET, write_amplitude_sheet, (results, freq_states)),
+                                               ("admin", ADMIN_SHEET, write_admin_sheet, (admin_data,)),
+                                               ("digitizer", DIGITIZER_SHEET, write_digitizer_sheet, (digitizer_data,))):
+            if sheet_name in wb.sheetnames: wb.remove(wb[sheet_name])
+            ws = wb.create_sheet(sheet_name)
+            if args[0] is None: summary['missing'].append(name); continue
+            writer(ws, *args)
+        lap('workbook')
+
+        if render_pdf:
+            image_path = os.path.join(output_dir, f"{stem}_plot.png")
+            save_signal_plot(channel_store, keys, image_path)
+            summary['pdf'] = os.path.join(output_dir, f"{stem}.pdf")
+            summary['pages'] = render_certificate_pdf(wb, summary['pdf'], CERTIFICATE_SHEET,
+                                                      [(image_path, PLOT_IMAGE_CELL, *PLOT_IMAGE_SCALE)])
+            lap('pdf')
+        # Disimpan setelah PDF: render_certificate_pdf menyiapkan ulang sumber gambar yang ditutup oleh save
+        summary['workbook'] = os.path.join(output_dir, f"{stem}.xlsx")
+        wb.save(summary['workbook'])
+        lap('save')
+
+        summary['segments'] = [{'start': segment.t_start, 'end': segment.t_end, 'freq': float(segment.freq)} for segment in segments]
+        summary['frequencies'] = sorted(float(freq) for freq in results)
+        summary['missing_frequencies'] = [float(freq) for freq, found in freq_states.items() if not found]
+        if summary['missing']: summary['status'] = 'incomplete'
+    except Exception as e:
+        summary['status'] = 'error'
+        summary['error'] = f"{type(e).__name__}: {e}"
+    timings['total'] = round(time.perf_counter() - started, 4)
+    return summary
@@ -0,0 +1,184 @@
+# kalibrasi_app/modules/benchmark.py
+
+import gc
+import json
+import os
+import platform
+import shutil
+import statistics
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import openpyxl
+from obspy import Trace
+
+from modules.amplitude_extractor import extract_amplitude_batch, find_best_amplitude_pairs
+from modules.batch_pipeline import collect_amplitude_results, default_channel_keys, save_signal_plot
+from modules.certificate_pdf import render_certificate_pdf
+from modules.excel_sheets import AMPLITUDE_TEMPLATE, write_amplitude_sheet
+from modules.freq_detector import STANDARD_FREQUENCIES, detect_dominant_frequency, detect_frequency_boundaries
+from modules.seed_cache import sidecar_path
+from modules.seed_loader import open_seed_file
+from modules.segment import Segment
+from modules.synthetic_seed import stepped_sine_schedule, write_synthetic_seed
+
+BENCHMARK_FORMAT = 1
+DEFAULT_TIME_THRESHOLD = 0.20
+DEFAULT_MEMORY_THRESHOLD = 0.20
+# Selisih di bawah ini dianggap noise pengukuran, bukan regresi
+MIN_TIME_DELTA = 0.005
+MIN_MEMORY_DELTA = 1024 * 1024
+
+def measure(func, repeat=3):
+    """
+    Menjalankan func() repeat kali untuk waktu (tanpa tracemalloc) lalu sekali lagi dengan
+    tracemalloc untuk puncak alokasi Python/numpy. Mengembalikan dict statistik stage.
+    """
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - started)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {'time_min': min(times), 'time_median': statistics.median(times), 'peak_bytes': peak, 'repeat': repeat}
+
+def run_benchmarks(sampling_rate=100.0, step_seconds=120.0, noise=2000.0, clip=None, gaps=(), seed=0,
+                   repeat=3, template_path=AMPLITUDE_TEMPLATE, stages=None, log=print):
+    """
+    Mengukur waktu dan memori tiap stage alur kalibrasi pada data sintetis
+    (write_synthetic_seed, 12 frekuensi standar) dengan parameter yang sama setiap kali.
+
+    stages: daftar nama stage yang dijalankan (None = semua). Mengembalikan dict hasil
+    yang bisa ditulis ke JSON dan dibandingkan dengan compare_with_baseline.
+    """
+    config = {'sampling_rate': sampling_rate, 'step_seconds': step_seconds, 'noise': noise, 'clip': clip,
+              'gaps': [list(gap) for gap in gaps], 'seed': seed, 'repeat': repeat}
+    workdir = tempfile.mkdtemp(prefix="kalibrasi_bench_")
+    try:
+        seed_path = os.path.join(workdir, "synthetic.mseed")
+        schedule = write_synthetic_seed(seed_path, stepped_sine_schedule(step_seconds=step_seconds), sampling_rate=sampling_rate,
+                                        noise=noise, clip=clip, gaps=gaps, seed=seed)
+
+        def load_cold():
+            # Tanpa sidecar cache: header dibaca dan semua channel di-decode dari SEED
+            shutil.rmtree(sidecar_path(seed_path), ignore_errors=True)
+            store, _ = open_seed_file(seed_path)
+            return {key: store.data(key) for key in store.keys()}
+
+        def load_cached():
+            store, _ = open_seed_file(seed_path)
+            return {key: np.asarray(store.data(key)).sum() for key in store.keys()}
+
+        load_cold()
+        store, _ = open_seed_file(seed_path)
+        keys = default_channel_keys(store.keys())
+        channel_data = {key: np.asarray(store.data(key)) for key in keys}
+        reference = keys[-1]
+        trace = Trace(channel_data[reference], header={'sampling_rate': sampling_rate})
+        segments = [Segment(t_start, t_end, freq) for t_start, t_end, freq in schedule]
+        gap_indexes = {key: store.gap_index(key) for key in keys}
+        timing = store.channel_timing(keys, reference)
+        results = collect_amplitude_results(segments, extract_amplitude_batch(channel_data, segments, gaps=gap_indexes, channel_timing=timing))
+        freq_states = {freq: freq in results for freq in STANDARD_FREQUENCIES.tolist()}
+
+        def workbook_write():
+            wb = openpyxl.Workbook()
+            write_amplitude_sheet(wb.active, results, freq_states)
+            wb.save(os.path.join(workdir, "amplitudo.xlsx"))
+
+        # Template dimuat sekali di luar pengukuran (seperti workbook di memori WorkbookSession)
+        template = openpyxl.load_workbook(template_path) if os.path.exists(template_path) else None
+        def certificate_pdf():
+            render_certificate_pdf(template, os.path.join(workdir, "sertifikat.pdf"))
+
+        all_stages = {
+            'load_seed_file': load_cold,
+            'load_seed_file_cached': load_cached,
+            'detect_frequency_boundaries[spectrogram]': lambda: detect_frequency_boundaries(trace, method="spectrogram"),
+            'detect_frequency_boundaries[goertzel]': lambda: detect_frequency_boundaries(trace, method="goertzel"),
+            'detect_frequency_boundaries[multirate]': lambda: detect_frequency_boundaries(trace, method="multirate"),
+            'detect_dominant_frequency': lambda: [detect_dominant_frequency(segment.view(channel_data[reference], sampling_rate), sampling_rate)
+                                                  for segment in segments],
+            'extract_amplitude[peaks]': lambda: extract_amplitude_batch(channel_data, segments, method="peaks", gaps=gap_indexes, channel_timing=timing),
+            # Wrapper kompatibilitas (format dict lama) di atas ekstraksi vektor, per segmen channel referensi
+            'find_best_amplitude_pairs': lambda: [find_best_amplitude_pairs(segment.view(channel_data[reference], sampling_rate))
+                                                  for segment in segments],
+            'extract_amplitude[sinefit]': lambda: extract_amplitude_batch(channel_data, segments, method="sinefit", gaps=gap_indexes, channel_timing=timing),
+            'workbook_write': workbook_write,
+            'plot_signal': lambda: save_signal_plot(store, keys, os.path.join(workdir, "plot.png")),
+        }
+        if template is not None: all_stages['certificate_pdf'] = certificate_pdf
+        selected = list(all_stages) if stages is None else [name for name in stages if name in all_stages]
+
+        measurements = {}
+        for name in selected:
+            measurements[name] = measure(all_stages[name], repeat)
+            if log: log(f"{name:45s} {measurements[name]['time_median'] * 1000:9.1f} ms  {measurements[name]['peak_bytes'] / 2**20:8.1f} MB")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        'format': BENCHMARK_FORMAT,
+        'created': datetime.now().isoformat(timespec="seconds"),
+        'environment': {'python': platform.python_version(), 'numpy': np.__version__, 'platform': platform.platform(),
+                        'processor': platform.processor(), 'cpu_count': os.cpu_count()},
+        'config': config,
+        'npts': int(len(channel_data[reference])),
+        'selected_stages': None if stages is None else selected,
+        'stages': measurements,
+    }
+
+def compare_with_baseline(results, baseline, time_threshold=DEFAULT_TIME_THRESHOLD, memory_threshold=DEFAULT_MEMORY_THRESHOLD):
+    """
+    Membandingkan hasil run_benchmarks dengan baseline per stage.
+
+    Stage regresi jika median waktu naik lebih dari time_threshold (relatif) atau puncak
+    memori naik lebih dari memory_threshold, dan kenaikan absolutnya di atas batas noise
+    (MIN_TIME_DELTA / MIN_MEMORY_DELTA). Stage baseline yang tidak ada di hasil juga
+    dilaporkan: regresi jika run mencakup semua stage (mis. stage gagal/terlewat), hanya
+    peringatan jika stage itu memang tidak dipilih (--stage).
+
+    Mengembalikan list dict per stage: {stage, time_ratio, memory_ratio, regression, reasons};
+    rasio bernilai None untuk stage yang tidak diukur.
+    """
+    if results.get('config') != baseline.get('config'):
+        print("[WARNING] Konfigurasi benchmark berbeda dengan baseline; perbandingan mungkin tidak sebanding.")
+    comparison = []
+    selected = results.get('selected_stages')
+    for name in baseline.get('stages', {}):
+        if name in results['stages']: continue
+        skipped = selected is not None and name not in selected
+        reason = "tidak dipilih" if skipped else "tidak ada di hasil"
+        if skipped: print(f"[WARNING] Stage baseline '{name}' tidak diukur pada run ini.")
+        comparison.append({'stage': name, 'time_ratio': None, 'memory_ratio': None, 'regression': not skipped, 'reasons': [reason]})
+    for name, current in results['stages'].items():
+        previous = baseline.get('stages', {}).get(name)
+        if previous is None: continue
+        time_ratio = current['time_median'] / previous['time_median'] if previous['time_median'] > 0 else float('inf')
+        memory_ratio = current['peak_bytes'] / previous['peak_bytes'] if previous['peak_bytes'] > 0 else float('inf')
+        reasons = []
+        if time_ratio > 1 + time_threshold and current['time_median'] - previous['time_median'] > MIN_TIME_DELTA:
+            reasons.append(f"waktu x{time_ratio:.2f}")
+        if memory_ratio > 1 + memory_threshold and current['peak_bytes'] - previous['peak_bytes'] > MIN_MEMORY_DELTA:
+            reasons.append(f"memori x{memory_ratio:.2f}")
+        comparison.append({'stage': name, 'time_ratio': time_ratio, 'memory_ratio': memory_ratio,
+                           'regression': bool(reasons), 'reasons': reasons})
+    return comparison
+
+def load_results(path):
+    with open(path, "r") as f:
+        return json.load(f)
+
+def save_results(results, path):
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2)
@@ -0,0 +1,301 @@
+# kalibrasi_app/modules/certificate_pdf.py
+
+import io
+import textwrap
+
+import numpy as np
+from matplotlib import rc_context
+from matplotlib.artist import Artist
+from matplotlib.backends.backend_pdf import PdfPages
+from matplotlib.figure import Figure
+from matplotlib.font_manager import FontProperties
+from matplotlib.patches import PathPatch
+from matplotlib.path import Path
+from matplotlib.transforms import Affine2D, Bbox
+from openpyxl.utils import get_column_letter
+from openpyxl.utils.cell import coordinate_from_string, column_index_from_string, range_boundaries
+from PIL import Image as PILImage
+
+from modules.formula_eval import ExcelError, FormulaEvaluator, format_value
+from modules.openpyxl_compat import image_bytes, sheet_cells, sheet_images
+
+CERTIFICATE_SHEET = 'SERTIF_SEISMO'
+
+A4_POINTS = (595.28, 841.89)
+EMU_PER_POINT = 12700
+POINTS_PER_PIXEL = 0.75
+# Font dasar PDF (Helvetica ~ Arial di template): tidak perlu embedding glyph, jauh lebih cepat
+PDF_RC = {'pdf.use14corefonts': True, 'font.family': 'sans-serif'}
+BORDER_WIDTHS = {'thin': 0.5, 'hair': 0.25, 'dotted': 0.5, 'dashed': 0.5, 'medium': 1.0, 'thick': 1.5, 'double': 1.5}
+
+def _column_points(ws, col_idx):
+    dim = ws.column_dimensions.get(get_column_letter(col_idx))
+    if dim is not None and dim.hidden: return 0.0
+    width = dim.width if dim is not None and dim.width else (ws.sheet_format.defaultColWidth or 8.43)
+    return (width * 7 + 5) * POINTS_PER_PIXEL
+
+def _row_points(ws, row_idx):
+    dim = ws.row_dimensions.get(row_idx)
+    if dim is not None and dim.hidden: return 0.0
+    return dim.height if dim is not None and dim.height else (ws.sheet_format.defaultRowHeight or 15.0)
+
+def _print_area(ws):
+    area = ws.print_area
+    if area:
+        ref = area.split(',')[0].rsplit('!', 1)[-1].replace('$', '')
+        return range_boundaries(ref)
+    return 1, 1, ws.max_column, ws.max_row
+
+def _pages(ws, min_row, max_row):
+    """Rentang baris per halaman menurut page break manual di sheet."""
+    breaks = sorted(brk.id for brk in ws.row_breaks.brk if min_row <= brk.id < max_row)
+    starts = [min_row] + [b + 1 for b in breaks]
+    ends = breaks + [max_row]
+    return list(zip(starts, ends))
+
+def _color(color, default=None):
+    if color is not None and getattr(color, 'type', None) == 'rgb' and isinstance(color.rgb, str) and len(color.rgb) == 8:
+        return '#' + color.rgb[2:]
+    return default
+
+def _image_array(data):
+    """RGBA uint8 dengan baris bawah lebih dulu, urutan yang diharapkan renderer.draw_image."""
+    with PILImage.open(io.BytesIO(data)) as img:
+        return np.ascontiguousarray(np.asarray(img.convert('RGBA'))[::-1])
+
+class _SheetGeometry:
+    """Posisi (point) tepi kolom dan baris di dalam print area, sebelum skala halaman."""
+    def __init__(self, ws, min_col, min_row, max_col, max_row):
+        self.min_col, self.min_row = min_col, min_row
+        self.col_edges = np.concatenate(([0.0], np.cumsum([_column_points(ws, c) for c in range(min_col, max_col + 1)])))
+        self.row_edges = np.concatenate(([0.0], np.cumsum([_row_points(ws, r) for r in range(min_row, max_row + 1)])))
+
+    def x(self, col, offset=0.0):
+        """Tepi kiri kolom col (1-based) + offset point."""
+        i = min(max(col - self.min_col, 0), len(self.col_edges) - 1)
+        return self.col_edges[i] + offset
+
+    def y(self, row, offset=0.0):
+        i = min(max(row - self.min_row, 0), len(self.row_edges) - 1)
+        return self.row_edges[i] + offset
+
+def render_certificate_pdf(workbook, pdf_path, sheet_name=CERTIFICATE_SHEET, extra_images=()):
+    """
+    Merender sheet sertifikat ke PDF tanpa Excel: tata letak (lebar kolom, tinggi baris,
+    merge, font, perataan, border, isian, gambar, page break, margin) diambil dari sheet
+    template itu sendiri, dan nilai formula dihitung dengan FormulaEvaluator dari data di
+    workbook (data_auto, data_administrasi, data_digitizer, ...).
+
+    workbook: workbook openpyxl (boleh workbook di memori milik WorkbookSession).
+    extra_images: tuple (path_png, sel_anchor, faktor_lebar, faktor_tinggi) yang ditempel
+        di atas template, mis. ("data/plots/clean_plot.png", "B136", 0.9, 0.5).
+
+    Sel tercetak yang bernilai error Excel dan fungsi yang tidak didukung evaluator
+    dilaporkan sebagai [WARNING], karena teks errornya ikut tercetak di sertifikat.
+
+    Mengembalikan jumlah halaman yang ditulis.
+    """
+    if sheet_name not in workbook.sheetnames:
+        raise ValueError(f"Sheet '{sheet_name}' tidak ditemukan.")
+    ws = workbook[sheet_name]
+    cells = sheet_cells(ws)
+    evaluator = FormulaEvaluator(workbook)
+    min_col, min_row, max_col, max_row = _print_area(ws)
+    geometry = _SheetGeometry(ws, min_col, min_row, max_col, max_row)
+    pages = _pages(ws, min_row, max_row)
+
+    margins = ws.page_margins
+    page_w, page_h = A4_POINTS
+    left, top = (margins.left or 0.7) * 72, (margins.top or 0.75) * 72
+    avail_w = page_w - left - (margins.right or 0.7) * 72
+    avail_h = page_h - top - (margins.bottom or 0.75) * 72
+    # Skala seragam agar lebar print area dan halaman tertinggi muat di A4 (seperti "fit" Excel)
+    scale = min(1.0, avail_w / geometry.col_edges[-1],
+                 min(avail_h / (geometry.y(end + 1) - geometry.y(start)) for start, end in pages))
+
+    merged_anchor, merged_hidden = {}, set()
+    for merged in ws.merged_cells.ranges:
+        merged_anchor[(merged.min_row, merged.min_col)] = (merged.max_row, merged.max_col)
+        merged_hidden.update((r, c) for r in range(merged.min_row, merged.max_row + 1)
+                             for c in range(merged.min_col, merged.max_col + 1) if (r, c) != (merged.min_row, merged.min_col))
+
+    images = []
+    for img in sheet_images(ws):
+        data = image_bytes(img)
+        anchor = img.anchor
+        if isinstance(anchor, str):
+            col_letter, row = coordinate_from_string(anchor)
+            x0, y0 = geometry.x(column_index_from_string(col_letter)), geometry.y(row)
+            x1, y1 = x0 + img.width * POINTS_PER_PIXEL, y0 + img.height * POINTS_PER_PIXEL
+            top_row = row
+        else:
+            start = anchor._from
+            x0 = geometry.x(start.col + 1, start.colOff / EMU_PER_POINT); y0 = geometry.y(start.row + 1, start.rowOff / EMU_PER_POINT)
+            if getattr(anchor, 'to', None) is not None:
+                x1 = geometry.x(anchor.to.col + 1, anchor.to.colOff / EMU_PER_POINT); y1 = geometry.y(anchor.to.row + 1, anchor.to.rowOff / EMU_PER_POINT)
+            else:
+                x1, y1 = x0 + anchor.ext.width / EMU_PER_POINT, y0 + anchor.ext.height / EMU_PER_POINT
+            top_row = start.row + 1
+        images.append((top_row, (x0, y0, x1, y1), _image_array(data)))
+    for path, cell, width_factor, height_factor in extra_images:
+        with open(path, "rb") as f:
+            array = _image_array(f.read())
+        col_letter, row = coordinate_from_string(cell)
+        x0, y0 = geometry.x(column_index_from_string(col_letter)), geometry.y(row)
+        width, height = array.shape[1] * POINTS_PER_PIXEL * width_factor, array.shape[0] * POINTS_PER_PIXEL * height_factor
+        # Gambar tambahan diperkecil (rasio tetap) agar tidak melewati tepi kanan print area
+        shrink = min(1.0, (geometry.col_edges[-1] - x0) / width) if width > 0 else 1.0
+        images.append((row, (x0, y0, x0 + width * shrink, y0 + height * shrink), array))
+
+    failed = []
+    with rc_context(PDF_RC), PdfPages(pdf_path) as pdf:
+        for page_start, page_end in pages:
+            fig = Figure(figsize=(page_w / 72, page_h / 72))
+            # Koordinat halaman dalam point dengan sumbu y ke bawah (seperti baris sheet)
+            page_transform = Affine2D().scale(1 / 72, -1 / 72).translate(0, page_h / 72) + fig.dpi_scale_trans
+            origin_y = geometry.y(page_start)
+
+            def to_page(x, y):
+                return left + x * scale, top + (y - origin_y) * scale
+
+            fills, borders = {}, {}
+            texts = _CellTextLayer(page_transform)
+            for row in range(page_start, page_end + 1):
+                # Kolom terisi (nilai atau bagian merge) membatasi luapan teks dari sel tetangganya
+                occupied = [col for col in range(min_col, max_col + 1) if (row, col) in merged_hidden or (row, col) in merged_anchor
+                            or getattr(cells.get((row, col)), 'value', None) is not None]
+                for col in range(min_col, max_col + 1):
+                    cell = cells.get((row, col))
+                    # Sel tersembunyi dalam merge digambar oleh sel anchor-nya
+                    if cell is None or (row, col) in merged_hidden: continue
+                    end_row, end_col = merged_anchor.get((row, col), (row, col))
+                    x0, y0 = to_page(geometry.x(col), geometry.y(row))
+                    x1, y1 = to_page(geometry.x(end_col + 1), geometry.y(end_row + 1))
+                    if cell.has_style:
+                        if cell.fill is not None and cell.fill.fill_type == 'solid':
+                            color = _color(cell.fill.fgColor)
+                            if color: fills.setdefault(color, []).append(((x0, y0), (x1, y0), (x1, y1), (x0, y1), (x0, y0)))
+                        border = cell.border
+                        for side, segment in ((border.left, ((x0, y0), (x0, y1))), (border.right, ((x1, y0), (x1, y1))),
+                                              (border.top, ((x0, y0), (x1, y0))), (border.bottom, ((x0, y1), (x1, y1)))):
+                            if side is not None and side.style:
+                                borders.setdefault(BORDER_WIDTHS.get(side.style, 0.5) * scale, []).append(segment)
+                    if cell.value is None: continue
+                    value = evaluator.value(sheet_name, cell.coordinate)
+                    if isinstance(value, ExcelError): failed.append(f"{cell.coordinate}={value.code}")
+                    text = format_value(value, cell.number_format)
+                    if not text.strip(): continue
+                    before = [c for c in occupied if c < col]
+                    after = [c for c in occupied if c > end_col]
+                    clip_x0 = to_page(geometry.x(before[-1] + 1 if before else min_col), 0)[0]
+                    clip_x1 = to_page(geometry.x(after[0] if after else max_col + 1), 0)[0]
+                    texts.add_cell(cell, text, isinstance(value, (int, float)) and not isinstance(value, bool), (x0, y0, x1, y1), scale,
+                                   clip=(clip_x0, clip_x1))
+            # Isian dan border digabung menjadi satu path per warna / tebal garis
+            for color, rects in fills.items():
+                fig.add_artist(PathPatch(_polyline_path(rects), facecolor=color, edgecolor='none', transform=page_transform, zorder=0))
+            page_images = _PageImageLayer(page_transform)
+            for top_row, (x0, y0, x1, y1), array in images:
+                if page_start <= top_row <= page_end:
+                    page_images.items.append((to_page(x0, y0) + to_page(x1, y1), array))
+            fig.add_artist(page_images)
+            for width, segments in borders.items():
+                fig.add_artist(PathPatch(_polyline_path(segments), facecolor='none', edgecolor='black', linewidth=width,
+                                         capstyle='projecting', transform=page_transform, zorder=2))
+            fig.add_artist(texts)
+            pdf.savefig(fig)
+    if failed or evaluator.unsupported:
+        shown = ", ".join(failed[:20]) + (f", ... (+{len(failed) - 20})" if len(failed) > 20 else "")
+        unsupported = f"; fungsi tidak didukung: {', '.join(sorted(evaluator.unsupported))}" if evaluator.unsupported else ""
+        print(f"[WARNING] Sertifikat '{sheet_name}': {len(failed)} sel bernilai error ({shown or '-'}){unsupported}")
+    return len(pages)
+
+def _polyline_path(polylines):
+    """Satu Path berisi banyak polyline (MOVETO lalu LINETO) untuk digambar dengan satu perintah."""
+    vertices = [point for polyline in polylines for point in polyline]
+    codes = [Path.LINETO] * len(vertices)
+    i = 0
+    for polyline in polylines:
+        codes[i] = Path.MOVETO
+        i += len(polyline)
+    return Path(vertices, codes)
+
+class _PageImageLayer(Artist):
+    """
+    Gambar sheet ditulis apa adanya sebagai XObject PDF lewat renderer.draw_image (tanpa
+    resampling BboxImage); array yang sama (logo tiap halaman) hanya disimpan sekali di file.
+    """
+    zorder = 1
+
+    def __init__(self, page_transform):
+        super().__init__()
+        self.page_transform = page_transform
+        self.items = []
+
+    def draw(self, renderer):
+        gc = renderer.new_gc()
+        for (x0, y0, x1, y1), array in self.items:
+            (dx0, dy0), (dx1, dy1) = self.page_transform.transform([(x0, y0), (x1, y1)])
+            # XObject gambar dipetakan ke kotak satuan, diskalakan ke ukuran tujuan
+            renderer.draw_image(gc, min(dx0, dx1), min(dy0, dy1), array, Affine2D().scale(abs(dx1 - dx0), abs(dy1 - dy0)))
+        gc.restore()
+
+class _CellTextLayer(Artist):
+    """
+    Semua teks sel satu halaman digambar oleh satu artist langsung lewat renderer.draw_text,
+    tanpa satu objek Text per sel (yang mendominasi waktu render).
+    """
+    zorder = 3
+
+    def __init__(self, page_transform):
+        super().__init__()
+        self.page_transform = page_transform
+        self.items = []
+        self._fonts = {}
+
+    def _font(self, size, bold, italic):
+        key = (round(size, 2), bool(bold), bool(italic))
+        if key not in self._fonts:
+            self._fonts[key] = FontProperties(size=size, weight='bold' if bold else 'normal', style='italic' if italic else 'normal')
+        return self._fonts[key]
+
+    def add_cell(self, cell, text, is_number, rect, scale, clip=None, padding=2.0):
+        """clip: (x_kiri, x_kanan) batas luapan teks tanpa wrap, seperti Excel memotong teks di sel terisi berikutnya."""
+        x0, y0, x1, y1 = rect
+        font, alignment = cell.font, cell.alignment
+        size = (font.sz or 11) * scale
+        horizontal = alignment.horizontal or 'general'
+        if horizontal == 'general': horizontal = 'right' if is_number else 'left'
+        if horizontal not in ('left', 'center', 'right'): horizontal = 'center' if horizontal == 'centerContinuous' else 'left'
+        vertical = alignment.vertical if alignment.vertical in ('top', 'center', 'bottom') else ('center' if alignment.vertical else 'bottom')
+        if alignment.wrap_text:
+            chars_per_line = max(int((x1 - x0 - 2 * padding) / (size * 0.5)), 1)
+            lines = [line for paragraph in text.split("\n") for line in (textwrap.wrap(paragraph, chars_per_line) or [""])]
+        else:
+            lines = text.split("\n")
+        line_height = size * 1.15
+        block_height = line_height * len(lines)
+        top = {'top': y0 + padding, 'center': (y0 + y1 - block_height) / 2, 'bottom': y1 - padding - block_height}[vertical]
+        x = {'left': x0 + padding, 'center': (x0 + x1) / 2, 'right': x1 - padding}[horizontal]
+        if alignment.wrap_text or clip is None: clip = (x0, x1)
+        self.items.append((x, top, line_height, lines, horizontal, self._font(size, font.b, font.i), _color(font.color, '#000000'), clip))
+
+    def draw(self, renderer):
+        to_display = self.page_transform.transform
+        gc = renderer.new_gc()
+        for x, top, line_height, lines, horizontal, prop, color, (clip_x0, clip_x1) in self.items:
+            gc.set_foreground(color)
+            (cx0, cy0), (cx1, cy1) = to_display([(clip_x0, 0), (clip_x1, 1e4)])
+            clip = Bbox.from_extents(cx0, min(cy0, cy1), cx1, max(cy0, cy1))
+            for i, line in enumerate(lines):
+                if not line: continue
+                px, py = to_display((x, top + (i + 0.8) * line_height))
+                width = renderer.get_text_width_height_descent(line, prop, ismath=False)[0]
+                if horizontal != 'left':
+                    px -= width if horizontal == 'right' else width / 2
+                # Clip hanya untuk teks yang (hampir) melewati batasnya: tiap perubahan clip berarti
+                # state grafis PDF baru, dan sebagian besar teks sel muat jauh di dalam selnya
+                margin = 0.2 * prop.get_size_in_points()
+                gc.set_clip_rectangle(clip if px < cx0 + margin or px + width > cx1 - margin else None)
+                renderer.draw_text(gc, px, py, line, prop, 0.0)
+        gc.restore()
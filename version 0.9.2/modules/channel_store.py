@@ -0,0 +1,152 @@
+# kalibrasi_app/modules/channel_store.py
+
+from collections import OrderedDict
+
+import numpy as np
+from obspy import Stream, Trace
+
+from modules.gap_index import GapIndex, assemble_traces, masked_runs, merge_ranges, trace_spans
+
+DEFAULT_MEMORY_BUDGET = 512 * 1024 * 1024
+
+def channel_key(stats):
+    return f"{stats.station}.{stats.location}.{stats.channel}"
+
+class ChannelStore:
+    """
+    Penyimpanan data per channel ("STA.LOC.CHA") yang dibangun sekali saat file dimuat.
+
+    Setiap channel disimpan sebagai satu array numpy kontinu plus metadata; posisi gap dan
+    overlap ada di GapIndex (gap_index(key)), bukan di masked array.
+    Plot, deteksi boundary, dan ekstraksi mengambil data dari sini sebagai view, jadi
+    stream tidak perlu di-select/merge ulang. Data dimuat lewat loader(key) saat pertama
+    diminta, dan channel yang paling lama tidak dipakai dilepas jika total ukurannya
+    melebihi memory_budget (akan dimuat ulang lewat loader bila diminta lagi). Eviksi hanya
+    membebaskan memori jika loader tidak ikut memegang data (sidecar memory-map, decode
+    ulang dari file); store dari from_stream tetap dibatasi oleh stream yang dipegangnya.
+
+    Loader yang mengembalikan masked array (mis. hasil merge) tidak kehilangan gap: sampel
+    yang di-mask dinolkan dan rentangnya ditambahkan ke metadata 'gaps' channel.
+    """
+    def __init__(self, metadata, loader, memory_budget=DEFAULT_MEMORY_BUDGET, persist=None):
+        self.metadata = metadata
+        self.loader = loader
+        self.memory_budget = memory_budget
+        self.persist = persist
+        self._arrays = OrderedDict()
+        self._gap_indices = {}
+
+    @classmethod
+    def from_stream(cls, stream: Stream, memory_budget=DEFAULT_MEMORY_BUDGET):
+        """
+        Store di atas stream yang sudah di-decode. Trace stream tetap menjadi sumber data
+        (loader), jadi memory_budget tidak bisa menurunkan pemakaian di bawah ukuran stream;
+        open_seed_file membuka ulang store dari sidecar agar stream bisa dilepas.
+        """
+        metadata, traces = {}, {}
+        for tr in stream:
+            key = channel_key(tr.stats)
+            if key not in metadata:
+                metadata[key] = {
+                    'network': tr.stats.network, 'station': tr.stats.station,
+                    'location': tr.stats.location, 'channel': tr.stats.channel,
+                    'sampling_rate': tr.stats.sampling_rate, 'starttime': tr.stats.starttime,
+                }
+                traces[key] = []
+            traces[key].append(tr)
+        for key, meta in metadata.items():
+            meta['starttime'] = min(tr.stats.starttime for tr in traces[key])
+            endtime = max(tr.stats.endtime for tr in traces[key])
+            meta['npts'] = int(round((endtime - meta['starttime']) * meta['sampling_rate'])) + 1
+            spans = trace_spans(traces[key], meta['starttime'], meta['sampling_rate'])
+            meta.update(GapIndex.from_spans(spans, meta['npts']).to_dict())
+
+        def load_from_stream(key):
+            if len(traces[key]) == 1:
+                return traces[key][0].data
+            meta = metadata[key]
+            return assemble_traces(traces[key], meta['starttime'], meta['sampling_rate'], meta['npts'])
+
+        return cls(metadata, load_from_stream, memory_budget)
+
+    def keys(self):
+        return sorted(self.metadata)
+
+    def __contains__(self, key):
+        return key in self.metadata
+
+    def data(self, key):
+        """Array kontinu seluruh channel (dimuat dan di-cache bila belum ada)."""
+        if key in self._arrays:
+            self._arrays.move_to_end(key)
+            return self._arrays[key]
+        data = np.ascontiguousarray(self._unmask(key, self.loader(key)))
+        self._arrays[key] = data
+        self._evict(keep=key)
+        return data
+
+    def is_loaded(self, key):
+        return key in self._arrays
+
+    def put(self, key, data, persist=True):
+        """
+        Memasukkan array yang di-decode di luar loader (mis. oleh loader progresif).
+        persist=False: hanya di memori, untuk data yang sudah disimpan pemanggilnya.
+        """
+        data = self._unmask(key, data)
+        self._arrays[key] = data
+        self._arrays.move_to_end(key)
+        self.metadata[key]['npts'] = len(data)
+        if persist and self.persist is not None:
+            self.persist(key, data)
+        self._evict(keep=key)
+
+    def _unmask(self, key, data):
+        """Masked array -> array biasa; sampel yang di-mask dinolkan dan dicatat sebagai gap."""
+        if not np.ma.isMaskedArray(data):
+            return data
+        mask = np.ma.getmaskarray(data)
+        plain = np.ma.getdata(data)
+        if mask.any():
+            plain = plain.copy()
+            plain[mask] = 0
+            meta = self.metadata[key]
+            meta['gaps'] = merge_ranges(meta.get('gaps', ()), masked_runs(mask))
+            self._gap_indices.pop(key, None)
+        return plain
+
+    def gap_index(self, key):
+        """GapIndex channel key (dari metadata 'gaps'/'overlaps' yang dicatat saat file dimuat)."""
+        if key not in self._gap_indices:
+            meta = self.metadata[key]
+            self._gap_indices[key] = GapIndex(meta.get('gaps', ()), meta.get('overlaps', ()), meta['npts'])
+        return self._gap_indices[key]
+
+    def view(self, key, start=0, end=None):
+        """View (tanpa salinan) rentang sampel [start, end) dari channel."""
+        return self.data(key)[start:end]
+
+    def sampling_rate(self, key):
+        return self.metadata[key]['sampling_rate']
+
+    def channel_timing(self, keys, reference):
+        """{key: (sampling_rate, selisih waktu awal terhadap channel reference dalam detik)}."""
+        reference_start = self.metadata[reference]['starttime']
+        return {key: (self.sampling_rate(key), float(self.metadata[key]['starttime'] - reference_start)) for key in keys}
+
+    def trace(self, key):
+        """Trace obspy yang berbagi array dengan store, untuk kode yang masih butuh Trace."""
+        meta = self.metadata[key]
+        header = {k: meta[k] for k in ('network', 'station', 'location', 'channel', 'sampling_rate', 'starttime')}
+        return Trace(data=self.data(key), header=header)
+
+    def memory_usage(self):
+        return sum(a.nbytes for a in self._arrays.values())
+
+    def _evict(self, keep):
+        while self.memory_usage() > self.memory_budget and len(self._arrays) > 1:
+            oldest = next(iter(self._arrays))
+            if oldest == keep:
+                self._arrays.move_to_end(oldest)
+                continue
+            del self._arrays[oldest]
@@ -0,0 +1,57 @@
+# kalibrasi_app/modules/excel_sheets.py
+
+import os
+
+from openpyxl.styles import Alignment, Font, PatternFill
+
+from modules.amplitude_extractor import AmplitudePairs
+
+AMPLITUDE_WORKBOOK = os.path.join("data", "amplitudo_ekstraksi.xlsx")
+# Folder aplikasi (berisi data/). GUI bekerja relatif terhadap cwd; perintah tanpa GUI
+# (batch, bench) membaca template dari sini agar tidak bergantung pada folder tempat dijalankan.
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+AMPLITUDE_TEMPLATE = os.path.join(APP_DIR, AMPLITUDE_WORKBOOK)
+ADMIN_SHEET = 'data_administrasi'
+DIGITIZER_SHEET = 'data_digitizer'
+AMPLITUDE_SHEET = 'data_auto'
+
+def write_key_value_sheet(ws, data, key_width, value_width):
+    """Sheet dua kolom (nama, nilai) untuk data administrasi dan data digitizer."""
+    ws.column_dimensions['A'].width = key_width; ws.column_dimensions['B'].width = value_width
+    row = 1
+    for key, value in data.items():
+        ws.cell(row=row, column=1, value=key).font = Font(bold=True); ws.cell(row=row, column=2, value=value); row += 1
+
+def write_admin_sheet(ws, data):
+    write_key_value_sheet(ws, data, 35, 50)
+
+def write_digitizer_sheet(ws, data):
+    write_key_value_sheet(ws, data, 25, 40)
+
+def read_admin_sheet(wb):
+    """Data administrasi dari workbook ({} jika sheet belum ada)."""
+    if ADMIN_SHEET not in wb.sheetnames: return {}
+    data = {}
+    for key_cell, value_cell in wb[ADMIN_SHEET].iter_rows(min_row=1, max_col=2):
+        if key_cell.value and value_cell.value is not None: data[str(key_cell.value)] = str(value_cell.value)
+    return data
+
+def write_amplitude_sheet(ws, processed_data, all_freq_states):
+    """Tabel puncak/lembah per frekuensi (kolom NS, EW, UD) yang dibaca oleh sheet sertifikat."""
+    headers = ["FREKUENSI (Hz)", "NS Max", "NS Min", "EW Max", "EW Min", "UD Max", "UD Min"]
+    for col, h in enumerate(headers, start=2):
+        cell = ws.cell(row=4, column=col, value=h); cell.font = Font(bold=True); cell.alignment = Alignment(horizontal="center")
+        if "NS" in h: cell.fill = PatternFill(fill_type="solid", start_color="BDD7EE")
+        elif "EW" in h: cell.fill = PatternFill(fill_type="solid", start_color="FFE699")
+        elif "UD" in h: cell.fill = PatternFill(fill_type="solid", start_color="C6E0B4")
+    row_idx = 5
+    for freq in sorted(all_freq_states.keys()):
+        is_enabled = all_freq_states.get(freq, False)
+        ws.cell(row=row_idx, column=2, value=float(freq)).font = Font(bold=True)
+        if is_enabled and freq in processed_data:
+            ch_data = processed_data.get(freq, {}); ns_pairs = ch_data.get("NS", AmplitudePairs()); ew_pairs = ch_data.get("EW", AmplitudePairs()); ud_pairs = ch_data.get("UD", AmplitudePairs()); max_rows_for_freq = max(len(ns_pairs), len(ew_pairs), len(ud_pairs), 1)
+            for col, pairs in ((3, ns_pairs), (5, ew_pairs), (7, ud_pairs)):
+                for i, (peak, trough) in enumerate(pairs.rows()):
+                    ws.cell(row=row_idx + i, column=col, value=peak); ws.cell(row=row_idx + i, column=col + 1, value=trough)
+            row_idx += max_rows_for_freq
+        else: row_idx += 1
@@ -0,0 +1,359 @@
+# kalibrasi_app/modules/formula_eval.py
+
+import math
+import re
+from functools import lru_cache
+from datetime import date, datetime, timedelta
+
+from openpyxl.utils.cell import column_index_from_string, coordinate_from_string, range_boundaries
+
+from modules.openpyxl_compat import sheet_cells
+
+_TOKEN_RE = re.compile(r"""
+    (?P<string>"(?:[^"]|"")*")
+  | (?P<ref>(?:(?:'(?:[^']|'')+'|[A-Za-z_][A-Za-z0-9_\.]*)!)?\$?[A-Z]{1,3}\$?\d+(?::\$?[A-Z]{1,3}\$?\d+)?)
+  | (?P<func>[A-Z][A-Z0-9\.]*(?=\())
+  | (?P<bool>TRUE|FALSE)
+  | (?P<number>(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)
+  | (?P<op><>|<=|>=|[=<>&+\-*/^%(),;])
+  | (?P<space>\s+)
+""", re.VERBOSE)
+
+_EXCEL_EPOCH = datetime(1899, 12, 30)
+_MONTHS_ID = ["Januari", "Februari", "Maret", "April", "Mei", "Juni", "Juli", "Agustus", "September", "Oktober", "November", "Desember"]
+_DAYS_ID = ["Senin", "Selasa", "Rabu", "Kamis", "Jumat", "Sabtu", "Minggu"]
+# Template dihitung dengan Excel berlokal Indonesia: angka menjadi teks dengan koma desimal
+DECIMAL_SEPARATOR, THOUSANDS_SEPARATOR = ",", "."
+
+class ExcelError(Exception):
+    """Nilai error Excel (#DIV/0!, #VALUE!, ...); ikut merambat seperti di Excel."""
+    def __init__(self, code):
+        super().__init__(code)
+        self.code = code
+
+    def __str__(self):
+        return self.code
+
+def _tokenize(formula):
+    tokens, pos = [], 0
+    while pos < len(formula):
+        match = _TOKEN_RE.match(formula, pos)
+        if match is None:
+            raise ValueError(f"Formula tidak didukung: {formula!r} (posisi {pos})")
+        pos = match.end()
+        if match.lastgroup != 'space':
+            tokens.append((match.lastgroup, match.group()))
+    return tokens
+
+class _Parser:
+    """Recursive descent dengan prioritas operator Excel; hasilnya AST berupa tuple."""
+    def __init__(self, tokens):
+        self.tokens, self.pos = tokens, 0
+
+    def peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else (None, None)
+
+    def take(self, value=None):
+        token = self.peek()
+        if value is not None and token[1] != value:
+            raise ValueError(f"Diharapkan {value!r}, didapat {token[1]!r}")
+        self.pos += 1
+        return token
+
+    def parse(self):
+        node = self.comparison()
+        if self.pos != len(self.tokens):
+            raise ValueError(f"Token berlebih: {self.peek()[1]!r}")
+        return node
+
+    def _binary(self, operators, operand):
+        node = operand()
+        while self.peek()[0] == 'op' and self.peek()[1] in operators:
+            op = self.take()[1]
+            node = ('bin', op, node, operand())
+        return node
+
+    def comparison(self): return self._binary(('=', '<>', '<', '>', '<=', '>='), self.concat)
+    def concat(self): return self._binary(('&',), self.additive)
+    def additive(self): return self._binary(('+', '-'), self.multiplicative)
+    def multiplicative(self): return self._binary(('*', '/'), self.power)
+    def power(self): return self._binary(('^',), self.unary)
+
+    def unary(self):
+        if self.peek() in (('op', '-'), ('op', '+')):
+            op = self.take()[1]
+            return ('neg', self.unary()) if op == '-' else self.unary()
+        node = self.primary()
+        while self.peek() == ('op', '%'):
+            self.take(); node = ('bin', '/', node, ('num', 100.0))
+        return node
+
+    def argument(self):
+        # Argumen kosong, mis. CONCATENATE(a, b,), bernilai kosong seperti di Excel
+        if self.peek()[1] in (',', ';', ')'): return ('empty',)
+        return self.comparison()
+
+    def primary(self):
+        kind, value = self.take()
+        if kind == 'number': return ('num', float(value))
+        if kind == 'string': return ('str', value[1:-1].replace('""', '"'))
+        if kind == 'bool': return ('bool', value == 'TRUE')
+        if kind == 'ref': return ('ref', value)
+        if kind == 'func':
+            self.take('(')
+            args = []
+            if self.peek() != ('op', ')'):
+                args.append(self.argument())
+                while self.peek()[1] in (',', ';'):
+                    self.take(); args.append(self.argument())
+            self.take(')')
+            return ('func', value, args)
+        if (kind, value) == ('op', '('):
+            node = self.comparison(); self.take(')')
+            return node
+        raise ValueError(f"Token tidak terduga: {value!r}")
+
+@lru_cache(maxsize=None)
+def _parse_ref(ref):
+    """(nama sheet atau None, min_col, min_row, max_col, max_row, sel_tunggal) dari teks referensi."""
+    sheet_name = None
+    if '!' in ref:
+        sheet_part, ref = ref.rsplit('!', 1)
+        sheet_name = sheet_part.strip("'").replace("''", "'")
+    min_col, min_row, max_col, max_row = range_boundaries(ref.replace('$', ''))
+    return sheet_name, min_col, min_row, max_col, max_row, (min_col, min_row) == (max_col, max_row) and ':' not in ref
+
+@lru_cache(maxsize=None)
+def parse_formula(formula):
+    """AST formula (tanpa '=' di depan); di-cache per teks formula untuk semua evaluator."""
+    return _Parser(_tokenize(formula)).parse()
+
+def to_number(value):
+    if isinstance(value, ExcelError): raise value
+    if value is None or value == "": return 0.0
+    if isinstance(value, bool): return float(value)
+    if isinstance(value, (int, float)): return float(value)
+    if isinstance(value, datetime): return (value - _EXCEL_EPOCH).total_seconds() / 86400.0
+    if isinstance(value, date): return float((value - _EXCEL_EPOCH.date()).days)
+    try:
+        return float(str(value).strip())
+    except ValueError:
+        raise ExcelError("#VALUE!")
+
+def to_text(value):
+    if isinstance(value, ExcelError): raise value
+    if value is None: return ""
+    if isinstance(value, bool): return "TRUE" if value else "FALSE"
+    if isinstance(value, float): return _localize(f"{value:.15g}") if not value.is_integer() else str(int(value))
+    return str(value)
+
+def _localize(number_text):
+    """Teks angka berformat Python (',' ribuan, '.' desimal) dengan pemisah lokal template."""
+    return number_text.translate({ord(','): THOUSANDS_SEPARATOR, ord('.'): DECIMAL_SEPARATOR})
+
+def _to_datetime(value):
+    if isinstance(value, datetime): return value
+    if isinstance(value, date): return datetime(value.year, value.month, value.day)
+    if isinstance(value, str):
+        # Teks tanggal (mis. dari data administrasi) dikonversi seperti di Excel
+        for fmt in ("%Y-%m-%d", "%Y-%m-%d %H:%M:%S", "%d/%m/%Y", "%d-%m-%Y"):
+            try:
+                return datetime.strptime(value.strip(), fmt)
+            except ValueError:
+                pass
+    return _EXCEL_EPOCH + timedelta(days=to_number(value))
+
+def format_value(value, number_format="General"):
+    """Teks tampilan sebuah nilai sesuai number format sel (subset yang dipakai sertifikat)."""
+    if value is None: return ""
+    if isinstance(value, ExcelError): return value.code
+    fmt = re.sub(r'\[[^\]]*\]', '', number_format or "General").split(';')[0]
+    if fmt in ("General", "@", ""):
+        if isinstance(value, (datetime, date)): return _to_datetime(value).strftime("%d/%m/%Y")
+        return to_text(value)
+    if re.search(r'[dy]|m{3,}', fmt.replace('"', '')) or isinstance(value, (datetime, date)):
+        try:
+            dt = _to_datetime(value)
+        except ExcelError:
+            return to_text(value)
+        parts = {'yyyy': f"{dt.year:04d}", 'yy': f"{dt.year % 100:02d}", 'mmmm': _MONTHS_ID[dt.month - 1],
+                 'mmm': _MONTHS_ID[dt.month - 1][:3], 'mm': f"{dt.month:02d}", 'm': str(dt.month),
+                 'dddd': _DAYS_ID[dt.weekday()], 'ddd': _DAYS_ID[dt.weekday()][:3], 'dd': f"{dt.day:02d}", 'd': str(dt.day)}
+        return re.sub(r'yyyy|yy|mmmm|mmm|mm|m|dddd|ddd|dd|d', lambda m: parts[m.group()], fmt.replace('"', ''))
+    if isinstance(value, str): return value
+    number = to_number(value)
+    percent = '%' in fmt
+    if percent: number *= 100
+    decimals = len(fmt.split('.')[1].rstrip('%').replace('#', '0').rstrip(' ')) if '.' in fmt else 0
+    text = f"{number:,.{decimals}f}" if ',' in fmt else f"{number:.{decimals}f}"
+    return _localize(text) + ('%' if percent else '')
+
+def _excel_round(x, digits):
+    # Excel membulatkan operand ke 15 digit signifikan dulu: ROUND(79.75-77.2, 1) = 2.6, bukan 2.5
+    x = float(f"{x:.15g}")
+    factor = 10.0 ** digits
+    return math.copysign(math.floor(abs(x) * factor + 0.5), x) / factor
+
+def _numbers(args):
+    """Angka dari argumen fungsi agregat: isi range yang bukan angka diabaikan (seperti Excel)."""
+    values = []
+    for arg in args:
+        if isinstance(arg, list):
+            for v in arg:
+                if isinstance(v, ExcelError): raise v
+                if isinstance(v, (int, float)) and not isinstance(v, bool): values.append(float(v))
+        else:
+            values.append(to_number(arg))
+    return values
+
+def _stdev(args):
+    values = _numbers(args)
+    if len(values) < 2: raise ExcelError("#DIV/0!")
+    mean = sum(values) / len(values)
+    return math.sqrt(sum((v - mean) ** 2 for v in values) / (len(values) - 1))
+
+def _forecast(x, known_y, known_x):
+    pairs = [(float(px), float(py)) for px, py in zip(known_x, known_y)
+             if isinstance(px, (int, float)) and isinstance(py, (int, float))]
+    if len(pairs) < 2: raise ExcelError("#DIV/0!")
+    mean_x = sum(p[0] for p in pairs) / len(pairs); mean_y = sum(p[1] for p in pairs) / len(pairs)
+    sxx = sum((px - mean_x) ** 2 for px, _ in pairs)
+    if sxx == 0: raise ExcelError("#DIV/0!")
+    slope = sum((px - mean_x) * (py - mean_y) for px, py in pairs) / sxx
+    return mean_y + slope * (to_number(x) - mean_x)
+
+def _average(args):
+    values = _numbers(args)
+    if not values: raise ExcelError("#DIV/0!")
+    return sum(values) / len(values)
+
+_FUNCTIONS = {
+    'ABS': lambda x: abs(to_number(x)),
+    'AVERAGE': lambda *args: _average(args),
+    'CONCATENATE': lambda *args: "".join(to_text(a) for a in args),
+    'COUNT': lambda *args: float(len(_numbers([a if isinstance(a, list) else [a] for a in args]))),
+    'FORECAST': _forecast,
+    'INT': lambda x: float(math.floor(to_number(x))),
+    'MAX': lambda *args: max(_numbers(args), default=0.0),
+    'MIN': lambda *args: min(_numbers(args), default=0.0),
+    'PI': lambda: math.pi,
+    'POWER': lambda x, y: to_number(x) ** to_number(y),
+    'ROUND': lambda x, digits=0: _excel_round(to_number(x), int(to_number(digits))),
+    'SQRT': lambda x: math.sqrt(to_number(x)) if to_number(x) >= 0 else (_ for _ in ()).throw(ExcelError("#NUM!")),
+    'STDEV': lambda *args: _stdev(args),
+    'SUM': lambda *args: sum(_numbers(args)),
+    'TEXT': lambda value, fmt: format_value(value, to_text(fmt)),
+}
+
+def _compare(op, a, b):
+    if isinstance(a, str) or isinstance(b, str):
+        a, b = to_text(a).lower(), to_text(b).lower()
+    else:
+        a, b = to_number(a), to_number(b)
+    return {'=': a == b, '<>': a != b, '<': a < b, '>': a > b, '<=': a <= b, '>=': a >= b}[op]
+
+class FormulaEvaluator:
+    """
+    Evaluator formula Excel untuk workbook openpyxl (yang tidak menyimpan nilai hasil
+    perhitungan). Mendukung operator dasar, referensi sel/range antar-sheet, dan fungsi yang
+    dipakai template sertifikat (_FUNCTIONS). Sel dihitung malas (hanya yang dibutuhkan) dan
+    hasilnya di-memo, jadi satu evaluator bisa dipakai untuk seluruh satu sertifikat.
+
+    Fungsi yang tidak didukung bernilai #NAME? (seperti Excel tanpa add-in-nya) dan namanya
+    dicatat di self.unsupported agar pemanggil bisa memperingatkan pengguna.
+    """
+    def __init__(self, workbook):
+        self.workbook = workbook
+        self.unsupported = set()
+        self._values = {}
+        self._sheets = {}
+        self._in_progress = set()
+
+    def value(self, sheet_name, coordinate):
+        """Nilai sel (hasil formula jika berformula); error Excel dikembalikan sebagai ExcelError."""
+        col_letter, row = coordinate_from_string(coordinate.replace('$', ''))
+        return self._cell_value(sheet_name, row, column_index_from_string(col_letter))
+
+    def _sheet(self, sheet_name):
+        if sheet_name not in self._sheets:
+            self._sheets[sheet_name] = sheet_cells(self.workbook[sheet_name]) if sheet_name in self.workbook.sheetnames else None
+        return self._sheets[sheet_name]
+
+    def _cell_value(self, sheet_name, row, col):
+        key = (sheet_name, row, col)
+        if key in self._values: return self._values[key]
+        if key in self._in_progress: return ExcelError("#REF!")  # referensi melingkar
+        cells = self._sheet(sheet_name)
+        if cells is None: return ExcelError("#REF!")
+        cell = cells.get((row, col))
+        raw = cell.value if cell is not None else None
+        text = getattr(raw, 'text', raw)  # ArrayFormula
+        if isinstance(text, str) and text.startswith('='):
+            self._in_progress.add(key)
+            try:
+                result = self._eval(parse_formula(text[1:]), sheet_name)
+                if isinstance(result, list): result = result[0] if result else None
+                # Formula yang hasilnya sel kosong (mis. =C32) bernilai 0 di Excel
+                if result is None: result = 0.0
+            except ExcelError as e:
+                result = e
+            except (ZeroDivisionError, OverflowError):
+                result = ExcelError("#DIV/0!")
+            except (TypeError, ValueError):
+                result = ExcelError("#VALUE!")
+            finally:
+                self._in_progress.discard(key)
+        else:
+            result = raw
+        self._values[key] = result
+        return result
+
+    def _range(self, ref, sheet_name):
+        ref_sheet, min_col, min_row, max_col, max_row, single = _parse_ref(ref)
+        sheet_name = ref_sheet or sheet_name
+        if single: return [self._cell_value(sheet_name, min_row, min_col)], True
+        values = [self._cell_value(sheet_name, row, col)
+                  for row in range(min_row, max_row + 1) for col in range(min_col, max_col + 1)]
+        return values, False
+
+    def _eval(self, node, sheet_name):
+        kind = node[0]
+        if kind in ('num', 'str', 'bool'): return node[1]
+        if kind == 'empty': return None
+        if kind == 'ref':
+            values, single = self._range(node[1], sheet_name)
+            if single:
+                if isinstance(values[0], ExcelError): raise values[0]
+                return values[0]
+            return values
+        if kind == 'neg': return -to_number(self._scalar(node[1], sheet_name))
+        if kind == 'bin':
+            op = node[1]
+            a, b = self._scalar(node[2], sheet_name), self._scalar(node[3], sheet_name)
+            if op == '&': return to_text(a) + to_text(b)
+            if op in ('=', '<>', '<', '>', '<=', '>='): return _compare(op, a, b)
+            a, b = to_number(a), to_number(b)
+            if op == '+': return a + b
+            if op == '-': return a - b
+            if op == '*': return a * b
+            if op == '/':
+                if b == 0: raise ExcelError("#DIV/0!")
+                return a / b
+            return a ** b
+        name, args = node[1], node[2]
+        if name == 'IF':
+            condition = self._scalar(args[0], sheet_name)
+            if isinstance(condition, str): raise ExcelError("#VALUE!")
+            branch = 1 if to_number(condition) else 2
+            return self._eval(args[branch], sheet_name) if len(args) > branch else (branch == 1)
+        if name not in _FUNCTIONS:
+            self.unsupported.add(name)
+            raise ExcelError("#NAME?")
+        return _FUNCTIONS[name](*[self._eval(arg, sheet_name) for arg in args])
+
+    def _scalar(self, node, sheet_name):
+        value = self._eval(node, sheet_name)
+        if isinstance(value, list):
+            value = value[0] if value else None
+            if isinstance(value, ExcelError): raise value
+        return value
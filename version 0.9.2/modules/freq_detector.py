@@ -1,15 +1,330 @@
 # kalibrasi_app/modules/freq_detector.py
 
+import heapq
+
 import numpy as np
 from obspy import Trace
-from scipy.signal import spectrogram
+from scipy.signal import decimate, medfilt, spectrogram
 from scipy.fft import rfft, rfftfreq
 
-def detect_frequency_boundaries(trace: Trace, min_gap_seconds=5.0):
+# 12 frekuensi standar kalibrasi step-sine
+STANDARD_FREQUENCIES = np.array([0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1, 2, 5, 10, 15, 20])
+
+BOUNDARY_METHODS = ("spectrogram", "goertzel", "multirate")
+
+# Aturan penentuan boundary dari track frekuensi dominan
+BOUNDARY_RULES = ("ratio", "changepoint")
+
+class DecimationPyramid:
+    """
+    Piramida decimasi anti-alias (FIR fase-nol, per tahap / factor) yang dibangun sekali per trace.
+    Level 0 adalah data asli; level berikutnya berhenti sebelum laju sampel di bawah min_fs
+    atau data terlalu pendek untuk filter decimasi.
+    """
+    def __init__(self, data, fs, factor=10, min_fs=1.0, min_samples=1000):
+        self.factor = factor
+        self.levels = [(data, float(fs))]
+        current, current_fs = data, float(fs)
+        while current_fs / factor >= min_fs and len(current) // factor >= min_samples:
+            current = decimate(np.asarray(current, dtype=np.float64), factor, ftype='fir', zero_phase=True)
+            current_fs /= factor
+            self.levels.append((current, current_fs))
+
+    def level_for(self, freq, oversampling=5.0):
+        """Indeks level dengan laju sampel terendah yang masih >= oversampling * freq."""
+        chosen = 0
+        for i, (_, level_fs) in enumerate(self.levels):
+            if level_fs >= oversampling * freq:
+                chosen = i
+        return chosen
+
+def band_frequencies(include_neighbours=True):
+    """
+    Frekuensi pusat filter bank: 12 frekuensi standar, ditambah (opsional) titik tengah
+    geometris di antara frekuensi yang berdekatan sebagai pembanding.
+    """
+    if not include_neighbours:
+        return STANDARD_FREQUENCIES.astype(np.float64)
+    midpoints = np.sqrt(STANDARD_FREQUENCIES[:-1] * STANDARD_FREQUENCIES[1:])
+    return np.sort(np.concatenate([STANDARD_FREQUENCIES, midpoints]))
+
+def compute_band_power_track(data, fs, freqs=None, hop_seconds=0.5, min_window_seconds=2.0,
+                             min_cycles=2.0, blocks_per_pass=4096, pyramid=None, gaps=None):
+    """
+    Filter bank ala Goertzel: daya sinyal hanya di frekuensi-frekuensi freqs, per frame.
+
+    Data dipotong menjadi blok sepanjang hop; DFT setiap blok di semua frekuensi dihitung
+    sekaligus dengan satu perkalian matriks (O(N * jumlah band)), lalu dirotasi ke fase
+    absolut dan dijumlahkan kumulatif sehingga jendela sepanjang berapa pun blok bisa
+    diambil dengan satu pengurangan. Panjang jendela tiap band = max(min_window_seconds,
+    min_cycles periode), jadi frekuensi rendah tetap terurai.
+
+    Jika pyramid (DecimationPyramid dari data yang sama) diberikan, setiap band dianalisis
+    di level dengan laju sampel terendah yang masih mengurainya, lalu hasilnya diinterpolasi
+    ke grid waktu level 0 sehingga tetap menjadi satu track.
+
+    Jika gaps (GapIndex) diberikan, sampel di gap tidak ikut dijumlahkan dan daya tiap jendela
+    dinormalisasi dengan jumlah sampel valid. Frame yang jendelanya lebih dari separuh gap
+    mengambil nilai frame valid sebelumnya, jadi gap tidak terbaca sebagai perubahan frekuensi.
+
+    Mengembalikan (freqs, times, power) dengan power berukuran [n_band, n_frame]
+    (kuadrat amplitudo ternormalisasi, ~ (A/2)^2 untuk sinus beramplitudo A).
+    """
+    if freqs is None:
+        freqs = band_frequencies()
+    freqs = np.asarray(freqs, dtype=np.float64)
+    if gaps is not None and not gaps:
+        gaps = None
+    if pyramid is not None and gaps is None:
+        return _multirate_band_power_track(pyramid, freqs, hop_seconds, min_window_seconds, min_cycles, blocks_per_pass)
+    hop = max(int(round(hop_seconds * fs)), 1)
+    n_blocks = len(data) // hop
+    if n_blocks == 0:
+        return freqs, np.empty(0), np.empty((len(freqs), 0))
+
+    omega = 2 * np.pi * freqs / fs
+    phase_in_block = np.outer(np.arange(hop), omega)
+    cos_m, sin_m = np.cos(phase_in_block), np.sin(phase_in_block)
+    if gaps is None:
+        mean = float(np.mean(data[:n_blocks * hop]))
+    else:
+        runs = gaps.valid_runs(0, n_blocks * hop)
+        n_valid = sum(e - s for s, e in runs)
+        mean = sum(float(np.sum(data[s:e], dtype=np.float64)) for s, e in runs) / n_valid if n_valid else 0.0
+        # Jumlah kumulatif sampel valid per blok, untuk normalisasi jendela yang terpotong gap
+        cum_valid = np.zeros(n_blocks + 1, dtype=np.int64)
+
+    # Jumlah kumulatif DFT per blok; baris 0 = nol supaya jendela [lo, hi) = cum[hi] - cum[lo]
+    cum = np.zeros((n_blocks + 1, len(freqs)), dtype=np.complex128)
+    for b0 in range(0, n_blocks, blocks_per_pass):
+        b1 = min(b0 + blocks_per_pass, n_blocks)
+        blocks = np.asarray(data[b0 * hop:b1 * hop], dtype=np.float64).reshape(-1, hop) - mean
+        if gaps is not None:
+            valid = gaps.valid_mask(b0 * hop, b1 * hop).reshape(-1, hop)
+            blocks[~valid] = 0.0
+            cum_valid[b0 + 1:b1 + 1] = np.cumsum(valid.sum(axis=1)) + cum_valid[b0]
+        block_dft = (blocks @ cos_m) - 1j * (blocks @ sin_m)
+        block_dft *= np.exp(-1j * np.outer(np.arange(b0, b1) * hop, omega))
+        cum[b0 + 1:b1 + 1] = np.cumsum(block_dft, axis=0) + cum[b0]
+
+    frames = np.arange(n_blocks + 1)
+    power = np.empty((len(freqs), n_blocks + 1))
+    for j, freq in enumerate(freqs):
+        window_seconds = max(min_window_seconds, min_cycles / freq)
+        half = max(int(round(window_seconds * fs / hop / 2)), 1)
+        lo = np.clip(frames - half, 0, n_blocks)
+        hi = np.clip(frames + half, 0, n_blocks)
+        n_samples = (hi - lo) * hop
+        if gaps is None:
+            power[j] = np.abs(cum[hi, j] - cum[lo, j]) ** 2 / n_samples ** 2
+            continue
+        n_valid = cum_valid[hi] - cum_valid[lo]
+        usable = n_valid * 2 > n_samples
+        power[j] = np.abs(cum[hi, j] - cum[lo, j]) ** 2 / np.maximum(n_valid, 1) ** 2
+        # Frame yang didominasi gap memakai frame valid terakhir (atau valid pertama di awal)
+        source = np.maximum.accumulate(np.where(usable, frames, -1))
+        if usable.any():
+            source[source < 0] = np.argmax(usable)
+            power[j] = power[j][source]
+        else:
+            power[j] = 0.0
+
+    times = frames * hop / fs
+    return freqs, times, power
+
+def _multirate_band_power_track(pyramid, freqs, hop_seconds, min_window_seconds, min_cycles, blocks_per_pass):
+    level_of_band = np.array([pyramid.level_for(freq) for freq in freqs])
+    base_data, base_fs = pyramid.levels[0]
+    times = power = None
+    for level in sorted(set(level_of_band)):
+        bands = np.flatnonzero(level_of_band == level)
+        level_data, level_fs = pyramid.levels[level]
+        _, level_times, level_power = compute_band_power_track(
+            level_data, level_fs, freqs[bands], max(hop_seconds, 1 / level_fs),
+            min_window_seconds, min_cycles, blocks_per_pass)
+        if times is None:
+            # Grid waktu mengikuti level 0 walaupun band tertinggi dianalisis di level yang lebih rendah
+            hop = max(int(round(hop_seconds * base_fs)), 1)
+            times = np.arange(len(base_data) // hop + 1) * hop / base_fs
+            power = np.zeros((len(freqs), len(times)))
+        for row, band in enumerate(bands):
+            power[band] = np.interp(times, level_times, level_power[row]) if len(level_times) else 0.0
+    return freqs, times, power
+
+def standard_band_rows(freqs):
+    """
+    Indeks baris track yang merupakan frekuensi standar. Band titik tengah (band_frequencies)
+    hanya pembanding daya/kebocoran dan tidak pernah menjadi frekuensi dominan: jika ikut
+    dipilih, satu langkah x2 terbaca sebagai dua langkah kecil (mis. 0.5 -> 0.707 -> 1).
     """
-    Mendeteksi batas-batas sinyal berdasarkan perubahan frekuensi dominan
-    menggunakan analisis spektogram.
+    rows = np.flatnonzero(np.isclose(freqs[:, None], STANDARD_FREQUENCIES[None, :], rtol=1e-9).any(axis=1))
+    return rows if len(rows) else np.arange(len(freqs))
+
+def dominant_standard_track(freqs, power, decisive_ratio=0.0):
+    """
+    Frekuensi standar dominan per frame (band standar dengan daya terbesar).
+
+    Jika decisive_ratio > 0, frame hanya dianggap tegas bila daya band terbesar melebihi
+    (1 + decisive_ratio) x daya band standar kedua; frame yang tidak tegas (transisi,
+    noise, jeda) mengambil frekuensi frame tegas sebelumnya (atau tegas pertama di awal).
+    """
+    rows = standard_band_rows(freqs)
+    band_power = power[rows]
+    best = np.argmax(band_power, axis=0)
+    dominant = freqs[rows][best]
+    if decisive_ratio <= 0 or len(rows) < 2 or band_power.shape[1] == 0:
+        return dominant
+    top_two = np.partition(band_power, -2, axis=0)[-2:]
+    decisive = top_two[1] > (1 + decisive_ratio) * top_two[0]
+    if not decisive.any():
+        return dominant
+    frames = np.arange(band_power.shape[1])
+    source = np.maximum.accumulate(np.where(decisive, frames, -1))
+    source[source < 0] = np.argmax(decisive)
+    return dominant[source]
+
+def classify_segment_from_band_power(freqs, times, power, t_start, t_end):
+    """
+    Mengklasifikasi segmen [t_start, t_end] dari track daya band: frekuensi standar dengan
+    daya rata-rata terbesar. None jika tidak ada frame di segmen.
+    """
+    in_segment = (times >= t_start) & (times <= t_end)
+    if not np.any(in_segment):
+        return None
+    rows = standard_band_rows(freqs)
+    dominant = freqs[rows][np.argmax(power[np.ix_(rows, in_segment)].mean(axis=1))]
+    return STANDARD_FREQUENCIES[np.argmin(np.abs(STANDARD_FREQUENCIES - dominant))]
+
+def cached_band_power_track(cache, data, fs, use_pyramid=True, gaps=None, **params):
     """
+    compute_band_power_track melalui TrackCache: untuk trace yang sama (isi data dan
+    parameter sama), track dan piramida decimasi tidak dihitung ulang. Data bergap
+    (gaps berisi GapIndex yang tidak kosong) dianalisis di laju sampel asli tanpa piramida.
+    """
+    use_pyramid = use_pyramid and not gaps
+    def compute():
+        pyramid = DecimationPyramid(data, fs) if use_pyramid else None
+        return compute_band_power_track(data, fs, pyramid=pyramid, gaps=gaps, **params)
+    gap_key = {'gaps': gaps.gaps.tolist()} if gaps else {}
+    return cache.get_or_compute(data, compute, kind="band_power", fs=float(fs), use_pyramid=use_pyramid, **params, **gap_key)
+
+def cached_spectrogram_track(cache, data, fs, nperseg, noverlap):
+    """(t, frekuensi dominan) dari spektogram, disimpan di TrackCache per (data, nperseg, noverlap)."""
+    def compute():
+        f, t, Sxx = spectrogram(data, fs=fs, nperseg=nperseg, noverlap=noverlap)
+        return t, f[np.argmax(Sxx, axis=0)]
+    return cache.get_or_compute(data, compute, kind="spectrogram", fs=float(fs), nperseg=nperseg, noverlap=noverlap)
+
+def boundaries_from_band_power(freqs, times, power, min_gap_seconds=5.0, change_ratio=0.5):
+    """
+    Boundary dari track compute_band_power_track: setiap pergantian frekuensi standar dominan
+    (dominant_standard_track). Karena track sudah diskret di grid frekuensi standar, ambang
+    selisih frekuensi milik spektogram tidak dipakai (langkah 10 -> 15 -> 20 Hz berada di bawah
+    0.5 x f); change_ratio di sini adalah rasio ketegasan daya band pemenang terhadap band
+    kedua, sehingga frame transisi/noise tidak memicu boundary.
+    """
+    if power.shape[1] < 2:
+        return []
+    dominant = dominant_standard_track(freqs, power, change_ratio)
+    return _boundaries_at_changes(times, np.flatnonzero(dominant[1:] != dominant[:-1]), min_gap_seconds)
+
+def detect_change_points(values, penalty=None, min_size=10):
+    """
+    Binary segmentation dengan penalti pada deret values (biaya L2 terhadap rata-rata segmen).
+
+    Setiap pemecahan dievaluasi di semua titik sekaligus memakai jumlah kumulatif, dan
+    segmen dengan penurunan biaya terbesar dipecah lebih dulu (heap) sampai penurunan
+    biaya tidak lagi melebihi penalti: O(n log n) untuk pemecahan yang seimbang.
+    Penalti default = 3 * sigma^2 * log(n), sigma dari MAD selisih (minimum 0.05).
+
+    Mengembalikan list (indeks, confidence) terurut; indeks = frame pertama segmen baru,
+    confidence = 1 - penalti/penurunan biaya (0..1, makin besar makin yakin).
+    """
+    y = np.asarray(values, dtype=np.float64)
+    n = len(y)
+    if n < 2 * min_size:
+        return []
+    if penalty is None:
+        sigma = 1.4826 * np.median(np.abs(np.diff(y))) / np.sqrt(2)
+        penalty = 3 * max(sigma, 0.05) ** 2 * np.log(n)
+
+    csum = np.concatenate([[0.0], np.cumsum(y)])
+    csum_sq = np.concatenate([[0.0], np.cumsum(y * y)])
+
+    def segment_cost(a, b):
+        return csum_sq[b] - csum_sq[a] - (csum[b] - csum[a]) ** 2 / (b - a)
+
+    def push_best_split(heap, a, b):
+        if b - a < 2 * min_size:
+            return
+        k = np.arange(a + min_size, b - min_size + 1)
+        gain = segment_cost(a, b) - segment_cost(a, k) - segment_cost(k, b)
+        best = int(np.argmax(gain))
+        heapq.heappush(heap, (-gain[best], a, b, int(k[best])))
+
+    heap = []
+    push_best_split(heap, 0, n)
+    change_points = []
+    while heap:
+        neg_gain, a, b, k = heapq.heappop(heap)
+        if -neg_gain <= penalty:
+            break
+        change_points.append((k, 1 - penalty / -neg_gain))
+        push_best_split(heap, a, k)
+        push_best_split(heap, k, b)
+    return sorted(change_points)
+
+def change_point_boundaries_from_band_power(freqs, times, power, min_gap_seconds=5.0, penalty=None, median_frames=5):
+    """
+    Boundary dari track daya band memakai detect_change_points pada log10 frekuensi dominan.
+    Track dihaluskan dengan median filter (median_frames) agar satu frame noise tidak
+    menjadi boundary, dan min_gap_seconds menjadi panjang segmen minimum.
+
+    Mengembalikan list (waktu_boundary, confidence).
+    """
+    if power.shape[1] < 2:
+        return []
+    log_dominant = np.log10(dominant_standard_track(freqs, power))
+    if median_frames > 1 and len(log_dominant) >= median_frames:
+        log_dominant = medfilt(log_dominant, median_frames | 1)
+    hop_seconds = times[1] - times[0]
+    min_size = max(int(np.ceil(min_gap_seconds / hop_seconds)), 1)
+    return [((times[k - 1] + times[k]) / 2, confidence)
+            for k, confidence in detect_change_points(log_dominant, penalty, min_size)]
+
+def _boundaries_at_changes(t, change_indices, min_gap_seconds):
+    """Waktu t[i] untuk setiap indeks perubahan i, dengan jarak minimal min_gap_seconds dari boundary sebelumnya."""
+    boundaries = []
+    last_boundary_time = 0
+    for i in change_indices:
+        current_time = t[i]
+        if (current_time - last_boundary_time) > min_gap_seconds:
+            boundaries.append(current_time)
+            last_boundary_time = current_time
+    return boundaries
+
+def _boundaries_from_dominant_track(t, dominant_freqs_over_time, min_gap_seconds, change_ratio=0.5):
+    """
+    Deteksi perubahan drastis pada frekuensi dominan track spektogram. Murah (tanpa
+    spektogram), jadi bisa dipanggil ulang saat min_gap_seconds/change_ratio diubah.
+    """
+    freq_diffs = np.abs(np.diff(dominant_freqs_over_time))
+    
+    # Ambang batas perubahan frekuensi yang dianggap signifikan
+    change_thresholds = np.maximum(dominant_freqs_over_time[:-1] * change_ratio, 0.1)
+
+    return _boundaries_at_changes(t, np.flatnonzero(freq_diffs > change_thresholds), min_gap_seconds)
+
+def detect_frequency_boundaries(trace: Trace, min_gap_seconds=5.0, method="spectrogram", change_ratio=0.5, cache=None):
+    """
+    Mendeteksi batas-batas sinyal berdasarkan perubahan frekuensi dominan.
+    method="spectrogram" memakai spektogram penuh; method="goertzel" hanya menghitung
+    daya di frekuensi standar (compute_band_power_track); method="multirate" sama dengan
+    "goertzel" tetapi band rendah dianalisis pada DecimationPyramid.
+    Jika cache (TrackCache) diberikan, track frekuensi diambil dari/disimpan ke cache.
+    """
+    if method not in BOUNDARY_METHODS:
+        raise ValueError(f"Metode boundary tidak dikenal: {method}")
     fs = trace.stats.sampling_rate
     data = trace.data
 
@@ -17,6 +332,18 @@ def detect_frequency_boundaries(trace: Trace, min_gap_seconds=5.0):
         print("[WARNING] Sinyal terlalu pendek untuk analisis spektogram.")
         return []
 
+    if method in ("goertzel", "multirate"):
+        if cache is not None:
+            track = cached_band_power_track(cache, data, fs, use_pyramid=(method == "multirate"))
+        else:
+            pyramid = DecimationPyramid(data, fs) if method == "multirate" else None
+            track = compute_band_power_track(data, fs, pyramid=pyramid)
+        return boundaries_from_band_power(*track, min_gap_seconds=min_gap_seconds, change_ratio=change_ratio)
+
+    if cache is not None:
+        t, dominant_freqs_over_time = cached_spectrogram_track(cache, data, fs, int(fs*2), int(fs*1.5))
+        return _boundaries_from_dominant_track(t, dominant_freqs_over_time, min_gap_seconds, change_ratio)
+
     # 1. Hitung Spektogram
     f, t, Sxx = spectrogram(data, fs=fs, nperseg=int(fs*2), noverlap=int(fs*1.5))
 
@@ -25,22 +352,7 @@ def detect_frequency_boundaries(trace: Trace, min_gap_seconds=5.0):
     dominant_freqs_over_time = f[dominant_freq_indices]
 
     # 3. Deteksi Perubahan Drastis pada Frekuensi Dominan
-    boundaries = []
-    last_boundary_time = 0
-    
-    freq_diffs = np.abs(np.diff(dominant_freqs_over_time))
-    
-    # Ambang batas perubahan frekuensi yang dianggap signifikan
-    change_thresholds = np.maximum(dominant_freqs_over_time[:-1] * 0.5, 0.1)
-
-    for i in range(len(freq_diffs)):
-        current_time = t[i]
-        
-        if freq_diffs[i] > change_thresholds[i] and (current_time - last_boundary_time) > min_gap_seconds:
-            boundaries.append(current_time)
-            last_boundary_time = current_time
-            
-    return boundaries
+    return _boundaries_from_dominant_track(t, dominant_freqs_over_time, min_gap_seconds, change_ratio)
 
 def detect_dominant_frequency(segment_data, sampling_rate):
     """
@@ -0,0 +1,113 @@
+# kalibrasi_app/modules/gap_index.py
+
+import numpy as np
+
+def trace_spans(traces, starttime, sampling_rate):
+    """Rentang sampel [start, end) setiap trace relatif terhadap starttime channel, terurut."""
+    spans = []
+    for tr in traces:
+        start = int(round((tr.stats.starttime - starttime) * sampling_rate))
+        spans.append((start, start + tr.stats.npts))
+    return sorted(spans)
+
+def assemble_traces(traces, starttime, sampling_rate, npts):
+    """
+    Menyusun potongan-potongan trace satu channel ke satu array kontinu sepanjang npts.
+    Pengganti merge(method=1): tidak ada interpolasi atau masked array; sampel di gap
+    dibiarkan nol dan posisinya dicatat di GapIndex. Pada overlap, trace yang mulai
+    belakangan menimpa yang lebih awal.
+    """
+    traces = sorted(traces, key=lambda tr: tr.stats.starttime)
+    data = np.zeros(npts, dtype=traces[0].data.dtype if traces else np.int32)
+    for tr in traces:
+        start = int(round((tr.stats.starttime - starttime) * sampling_rate))
+        src = tr.data[max(-start, 0):]
+        start = max(start, 0)
+        end = min(start + len(src), npts)
+        if end > start:
+            data[start:end] = src[:end - start]
+    return data
+
+def merge_ranges(*range_lists):
+    """Gabungan rentang [start, end) dari beberapa daftar, terurut dan tanpa tumpang tindih."""
+    ranges = sorted((int(s), int(e)) for ranges in range_lists for s, e in ranges if e > s)
+    merged = []
+    for start, end in ranges:
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+def masked_runs(mask):
+    """Rentang [start, end) sampel yang bernilai True pada mask."""
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], np.asarray(mask, dtype=np.int8), [0]))))
+    return edges.reshape(-1, 2).tolist()
+
+class GapIndex:
+    """
+    Indeks gap dan overlap satu channel, dibangun sekali saat file dimuat.
+
+    gaps dan overlaps adalah array terurut [n, 2] berisi rentang sampel [start, end).
+    Deteksi boundary, klasifikasi segmen, dan ekstraksi amplitudo memakai indeks ini
+    untuk melewati / memecah segmen di sekitar gap, sehingga data channel tetap satu
+    array biasa (bukan masked array).
+    """
+    __slots__ = ("gaps", "overlaps", "npts")
+
+    def __init__(self, gaps=(), overlaps=(), npts=0):
+        self.gaps = np.asarray(gaps, dtype=np.int64).reshape(-1, 2)
+        self.overlaps = np.asarray(overlaps, dtype=np.int64).reshape(-1, 2)
+        self.npts = int(npts)
+
+    @classmethod
+    def from_spans(cls, spans, npts):
+        """Indeks dari rentang sampel yang terisi data (mis. hasil trace_spans)."""
+        gaps, overlaps = [], []
+        covered = 0
+        for start, end in sorted(spans):
+            if start > covered:
+                gaps.append((covered, min(start, npts)))
+            elif start < covered:
+                overlaps.append((start, min(end, covered)))
+            covered = max(covered, end)
+        if covered < npts:
+            gaps.append((covered, npts))
+        return cls([g for g in gaps if g[1] > g[0]], overlaps, npts)
+
+    def to_dict(self):
+        """Bentuk yang bisa disimpan di metadata / header JSON sidecar."""
+        return {'gaps': self.gaps.tolist(), 'overlaps': self.overlaps.tolist()}
+
+    def __len__(self):
+        return len(self.gaps)
+
+    def __bool__(self):
+        return len(self.gaps) > 0
+
+    def gaps_in(self, start, end):
+        """Gap yang beririsan dengan [start, end), dipotong ke rentang tersebut."""
+        lo = np.searchsorted(self.gaps[:, 1], start, side='right')
+        hi = np.searchsorted(self.gaps[:, 0], end, side='left')
+        return np.clip(self.gaps[lo:hi], start, end)
+
+    def has_gap(self, start, end):
+        return len(self.gaps_in(start, end)) > 0
+
+    def valid_runs(self, start=0, end=None, min_length=1):
+        """Rentang [s, e) tanpa gap di dalam [start, end), yang panjangnya >= min_length."""
+        end = self.npts if end is None else end
+        edges = self.gaps_in(start, end).ravel()
+        bounds = np.concatenate(([start], edges, [end])).reshape(-1, 2)
+        return [(int(s), int(e)) for s, e in bounds if e - s >= min_length]
+
+    def valid_mask(self, start, end):
+        """Array bool [end - start]: True untuk sampel yang berisi data."""
+        mask = np.ones(end - start, dtype=bool)
+        for s, e in self.gaps_in(start, end):
+            mask[s - start:e - start] = False
+        return mask
+
+    def gap_times(self, sampling_rate):
+        """Gap dalam detik relatif terhadap awal channel, untuk ditandai di plot."""
+        return self.gaps / sampling_rate
@@ -0,0 +1,68 @@
+# kalibrasi_app/modules/minmax_pyramid.py
+
+import numpy as np
+
+class MinMaxPyramid:
+    """
+    Ringkasan multi-resolusi min/max dari satu channel untuk menggambar waveform.
+
+    Level 0 adalah data asli; level k menyimpan min dan max per bucket berisi
+    base_bucket * factor**(k-1) sampel, dibangun sekali dari level sebelumnya. envelope()
+    memilih level yang paling kasar namun masih lebih halus dari satu piksel, sehingga
+    biayanya sebanding dengan jumlah piksel, bukan jumlah sampel yang terlihat.
+    """
+    def __init__(self, data, sampling_rate, base_bucket=8, factor=4, min_buckets=512):
+        self.data = data
+        self.sampling_rate = float(sampling_rate)
+        self.levels = []  # (ukuran bucket, mins, maxs)
+        n = len(data) // base_bucket * base_bucket
+        if n // base_bucket < min_buckets: return
+        blocks = np.asarray(data[:n]).reshape(-1, base_bucket)
+        mins, maxs, bucket = blocks.min(axis=1), blocks.max(axis=1), base_bucket
+        self.levels.append((bucket, mins, maxs))
+        while len(mins) // factor >= min_buckets:
+            m = len(mins) // factor * factor
+            mins, maxs = mins[:m].reshape(-1, factor).min(axis=1), maxs[:m].reshape(-1, factor).max(axis=1)
+            bucket *= factor
+            self.levels.append((bucket, mins, maxs))
+
+    def __len__(self):
+        return len(self.data)
+
+    def envelope(self, t_start, t_end, n_pixels):
+        """
+        (times, values) untuk rentang waktu [t_start, t_end] dengan lebar n_pixels piksel:
+        sampel asli jika cukup sedikit, selain itu pasangan min/max per piksel (garis
+        vertikal per kolom piksel, puncak sinyal tidak pernah hilang). Rentang diperlebar
+        satu kolom di tiap sisi agar garis tidak terputus di tepi sumbu.
+        """
+        n_pixels = max(int(n_pixels), 1)
+        fs, npts = self.sampling_rate, len(self.data)
+        start = min(max(int(np.floor(t_start * fs)), 0), npts)
+        end = min(max(int(np.ceil(t_end * fs)) + 1, start), npts)
+        samples_per_pixel = (end - start) / n_pixels
+        start = max(start - int(np.ceil(samples_per_pixel)), 0)
+        end = min(end + int(np.ceil(samples_per_pixel)), npts)
+
+        level = None
+        for bucket, mins, maxs in self.levels:
+            if bucket <= samples_per_pixel / 2: level = (bucket, mins, maxs)
+        if level is None:
+            return np.arange(start, end) / fs, np.asarray(self.data[start:end])
+
+        bucket, mins, maxs = level
+        first, last = start // bucket, min(-(-end // bucket), len(mins))
+        # Bucket level dikelompokkan lagi menjadi kolom piksel dengan reduceat
+        per_column = max(int(samples_per_pixel // bucket), 1)
+        edges = np.arange(first, last, per_column)
+        if len(edges) == 0: return np.empty(0), np.empty(0)
+        column_min = np.minimum.reduceat(mins[first:last], edges - first)
+        column_max = np.maximum.reduceat(maxs[first:last], edges - first)
+        times = np.repeat((edges + per_column / 2) * bucket / fs, 2)
+        values = np.column_stack((column_min, column_max)).ravel()
+        # Sisa sampel setelah bucket terakhir yang lengkap tidak masuk level mana pun
+        tail_start = len(mins) * bucket
+        if last == len(mins) and end > tail_start:
+            times = np.concatenate((times, np.arange(tail_start, end) / fs))
+            values = np.concatenate((values, np.asarray(self.data[tail_start:end])))
+        return times, values
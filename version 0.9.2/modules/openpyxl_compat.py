@@ -0,0 +1,48 @@
+# kalibrasi_app/modules/openpyxl_compat.py
+
+import io
+import weakref
+
+import openpyxl
+
+# Atribut internal openpyxl di bawah ini hanya diperiksa pada seri versi berikut
+TESTED_VERSIONS = ("3.0", "3.1")
+
+def _check_version():
+    series = ".".join(openpyxl.__version__.split(".")[:2])
+    if series not in TESTED_VERSIONS:
+        print(f"[WARNING] openpyxl {openpyxl.__version__} belum diuji (teruji: {', '.join(TESTED_VERSIONS)}.x); "
+              "render sertifikat dan penyimpanan gambar workbook mungkin gagal.")
+
+_check_version()
+
+def _internal(obj, name, kind):
+    value = getattr(obj, name, None)
+    if not isinstance(value, kind):
+        raise RuntimeError(f"openpyxl {openpyxl.__version__} tidak didukung: {type(obj).__name__}.{name} tidak tersedia.")
+    return value
+
+def sheet_cells(ws):
+    """
+    Dict {(row, col): Cell} berisi sel yang sudah ada di sheet. Dipakai sebagai pengganti
+    ws.cell()/ws[...] yang membuat sel kosong baru di workbook setiap kali dibaca.
+    """
+    return _internal(ws, '_cells', dict)
+
+def sheet_images(ws):
+    """Gambar (openpyxl.drawing.image.Image) yang tertanam di sheet; openpyxl tidak punya API publiknya."""
+    return list(_internal(ws, '_images', list))
+
+_image_data = weakref.WeakKeyDictionary()
+
+def image_bytes(img):
+    """
+    Isi file gambar. img._data() (juga dipanggil workbook.save()) menutup sumber datanya,
+    jadi byte-nya disimpan per gambar dan img.ref diganti BytesIO baru berisi data yang sama
+    setiap kali, agar workbook tetap bisa dibaca dan disimpan berulang kali.
+    """
+    data = _image_data.get(img)
+    if data is None:
+        data = _image_data[img] = _internal(img, '_data', object)()
+    img.ref = io.BytesIO(data)
+    return data
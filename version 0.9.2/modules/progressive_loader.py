@@ -0,0 +1,179 @@
+# kalibrasi_app/modules/progressive_loader.py
+
+import io
+import mmap
+import os
+import queue
+import struct
+import threading
+
+import numpy as np
+from obspy import read
+from obspy.io.mseed.util import get_record_information
+
+from modules.channel_store import channel_key
+from modules.seed_loader import open_seed_file
+
+def _record_header(buf, offset, filepath):
+    """
+    (panjang record, channel key) satu record miniSEED di buf[offset:], dari header tetap
+    dan blockette 1000. Urutan byte ditebak dari tahun di BTIME; record tanpa blockette
+    1000 dibaca lewat get_record_information.
+    """
+    station = bytes(buf[offset + 8:offset + 13]).decode("ascii", "replace").strip()
+    location = bytes(buf[offset + 13:offset + 15]).decode("ascii", "replace").strip()
+    channel = bytes(buf[offset + 15:offset + 18]).decode("ascii", "replace").strip()
+    key = f"{station}.{location}.{channel}"
+    endian = '>' if 1900 <= struct.unpack_from('>H', buf, offset + 20)[0] <= 2100 else '<'
+    blockette = struct.unpack_from(endian + 'H', buf, offset + 46)[0]
+    for _ in range(16):
+        if not blockette or offset + blockette + 7 > len(buf):
+            break
+        blockette_type, next_blockette = struct.unpack_from(endian + 'HH', buf, offset + blockette)
+        if blockette_type == 1000:
+            return 2 ** buf[offset + blockette + 6], key
+        blockette = next_blockette
+    return get_record_information(filepath, offset)['record_length'], key
+
+def _is_data_record(buf, offset):
+    """Header tetap record data miniSEED: nomor urut 6 digit (boleh diawali spasi) dan kode kualitas D/R/Q/M."""
+    sequence = bytes(buf[offset:offset + 6])
+    return sequence.strip() != b"" and sequence.strip(b" 0123456789") == b"" and buf[offset + 6] in b"DRQM"
+
+def iter_records(buf, filepath):
+    """
+    (offset, panjang record, channel key) setiap record di buf, masing-masing dengan panjangnya sendiri.
+    Pemindaian berhenti di record pertama yang bukan record data miniSEED (padding nol, header
+    kontrol volume SEED penuh, header yang tidak terbaca); sisa file setelahnya tidak di-yield.
+    """
+    offset = 0
+    while offset + 48 <= len(buf) and _is_data_record(buf, offset):
+        try:
+            record_length, key = _record_header(buf, offset, filepath)
+        except Exception:
+            return
+        if record_length < 48 or offset + record_length > len(buf):
+            return
+        yield offset, record_length, key
+        offset += record_length
+
+def _has_data_after(buf, offset):
+    """True jika buf[offset:] berisi byte selain nol (bukan sekadar padding di akhir file)."""
+    return bool(np.count_nonzero(np.frombuffer(buf, dtype=np.uint8, offset=offset))) if offset < len(buf) else False
+
+class ProgressiveSeedLoader(threading.Thread):
+    """
+    Decode file miniSEED di thread terpisah, per kelompok record, untuk channel-channel keys.
+
+    Record dipindai satu per satu menurut panjang record masing-masing (file dengan panjang
+    record campuran tidak terpotong di tengah record), dan hanya record milik channel keys
+    yang di-decode; record channel lain dilewati tanpa decoding. Padding nol di akhir file
+    diabaikan; file yang bukan miniSEED murni (mis. volume SEED penuh dengan header kontrol)
+    di-decode utuh lewat obspy lalu channel keys diambil dari hasilnya.
+
+    Setiap potongan yang selesai di-decode dikirim ke out_queue sebagai
+    ("chunk", key, start_sample, data) sehingga GUI bisa menggambar overview dari kiri ke
+    kanan selama proses berjalan, disusul ("progress", fraksi). Pesan terakhir adalah
+    ("done", {key: array}), ("cancelled",) atau ("error", exception). Array akhir disusun
+    di posisi sampel masing-masing; gap dibiarkan nol (posisinya ada di GapIndex channel).
+
+    persist(key, data), bila diberikan (mis. ChannelStore.persist), dipanggil di thread ini
+    untuk setiap array sebelum "done" dikirim, jadi penulisan sidecar tidak membebani GUI.
+    """
+    def __init__(self, filepath, metadata, keys, out_queue=None, records_per_chunk=256, persist=None):
+        super().__init__(daemon=True)
+        self.filepath = filepath
+        self.metadata = metadata
+        self.keys = set(keys)
+        self.out_queue = out_queue if out_queue is not None else queue.Queue()
+        self.records_per_chunk = records_per_chunk
+        self.persist = persist
+        self.cancel_event = threading.Event()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def run(self):
+        try:
+            arrays = {}
+            file_size = os.path.getsize(self.filepath)
+            if file_size:
+                with open(self.filepath, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                    selected, scanned, end = [], 0, 0
+                    for offset, record_length, key in iter_records(buf, self.filepath):
+                        if self.cancel_event.is_set():
+                            break
+                        if key in self.keys:
+                            selected.append(buf[offset:offset + record_length])
+                        scanned += 1
+                        end = offset + record_length
+                        if len(selected) >= self.records_per_chunk or scanned % (4 * self.records_per_chunk) == 0:
+                            self._decode(selected, arrays)
+                            selected = []
+                            self.out_queue.put(("progress", min((offset + record_length) / file_size, 1.0)))
+                    if selected and not self.cancel_event.is_set():
+                        self._decode(selected, arrays)
+                    whole_file = _has_data_after(buf, end)
+                if whole_file and not self.cancel_event.is_set():
+                    arrays = {}
+                    self._place_stream(read(self.filepath), arrays)
+
+            if self.persist is not None:
+                for key, data in arrays.items():
+                    if self.cancel_event.is_set():
+                        break
+                    self.persist(key, data)
+            if self.cancel_event.is_set():
+                self.out_queue.put(("cancelled",))
+                return
+            self.out_queue.put(("progress", 1.0))
+            self.out_queue.put(("done", arrays))
+        except Exception as e:
+            self.out_queue.put(("error", e))
+
+    def _decode(self, records, arrays):
+        if not records:
+            return
+        self._place_stream(read(io.BytesIO(b"".join(records)), format="MSEED"), arrays)
+
+    def _place_stream(self, stream, arrays):
+        for tr in stream:
+            key = channel_key(tr.stats)
+            if key in self.keys:
+                self._place(tr, key, arrays)
+
+    def _place(self, tr, key, arrays):
+        meta = self.metadata[key]
+        if key not in arrays:
+            arrays[key] = np.zeros(meta['npts'], dtype=tr.data.dtype)
+        start = int(round((tr.stats.starttime - meta['starttime']) * meta['sampling_rate']))
+        data = tr.data[max(-start, 0):]
+        start = max(start, 0)
+        end = min(start + len(data), meta['npts'])
+        if end <= start:
+            return
+        arrays[key][start:end] = data[:end - start]
+        self.out_queue.put(("chunk", key, start, data[:end - start]))
+
+class SeedFileOpener(threading.Thread):
+    """
+    open_seed_file di thread terpisah (signature + pembacaan header sebanding dengan ukuran
+    file), supaya GUI tetap responsif. Mengirim ("opened", channel_store, filepath),
+    ("cancelled",) atau ("error", exception) ke out_queue.
+    """
+    def __init__(self, filepath, out_queue=None):
+        super().__init__(daemon=True)
+        self.filepath = filepath
+        self.out_queue = out_queue if out_queue is not None else queue.Queue()
+        self.cancel_event = threading.Event()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def run(self):
+        try:
+            store, _ = open_seed_file(self.filepath)
+        except Exception as e:
+            self.out_queue.put(("error", e))
+            return
+        self.out_queue.put(("cancelled",) if self.cancel_event.is_set() else ("opened", store, self.filepath))
@@ -0,0 +1,154 @@
+# kalibrasi_app/modules/seed_cache.py
+
+import hashlib
+import json
+import os
+
+import numpy as np
+from obspy import UTCDateTime
+
+from modules.channel_store import ChannelStore
+from modules.gap_index import masked_runs, merge_ranges
+
+SIDECAR_SUFFIX = ".kcache"
+SIDECAR_VERSION = 4
+
+def sidecar_path(filepath, cache_dir=None):
+    """Folder sidecar: di samping file SEED, atau <cache_dir>/<nama file>.kcache jika cache_dir diisi."""
+    if cache_dir is None:
+        return filepath + SIDECAR_SUFFIX
+    return os.path.join(cache_dir, os.path.basename(filepath) + SIDECAR_SUFFIX)
+
+def file_signature(filepath, block_size=1024 * 1024):
+    """
+    Ukuran, mtime, dan hash blok awal + akhir file; sidecar hanya dipakai jika ketiganya cocok.
+    Hanya 2 x block_size yang dibaca (bukan seluruh file), jadi pembukaan ulang file besar
+    tidak sebanding dengan ukurannya; perubahan di tengah file tetap tertangkap oleh mtime.
+    """
+    stat = os.stat(filepath)
+    digest = hashlib.blake2b(digest_size=16)
+    with open(filepath, "rb") as f:
+        digest.update(f.read(block_size))
+        if stat.st_size > block_size:
+            f.seek(max(stat.st_size - block_size, block_size))
+            digest.update(f.read(block_size))
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'hash': digest.hexdigest()}
+
+def new_sidecar_header(signature, metadata):
+    """Header sidecar berisi metadata semua channel; channel yang sudah di-cache punya entri 'file'."""
+    channels = {}
+    for key, meta in metadata.items():
+        meta = dict(meta)
+        meta['starttime'] = str(meta['starttime'])
+        channels[key] = meta
+    return {'version': SIDECAR_VERSION, 'signature': signature, 'channels': channels}
+
+def read_sidecar_header(filepath, signature, cache_dir=None):
+    """header.json milik filepath, atau None jika tidak ada / tidak cocok lagi dengan file."""
+    header_path = os.path.join(sidecar_path(filepath, cache_dir), "header.json")
+    if not os.path.exists(header_path):
+        return None
+    try:
+        with open(header_path, "r") as f:
+            header = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+    if header.get('version') != SIDECAR_VERSION or header.get('signature') != signature:
+        return None
+    return header
+
+def write_sidecar_header(filepath, header, cache_dir=None):
+    folder = sidecar_path(filepath, cache_dir)
+    try:
+        os.makedirs(folder, exist_ok=True)
+        # Tulis ke file sementara lalu ganti: header yang terputus di tengah tidak pernah terbaca
+        tmp_path = os.path.join(folder, "header.json.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(header, f, indent=2)
+        os.replace(tmp_path, os.path.join(folder, "header.json"))
+    except OSError as e:
+        print(f"[WARNING] Gagal menulis sidecar cache: {e}")
+        return False
+    return True
+
+def save_sidecar_channel(filepath, header, key, data, cache_dir=None):
+    """
+    Menyimpan satu channel sebagai .npy (dtype asli) lalu mencatatnya di header.
+    Posisi gap ada di header (metadata 'gaps'), jadi channel bergap ikut disimpan; masked
+    array disimpan sebagai data biasa (sampel ter-mask dinolkan) dan rentang mask-nya
+    ditambahkan ke 'gaps', bukan ditulis sebagai sampel nyata.
+    """
+    name = f"channel_{sorted(header['channels']).index(key)}.npy"
+    if np.ma.isMaskedArray(data):
+        mask = np.ma.getmaskarray(data)
+        data = np.ma.getdata(data)
+        if mask.any():
+            data = data.copy()
+            data[mask] = 0
+            meta = header['channels'][key]
+            meta['gaps'] = merge_ranges(meta.get('gaps', ()), masked_runs(mask))
+    try:
+        os.makedirs(sidecar_path(filepath, cache_dir), exist_ok=True)
+        np.save(os.path.join(sidecar_path(filepath, cache_dir), name), data)
+    except OSError as e:
+        print(f"[WARNING] Gagal menulis sidecar cache: {e}")
+        return False
+    header['channels'][key].update({'file': name, 'dtype': str(data.dtype), 'npts': len(data)})
+    return write_sidecar_header(filepath, header, cache_dir)
+
+def is_channel_cached(store: ChannelStore, key):
+    """True jika channel sudah ada di memori atau di sidecar (tidak perlu decoding SEED)."""
+    return store.is_loaded(key) or bool(store.metadata[key].get('file'))
+
+def store_from_sidecar(filepath, header, fallback_loader=None, cache_dir=None):
+    """
+    ChannelStore berbasis sidecar: channel yang sudah di-cache dibuka dengan
+    np.load(mmap_mode='r') (tanpa decoding SEED, halaman dibaca saat diakses); channel
+    lainnya dimuat lewat fallback_loader lalu disimpan ke sidecar untuk pembukaan berikutnya.
+    Setiap channel yang tersimpan juga dicatat di metadata store (entri 'file'), sehingga
+    is_channel_cached langsung melihatnya tanpa membaca ulang header.
+    """
+    metadata = {}
+    for key, meta in header['channels'].items():
+        meta = dict(meta)
+        meta['starttime'] = UTCDateTime(meta['starttime'])
+        metadata[key] = meta
+
+    def load_channel(key):
+        name = header['channels'][key].get('file')
+        if name:
+            try:
+                return np.load(os.path.join(sidecar_path(filepath, cache_dir), name), mmap_mode='r')
+            except (OSError, ValueError) as e:
+                print(f"[WARNING] Sidecar {name} tidak bisa dibuka: {e}")
+        if fallback_loader is None:
+            raise KeyError(f"Channel {key} tidak ada di sidecar cache.")
+        data = fallback_loader(key)
+        persist(key, data)
+        metadata[key]['npts'] = len(data)
+        return data
+
+    def persist(key, data):
+        saved = save_sidecar_channel(filepath, header, key, data, cache_dir)
+        if saved:
+            metadata[key].update({field: header['channels'][key][field] for field in ('file', 'dtype', 'npts')})
+        return saved
+
+    return ChannelStore(metadata, load_channel, persist=persist)
+
+def load_sidecar(filepath, signature=None, cache_dir=None):
+    """ChannelStore dari sidecar yang lengkap, atau None jika tidak ada / tidak cocok."""
+    header = read_sidecar_header(filepath, signature or file_signature(filepath), cache_dir)
+    if header is None or not all(meta.get('file') for meta in header['channels'].values()):
+        return None
+    return store_from_sidecar(filepath, header, cache_dir=cache_dir)
+
+def write_sidecar(filepath, store: ChannelStore, signature=None, cache_dir=None):
+    """
+    Menyimpan semua channel store ke sidecar (lihat sidecar_path). Data dimuat dulu sebelum
+    header dibuat: gap yang baru diketahui saat memuat (masked array) ikut tercatat di header.
+    """
+    arrays = {key: store.data(key) for key in store.keys()}
+    header = new_sidecar_header(signature or file_signature(filepath), store.metadata)
+    saved = [save_sidecar_channel(filepath, header, key, data, cache_dir) for key, data in arrays.items()]
+    return all(saved)
@@ -0,0 +1,88 @@
+# kalibrasi_app/modules/seed_loader.py
+
+from obspy import read
+
+from modules.channel_store import ChannelStore, channel_key
+from modules.gap_index import GapIndex, assemble_traces, trace_spans
+from modules.seed_cache import (file_signature, new_sidecar_header, read_sidecar_header,
+                                store_from_sidecar, write_sidecar, write_sidecar_header)
+
+def read_seed_headers(filepath):
+    """
+    Membaca header saja (tanpa decoding sampel): daftar channel, waktu awal/akhir,
+    sampling rate, npts gabungan, dan indeks gap/overlap (GapIndex.to_dict) per channel.
+    """
+    stream = read(filepath, headonly=True)
+    metadata, traces = {}, {}
+    for tr in stream:
+        key = channel_key(tr.stats)
+        meta = metadata.get(key)
+        if meta is None:
+            metadata[key] = {
+                'network': tr.stats.network, 'station': tr.stats.station,
+                'location': tr.stats.location, 'channel': tr.stats.channel,
+                'sampling_rate': tr.stats.sampling_rate, 'starttime': tr.stats.starttime,
+                'endtime': tr.stats.endtime,
+            }
+            traces[key] = [tr]
+        else:
+            meta['starttime'] = min(meta['starttime'], tr.stats.starttime)
+            meta['endtime'] = max(meta['endtime'], tr.stats.endtime)
+            traces[key].append(tr)
+    for key, meta in metadata.items():
+        meta['npts'] = int(round((meta['endtime'] - meta['starttime']) * meta['sampling_rate'])) + 1
+        meta['endtime'] = str(meta['endtime'])
+        spans = trace_spans(traces[key], meta['starttime'], meta['sampling_rate'])
+        meta.update(GapIndex.from_spans(spans, meta['npts']).to_dict())
+    return metadata
+
+def decode_channel(filepath, key):
+    """
+    Decode sampel satu channel saja (record channel lain dilewati oleh pembaca miniSEED).
+    Potongan trace disusun dengan assemble_traces (gap bernilai nol, tanpa masked array).
+    """
+    station, location, channel = key.split(".")
+    try:
+        stream = read(filepath, format="MSEED", sourcename=f"*.{station}.{location}.{channel}")
+    except Exception:
+        # Bukan miniSEED murni: baca semua lalu pilih channel yang diminta
+        stream = read(filepath).select(station=station, location=location, channel=channel)
+    fs = stream[0].stats.sampling_rate
+    starttime = min(tr.stats.starttime for tr in stream)
+    npts = int(round((max(tr.stats.endtime for tr in stream) - starttime) * fs)) + 1
+    return assemble_traces(stream, starttime, fs, npts)
+
+def open_seed_file(filepath, lazy=True, cache_dir=None):
+    """
+    Membuka file SEED sebagai ChannelStore.
+
+    Jika sidecar cache cocok, channel yang sudah di-cache dibuka lewat memory-map.
+    Mode lazy hanya membaca header saat dibuka; sampel sebuah channel baru di-decode
+    (lalu disimpan ke sidecar) ketika channel itu pertama kali dipakai. Mode non-lazy
+    membaca seluruh stream sekaligus. Gap/overlap dicatat di metadata (lihat GapIndex),
+    bukan diisi lewat merge.
+
+    Mengembalikan (channel_store, stream). Mode non-lazy menulis sidecar lalu membuka ulang
+    store dari sidecar, sehingga stream dilepas dan memory_budget store benar-benar berlaku;
+    stream hanya dikembalikan (dan tetap memegang datanya) jika sidecar gagal ditulis.
+
+    cache_dir: folder sidecar; None = di samping file SEED (lihat sidecar_path).
+    """
+    signature = file_signature(filepath)
+    header = read_sidecar_header(filepath, signature, cache_dir)
+    fallback_loader = lambda key: decode_channel(filepath, key)
+
+    if header is None and not lazy:
+        stream = read(filepath)
+        store = ChannelStore.from_stream(stream)
+        if not write_sidecar(filepath, store, signature, cache_dir):
+            return store, stream
+        del store, stream
+        header = read_sidecar_header(filepath, signature, cache_dir)
+        if header is not None:
+            return store_from_sidecar(filepath, header, fallback_loader, cache_dir), None
+
+    if header is None:
+        header = new_sidecar_header(signature, read_seed_headers(filepath))
+        write_sidecar_header(filepath, header, cache_dir)
+    return store_from_sidecar(filepath, header, fallback_loader, cache_dir), None
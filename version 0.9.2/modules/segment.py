@@ -0,0 +1,45 @@
+# kalibrasi_app/modules/segment.py
+
+import numpy as np
+
+def seconds_to_sample_range(t_start, t_end, sampling_rate, npts):
+    """
+    Mengubah rentang waktu (detik relatif terhadap awal trace) menjadi (start, end)
+    sampel setengah-terbuka, dengan sampel yang sama seperti Trace.slice.
+    """
+    start = max(int(np.ceil(t_start * sampling_rate - 1e-9)), 0)
+    end = min(int(np.floor(t_end * sampling_rate + 1e-9)) + 1, npts)
+    return start, max(end, start)
+
+class Segment:
+    """
+    Satu segmen frekuensi: rentang waktu [t_start, t_end] (detik relatif terhadap awal
+    channel referensi) dan frekuensi terklasifikasi. Waktu adalah sumber kebenaran; batas
+    sampel dihitung per channel dengan bounds(sampling_rate, npts, offset), jadi channel
+    dengan sampling rate atau waktu awal lain tetap mengambil sampel pada waktu yang sama.
+    Sampel diambil dengan view() sebagai view numpy (tanpa Trace.slice / salinan).
+    """
+    __slots__ = ("t_start", "t_end", "freq")
+
+    def __init__(self, t_start, t_end, freq):
+        self.t_start = float(t_start)
+        self.t_end = float(t_end)
+        self.freq = freq
+
+    def __repr__(self):
+        return f"Segment({self.t_start:.3f}, {self.t_end:.3f}, freq={self.freq})"
+
+    @property
+    def duration(self):
+        return self.t_end - self.t_start
+
+    def bounds(self, sampling_rate, npts, offset=0.0):
+        """
+        (start, end) sampel setengah-terbuka di channel dengan sampling_rate dan npts sampel;
+        offset = waktu awal channel dikurangi waktu awal channel referensi (detik).
+        """
+        return seconds_to_sample_range(self.t_start - offset, self.t_end - offset, sampling_rate, npts)
+
+    def view(self, data, sampling_rate, offset=0.0):
+        start, end = self.bounds(sampling_rate, len(data), offset)
+        return data[start:end]
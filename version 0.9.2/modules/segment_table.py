@@ -0,0 +1,76 @@
+# kalibrasi_app/modules/segment_table.py
+
+import bisect
+
+import numpy as np
+
+from modules.freq_detector import STANDARD_FREQUENCIES, classify_segment_from_band_power, detect_dominant_frequency
+from modules.segment import Segment, seconds_to_sample_range
+
+class SegmentTable:
+    """
+    Tabel segmen frekuensi yang terurut untuk satu trace referensi.
+
+    Frekuensi hasil klasifikasi disimpan per rentang sampel (start, end), sehingga
+    setelah boundary dihapus hanya segmen gabungan yang baru yang perlu dianalisis;
+    segmen lain diambil dari cache. Data diambil sebagai view numpy (tanpa Trace.slice).
+    Jika gaps (GapIndex) diberikan, analisis FFT cadangan hanya memakai rentang tanpa gap
+    terpanjang di segmen, dan segmen yang seluruhnya gap dilewati.
+    """
+    def __init__(self, data, sampling_rate, band_track=None, minimum_duration_seconds=50, gaps=None):
+        self.data = data
+        self.sampling_rate = sampling_rate
+        self.band_track = band_track
+        self.gaps = gaps
+        self.minimum_duration_seconds = minimum_duration_seconds
+        self.boundaries = []
+        self._freq_cache = {}
+
+    @property
+    def duration(self):
+        return len(self.data) / self.sampling_rate
+
+    def set_boundaries(self, boundaries):
+        self.boundaries = sorted(set(boundaries))
+
+    def remove_boundaries(self, times_to_delete):
+        """Menghapus boundary yang waktunya ada di times_to_delete. Mengembalikan jumlah yang terhapus."""
+        removed = 0
+        for t in set(times_to_delete):
+            i = bisect.bisect_left(self.boundaries, t)
+            if i < len(self.boundaries) and self.boundaries[i] == t:
+                del self.boundaries[i]
+                removed += 1
+        return removed
+
+    def _classify(self, key, t_start, t_end):
+        if key in self._freq_cache:
+            return self._freq_cache[key]
+
+        start, end = key
+        if self.gaps:
+            start, end = max(self.gaps.valid_runs(start, end), key=lambda run: run[1] - run[0], default=(start, start))
+        if end <= start:
+            return None
+
+        classified_freq = None
+        if self.band_track is not None:
+            classified_freq = classify_segment_from_band_power(*self.band_track, t_start, t_end)
+        if classified_freq is None:
+            detected_freq = detect_dominant_frequency(self.data[start:end], self.sampling_rate)
+            classified_freq = STANDARD_FREQUENCIES[np.argmin(np.abs(STANDARD_FREQUENCIES - detected_freq))]
+        self._freq_cache[key] = classified_freq
+        return classified_freq
+
+    def segments(self):
+        """List Segment (rentang waktu + frekuensi terklasifikasi) untuk segmen yang cukup panjang."""
+        full_boundaries = sorted(set([0] + self.boundaries + [self.duration]))
+        identified = []
+        for t_start, t_end in zip(full_boundaries[:-1], full_boundaries[1:]):
+            if (t_end - t_start) < self.minimum_duration_seconds:
+                continue
+            key = seconds_to_sample_range(t_start, t_end, self.sampling_rate, len(self.data))
+            classified_freq = self._classify(key, t_start, t_end)
+            if classified_freq is not None:
+                identified.append(Segment(t_start, t_end, classified_freq))
+        return identified
@@ -0,0 +1,65 @@
+# kalibrasi_app/modules/synthetic_seed.py
+
+import numpy as np
+from obspy import Stream, Trace, UTCDateTime
+
+from modules.freq_detector import STANDARD_FREQUENCIES
+
+COMPONENTS = ('Z', 'N', 'E')
+
+def stepped_sine_schedule(freqs=STANDARD_FREQUENCIES, step_seconds=120.0, min_cycles=5, pause_seconds=0.0):
+    """
+    Jadwal langkah sinus [(t_start, t_end, freq)] dalam detik. Setiap langkah minimal
+    step_seconds dan minimal min_cycles periode (frekuensi rendah jadi lebih panjang);
+    pause_seconds = jeda tanpa sinyal di antara langkah.
+    """
+    schedule, t = [], 0.0
+    for freq in freqs:
+        duration = max(step_seconds, min_cycles / float(freq))
+        schedule.append((t, t + duration, float(freq)))
+        t += duration + pause_seconds
+    return schedule
+
+def generate_stepped_sine(schedule, sampling_rate=100.0, amplitude=50000.0, noise=2000.0, offset=1500.0,
+                          clip=None, gaps=(), seed=0, network='XX', station='SYN', location='', band_code='SH',
+                          starttime=UTCDateTime(2025, 1, 1)):
+    """
+    Stream 3 komponen (Z, N, E) berisi sinus bertingkat menurut schedule (lihat
+    stepped_sine_schedule), deterministik untuk seed yang sama.
+
+    amplitude: amplitudo puncak (count); tiap komponen sedikit berbeda (1.0, 0.97, 1.03).
+    noise: simpangan baku noise Gaussian (count).
+    clip: batas saturasi |count| (mis. 2**23 - 1 untuk digitizer 24 bit), None = tanpa clipping.
+    gaps: [(t_start, durasi)] detik; sampel di rentang ini dibuang sehingga trace terpecah
+        (seperti record yang hilang), sama untuk ketiga komponen.
+    """
+    rng = np.random.default_rng(seed)
+    npts = int(round(schedule[-1][1] * sampling_rate)) if schedule else 0
+    t = np.arange(npts) / sampling_rate
+    keep = np.ones(npts, dtype=bool)
+    for gap_start, gap_duration in gaps:
+        keep[int(gap_start * sampling_rate):int((gap_start + gap_duration) * sampling_rate)] = False
+
+    stream = Stream()
+    for component, gain in zip(COMPONENTS, (1.0, 0.97, 1.03)):
+        signal = np.full(npts, offset)
+        for t_start, t_end, freq in schedule:
+            start, end = int(round(t_start * sampling_rate)), int(round(t_end * sampling_rate))
+            signal[start:end] += gain * amplitude * np.sin(2 * np.pi * freq * t[:end - start] + rng.uniform(0, 2 * np.pi))
+        signal += rng.normal(0.0, noise, npts)
+        if clip is not None: np.clip(signal, -clip, clip, out=signal)
+        data = np.round(signal).astype(np.int32)
+
+        # Rentang sampel kontinu (tanpa gap) menjadi trace terpisah
+        edges = np.flatnonzero(np.diff(np.concatenate(([0], keep.view(np.int8), [0]))))
+        for start, end in zip(edges[::2], edges[1::2]):
+            header = {'network': network, 'station': station, 'location': location, 'channel': band_code + component,
+                      'sampling_rate': sampling_rate, 'starttime': starttime + start / sampling_rate}
+            stream.append(Trace(np.ascontiguousarray(data[start:end]), header=header))
+    return stream
+
+def write_synthetic_seed(filepath, schedule=None, reclen=4096, **params):
+    """Menulis stream generate_stepped_sine ke file MiniSEED. Mengembalikan schedule yang dipakai."""
+    schedule = stepped_sine_schedule() if schedule is None else schedule
+    generate_stepped_sine(schedule, **params).write(filepath, format="MSEED", reclen=reclen, encoding="STEIM2")
+    return schedule
@@ -0,0 +1,113 @@
+# kalibrasi_app/modules/track_cache.py
+
+import hashlib
+import os
+from collections import OrderedDict
+
+import numpy as np
+
+DEFAULT_DISK_BUDGET = 256 * 1024 * 1024
+
+class TrackCache:
+    """
+    Cache hasil analisis frekuensi (spektogram / track daya band) per trace.
+
+    Kunci = hash isi data + parameter analisis, jadi hasil tetap valid selama data dan
+    parameternya sama. Di memori dibatasi max_entries dengan eviksi LRU; jika cache_dir
+    diberikan, setiap entri juga disimpan sebagai .npz sehingga bertahan antar sesi.
+    File di cache_dir dibatasi total max_disk_bytes: file yang paling lama tidak dipakai
+    (mtime, diperbarui setiap kali dibaca) dihapus lebih dulu.
+    """
+    def __init__(self, max_entries=8, cache_dir=None, max_disk_bytes=DEFAULT_DISK_BUDGET):
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self.max_disk_bytes = max_disk_bytes
+        self._entries = OrderedDict()
+
+    @staticmethod
+    def make_key(data, **params):
+        digest = hashlib.blake2b(np.ascontiguousarray(data).view(np.uint8), digest_size=16)
+        digest.update(str(np.asarray(data).dtype).encode())
+        digest.update(repr(sorted(params.items())).encode())
+        return digest.hexdigest()
+
+    def _disk_path(self, key):
+        return os.path.join(self.cache_dir, f"track_{key}.npz")
+
+    def get(self, key):
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            return self._entries[key]
+        if self.cache_dir and os.path.exists(self._disk_path(key)):
+            try:
+                with np.load(self._disk_path(key)) as npz:
+                    value = tuple(npz[f"arr_{i}"] for i in range(len(npz.files)))
+            except (OSError, ValueError) as e:
+                print(f"[WARNING] Cache rusak, diabaikan: {e}")
+                return None
+            try:
+                os.utime(self._disk_path(key))
+            except OSError:
+                pass
+            self._store(key, value)
+            return value
+        return None
+
+    def put(self, key, value):
+        self._store(key, value)
+        if self.cache_dir:
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                np.savez(self._disk_path(key), *value)
+            except OSError as e:
+                print(f"[WARNING] Gagal menyimpan cache ke disk: {e}")
+            self._prune_disk(keep=self._disk_path(key))
+
+    def disk_files(self):
+        """[(path, ukuran, mtime)] file cache di cache_dir, yang paling lama tidak dipakai lebih dulu."""
+        if not self.cache_dir or not os.path.isdir(self.cache_dir):
+            return []
+        files = []
+        for name in os.listdir(self.cache_dir):
+            if name.startswith("track_") and name.endswith(".npz"):
+                path = os.path.join(self.cache_dir, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                files.append((path, stat.st_size, stat.st_mtime_ns))
+        return sorted(files, key=lambda item: item[2])
+
+    def _prune_disk(self, keep=None):
+        if self.max_disk_bytes is None:
+            return
+        files = self.disk_files()
+        total = sum(size for _, size, _ in files)
+        for path, size, _ in files:
+            if total <= self.max_disk_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+                total -= size
+            except OSError as e:
+                print(f"[WARNING] Gagal menghapus cache lama: {e}")
+
+    def _store(self, key, value):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get_or_compute(self, data, compute, **params):
+        """Mengembalikan tuple array dari cache, atau memanggil compute() lalu menyimpannya."""
+        key = self.make_key(data, **params)
+        value = self.get(key)
+        if value is None:
+            value = tuple(compute())
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        self._entries.clear()
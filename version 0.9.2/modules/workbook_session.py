@@ -0,0 +1,97 @@
+# kalibrasi_app/modules/workbook_session.py
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import openpyxl
+
+from modules.openpyxl_compat import image_bytes, sheet_images
+
+class WorkbookSession:
+    """
+    Workbook Excel yang dibuka sekali dan disimpan di memori selama aplikasi berjalan.
+
+    Semua akses ke workbook (load, tulis sheet, simpan) dijalankan berurutan di satu thread
+    pekerja, jadi pemanggil di thread GUI tidak pernah menunggu I/O openpyxl. Sheet yang
+    diubah ditandai dirty; penyimpanan ke disk (write-behind) dilakukan flush_delay detik
+    setelah perubahan terakhir, atau langsung lewat flush()/close() (mis. saat keluar).
+    """
+    def __init__(self, filepath, flush_delay=2.0):
+        self.filepath = filepath
+        self.flush_delay = flush_delay
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="workbook")
+        self._workbook = None
+        self._images = []
+        self._dirty = set()
+        self._timer = None
+        self._timer_lock = threading.Lock()
+
+    def _load(self):
+        if self._workbook is None:
+            try:
+                self._workbook = openpyxl.load_workbook(self.filepath)
+                # openpyxl menutup sumber data gambar setelah save pertama; byte-nya disimpan
+                # (image_bytes) agar workbook yang sama bisa disimpan berkali-kali
+                self._images = [img for ws in self._workbook.worksheets for img in sheet_images(ws)]
+                for img in self._images: image_bytes(img)
+            except FileNotFoundError:
+                self._workbook = openpyxl.Workbook()
+                if 'Sheet' in self._workbook.sheetnames: self._workbook.remove(self._workbook['Sheet'])
+        return self._workbook
+
+    def write_sheet(self, sheet_name, writer, *args):
+        """
+        Mengganti sheet_name dengan sheet baru yang diisi writer(ws, *args) di thread pekerja.
+        Argumen harus tidak diubah lagi oleh pemanggil. Mengembalikan Future.
+        """
+        def apply():
+            wb = self._load()
+            if sheet_name in wb.sheetnames: wb.remove(wb[sheet_name])
+            writer(wb.create_sheet(sheet_name), *args)
+            self._dirty.add(sheet_name)
+        future = self._executor.submit(apply)
+        future.add_done_callback(self._report_error)
+        self.schedule_flush()
+        return future
+
+    def read(self, reader):
+        """reader(workbook) dijalankan di thread pekerja; menunggu dan mengembalikan hasilnya."""
+        return self._executor.submit(lambda: reader(self._load())).result()
+
+    def schedule_flush(self):
+        with self._timer_lock:
+            if self._timer is not None: self._timer.cancel()
+            self._timer = threading.Timer(self.flush_delay, lambda: self._executor.submit(self._flush).add_done_callback(self._report_error))
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _flush(self):
+        if not self._dirty: return False
+        os.makedirs(os.path.dirname(self.filepath) or ".", exist_ok=True)
+        # Simpan ke file sementara lalu ganti, supaya file tidak pernah setengah tertulis
+        tmp_path = self.filepath + ".tmp"
+        for img in self._images: image_bytes(img)
+        self._workbook.save(tmp_path)
+        os.replace(tmp_path, self.filepath)
+        print(f"Workbook disimpan ke {self.filepath} (sheet: {', '.join(sorted(self._dirty))})")
+        self._dirty.clear()
+        return True
+
+    def flush(self):
+        """Menyimpan semua perubahan sekarang dan menunggu sampai selesai."""
+        with self._timer_lock:
+            if self._timer is not None: self._timer.cancel(); self._timer = None
+        return self._executor.submit(self._flush).result()
+
+    def close(self):
+        try:
+            self.flush()
+        except Exception as e:
+            print(f"[WARNING] Gagal menyimpan workbook: {e}")
+        self._executor.shutdown(wait=True)
+
+    @staticmethod
+    def _report_error(future):
+        if future.exception() is not None:
+            print(f"[WARNING] Operasi workbook gagal: {future.exception()}")
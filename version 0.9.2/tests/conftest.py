@@ -0,0 +1,16 @@
+# kalibrasi_app/tests/conftest.py
+
+import os
+import sys
+
+import pytest
+
+# Test dijalankan dari folder aplikasi: paket namespace modules/ dan gui/ diimpor dari sini
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+@pytest.fixture(scope="session")
+def synthetic_seed(tmp_path_factory):
+    """File MiniSEED sintetis 12 frekuensi standar (python -m kalibrasi synth) dan jadwalnya."""
+    from modules.synthetic_seed import write_synthetic_seed
+    path = str(tmp_path_factory.mktemp("seed") / "synthetic.mseed")
+    return path, write_synthetic_seed(path)
@@ -0,0 +1,154 @@
+# kalibrasi_app/tests/test_amplitude_extractor.py
+
+import numpy as np
+import pytest
+
+from modules.amplitude_extractor import (MINIMUM_AMPLITUDE_THRESHOLD, AmplitudePairs, extract_amplitude_batch,
+                                        find_amplitude_pairs, find_best_amplitude_pairs, pair_peaks_and_troughs)
+from modules.segment import Segment
+
+def reference_pairs(data_segment, peak_indices, trough_indices):
+    """Pemasangan loop bersarang versi lama (sebelum vektorisasi), sebagai acuan."""
+    peaks = [{'index': i, 'value': data_segment[i], 'used': False} for i in peak_indices]
+    troughs = [{'index': i, 'value': data_segment[i], 'used': False} for i in trough_indices]
+    pairs_with_indices = []
+    for peak in peaks:
+        if peak['used']: continue
+        closest_trough = None
+        min_distance = float('inf')
+        for trough in troughs:
+            if trough['used']: continue
+            if trough['index'] > peak['index']:
+                distance = trough['index'] - peak['index']
+                if distance < min_distance:
+                    min_distance = distance
+                    closest_trough = trough
+        if closest_trough:
+            if peak['value'] > closest_trough['value']:
+                pairs_with_indices.append({'peak': peak, 'trough': closest_trough})
+                peak['used'] = True
+                closest_trough['used'] = True
+    return pairs_with_indices
+
+def reference_find_pairs(data_segment, max_pairs=5):
+    """find_best_amplitude_pairs versi lama, dengan deteksi puncak/lembah yang sama."""
+    from scipy.signal import find_peaks
+    if len(data_segment) < 20:
+        return []
+    prominence_threshold = np.std(data_segment) * 0.2
+    peak_indices, _ = find_peaks(data_segment, prominence=prominence_threshold)
+    trough_indices, _ = find_peaks(-data_segment, prominence=prominence_threshold)
+    if len(peak_indices) == 0 or len(trough_indices) == 0:
+        return []
+    filtered = [p for p in reference_pairs(data_segment, peak_indices, trough_indices)
+                if (p['peak']['value'] - p['trough']['value']) >= MINIMUM_AMPLITUDE_THRESHOLD]
+    if len(filtered) <= max_pairs:
+        return filtered
+    mean_amplitude = np.mean([p['peak']['value'] - p['trough']['value'] for p in filtered])
+    filtered.sort(key=lambda p: abs((p['peak']['value'] - p['trough']['value']) - mean_amplitude))
+    return filtered[:max_pairs]
+
+def as_tuples(pairs):
+    if isinstance(pairs, list):
+        return [(int(p['peak']['index']), int(p['trough']['index']), float(p['peak']['value']), float(p['trough']['value']))
+                for p in pairs]
+    return list(zip(pairs['peak_idx'].tolist(), pairs['trough_idx'].tolist(), pairs['peak_val'].tolist(), pairs['trough_val'].tolist()))
+
+def assert_same_pairing(data, peaks, troughs):
+    peaks, troughs = np.asarray(peaks, dtype=np.int64), np.asarray(troughs, dtype=np.int64)
+    assert as_tuples(pair_peaks_and_troughs(data, peaks, troughs)) == as_tuples(reference_pairs(data, peaks, troughs))
+
+@pytest.mark.parametrize("peaks, troughs", [
+    ([], []),
+    ([], [1, 4]),
+    ([1, 5, 9], []),               # hanya puncak
+    ([2, 6], [0, 1]),              # semua lembah sebelum puncak pertama
+    ([3, 7], [0, 5, 8]),           # lembah sebelum puncak pertama, sisanya berselang-seling
+    ([1, 2, 3], [9]),              # beberapa puncak berebut satu lembah
+    ([0, 2, 4, 6], [1, 3, 5, 7]),
+])
+def test_pairing_edge_cases(peaks, troughs):
+    data = np.array([0., 10., -3., 8., -8., 5., 2., -1., 7., -9.])
+    assert_same_pairing(data, peaks, troughs)
+
+def test_pairing_equal_values_are_rejected():
+    # puncak == lembah ditolak; lembahnya tetap tersedia untuk puncak berikutnya
+    data = np.array([0., 5., 5., 9., 5., 1.])
+    assert_same_pairing(data, [1, 3], [2, 4])
+    assert_same_pairing(np.full(8, 3.0), [0, 2, 4], [1, 3, 5])
+
+@pytest.mark.parametrize("seed", range(40))
+def test_pairing_matches_reference_on_random_extrema(seed):
+    rng = np.random.default_rng(seed)
+    n = int(rng.integers(2, 400))
+    # Nilai bulat dalam rentang sempit agar sering ada nilai sama dan pasangan yang ditolak
+    data = rng.integers(-5, 6, n).astype(np.float64)
+    positions = rng.permutation(n)
+    n_peaks = int(rng.integers(0, n // 2 + 1))
+    n_troughs = int(rng.integers(0, n - n_peaks + 1))
+    peaks = np.sort(positions[:n_peaks])
+    troughs = np.sort(positions[n_peaks:n_peaks + n_troughs])
+    assert_same_pairing(data, peaks, troughs)
+
+@pytest.mark.parametrize("seed", range(20))
+def test_find_amplitude_pairs_matches_reference(seed):
+    rng = np.random.default_rng(seed)
+    n = int(rng.integers(10, 5000))
+    t = np.arange(n) / 100.0
+    amplitude = rng.uniform(5000, 60000)
+    data = amplitude * np.sin(2 * np.pi * rng.uniform(0.5, 5.0) * t) + rng.normal(0, amplitude * rng.uniform(0, 0.5), n)
+    if seed % 4 == 0:
+        data = np.round(data / 20000) * 20000   # sinyal bertingkat: banyak nilai sama
+    max_pairs = int(rng.integers(1, 8))
+    assert as_tuples(find_amplitude_pairs(data, max_pairs)) == as_tuples(reference_find_pairs(data, max_pairs))
+
+def test_compatibility_wrapper_keeps_old_format():
+    rng = np.random.default_rng(7)
+    data = 40000 * np.sin(np.arange(3000) / 15) + rng.normal(0, 4000, 3000)
+    old = reference_find_pairs(data, 5)
+    new = find_best_amplitude_pairs(data, 5)
+    assert [(p['peak']['index'], p['trough']['index']) for p in new] == [(p['peak']['index'], p['trough']['index']) for p in old]
+    assert [p['peak']['value'] - p['trough']['value'] for p in new] == [p['peak']['value'] - p['trough']['value'] for p in old]
+
+def test_pair_times_need_sampling_rate():
+    pairs = AmplitudePairs(find_amplitude_pairs(40000 * np.sin(np.arange(3000) / 15)))
+    assert len(AmplitudePairs().peak_times) == 0
+    with pytest.raises(ValueError):
+        pairs.peak_times
+    assert np.array_equal(AmplitudePairs(pairs.data, 100.0).trough_times, pairs.data['trough_idx'] / 100.0)
+
+def sine_channels(fs=100.0, seconds=60, amplitude=50000.0):
+    t = np.arange(int(seconds * fs)) / fs
+    return {key: gain * amplitude * np.sin(2 * np.pi * 1.0 * t) for key, gain in (("Z", 1.0), ("N", 0.9))}
+
+def test_batch_accepts_channels_with_shared_timing():
+    channels = sine_channels()
+    results = extract_amplitude_batch(channels, [(0, 3000), (3000, 6000)],
+                                      channel_timing={"Z": (100.0, 0.0), "N": (100.0, 0.001)})
+    assert [len(pairs) for pairs in results["N"]] == [5, 5]
+    assert np.allclose(results["N"][0].amplitudes, 0.9 * 2 * 50000, rtol=1e-3)
+
+@pytest.mark.parametrize("timing", [{"Z": (100.0, 0.0), "N": (50.0, 0.0)}, {"Z": (100.0, 0.0), "N": (100.0, 2.5)}])
+def test_batch_rejects_misaligned_channels(timing):
+    with pytest.raises(ValueError):
+        extract_amplitude_batch(sine_channels(), [(0, 3000)], channel_timing=timing)
+
+def stepped(fs, start_offset, seconds=120.0):
+    """1 Hz (amplitudo 40000) lalu 2 Hz (amplitudo 60000) berganti di detik 60 waktu referensi."""
+    t = start_offset + np.arange(int(seconds * fs)) / fs
+    return np.where(t < 60, 40000 * np.sin(2 * np.pi * 1.0 * t), 60000 * np.sin(2 * np.pi * 2.0 * t))
+
+@pytest.mark.parametrize("method", ["peaks", "sinefit"])
+def test_segments_resolve_per_channel_sampling_rate_and_start(method):
+    channels = {"Z": stepped(100.0, 0.0), "N": stepped(40.0, 7.5)}
+    timing = {"Z": (100.0, 0.0), "N": (40.0, 7.5)}
+    segments = [Segment(10.0, 50.0, 1.0), Segment(70.0, 110.0, 2.0)]
+    results = extract_amplitude_batch(channels, segments, method=method, channel_timing=timing)
+    for key in channels:
+        first, second = results[key]
+        assert np.allclose(first.amplitudes, 80000, rtol=0.02)
+        assert np.allclose(second.amplitudes, 120000, rtol=0.02)
+        # Waktu puncak (relatif terhadap channel) jatuh di dalam segmen pada waktu referensi
+        offset = timing[key][1]
+        assert np.all((first.peak_times + offset >= 10.0) & (first.peak_times + offset <= 50.0))
+        assert np.all((second.peak_times + offset >= 70.0) & (second.peak_times + offset <= 110.0))
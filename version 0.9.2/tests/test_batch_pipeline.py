@@ -0,0 +1,132 @@
+# kalibrasi_app/tests/test_batch_pipeline.py
+
+import json
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+
+import openpyxl
+import pytest
+
+import kalibrasi.__main__ as cli
+from kalibrasi.__main__ import main
+from modules.amplitude_extractor import extract_amplitude_batch
+from modules.batch_pipeline import (SEED_CACHE_FOLDER, boundaries_from_track, collect_amplitude_results, component_name,
+                                   default_channel_keys)
+from modules.excel_sheets import DIGITIZER_SHEET, read_admin_sheet
+from modules.freq_detector import BOUNDARY_RULES, STANDARD_FREQUENCIES, cached_band_power_track
+from modules.seed_loader import open_seed_file
+from modules.segment_table import SegmentTable
+from modules.track_cache import TrackCache
+
+# Parameter default generate_stepped_sine: amplitudo, offset DC, dan gain per komponen
+AMPLITUDE, OFFSET = 50000.0, 1500.0
+GAINS = {"UD": 1.0, "NS": 0.97, "EW": 1.03}
+
+@pytest.fixture(scope="module")
+def synthetic_store(synthetic_seed, tmp_path_factory):
+    path, schedule = synthetic_seed
+    store, _ = open_seed_file(path, cache_dir=str(tmp_path_factory.mktemp("cache")))
+    keys = default_channel_keys(store.keys())
+    reference = next(key for key in keys if component_name(key) == "UD")
+    return store, keys, reference, schedule
+
+def analyze(store, keys, reference, rule, method="sinefit"):
+    """Langkah-langkah calibrate_file dari boundary sampai hasil amplitudo."""
+    channel_data = {key: store.data(key) for key in keys}
+    gaps = {key: store.gap_index(key) for key in keys}
+    fs = store.sampling_rate(reference)
+    band_track = cached_band_power_track(TrackCache(max_entries=1), channel_data[reference], fs, gaps=gaps[reference])
+    table = SegmentTable(channel_data[reference], fs, band_track=band_track, gaps=gaps[reference])
+    table.set_boundaries(boundaries_from_track(band_track, rule))
+    segments = table.segments()
+    pairs_by_ch = extract_amplitude_batch(channel_data, segments, method=method, gaps=gaps,
+                                          channel_timing=store.channel_timing(keys, reference))
+    return segments, collect_amplitude_results(segments, pairs_by_ch)
+
+@pytest.mark.parametrize("rule", BOUNDARY_RULES)
+def test_segments_follow_the_synthetic_schedule(synthetic_store, rule):
+    store, keys, reference, schedule = synthetic_store
+    segments, results = analyze(store, keys, reference, rule)
+    starts = [segment.t_start for segment in segments]
+    # Setiap pergantian frekuensi terdeteksi (detektor band power tertinggal < 20 s)
+    for t_start, _, _ in schedule[1:]:
+        assert min(abs(t - t_start) for t in starts) < 20.0
+    # Setiap segmen diklasifikasikan ke frekuensi jadwal di titik tengahnya
+    for segment in segments:
+        middle = (segment.t_start + segment.t_end) / 2
+        assert segment.freq == next(freq for t_start, t_end, freq in schedule if t_start <= middle < t_end)
+    assert sorted(results) == STANDARD_FREQUENCIES.tolist()
+
+def test_sinefit_amplitudes_match_the_schedule(synthetic_store):
+    store, keys, reference, _ = synthetic_store
+    _, results = analyze(store, keys, reference, "ratio", method="sinefit")
+    for freq, per_component in results.items():
+        assert set(per_component) == set(GAINS)
+        # Boundary di bawah 0.1 Hz tertinggal 10-20 s: segmen ikut memuat awal langkah berikutnya
+        tolerance = 0.1 if freq < 0.1 else 0.02
+        for name, pairs in per_component.items():
+            expected = AMPLITUDE * GAINS[name]
+            assert len(pairs) > 0
+            assert pairs.amplitudes == pytest.approx(2 * expected, rel=tolerance), (freq, name)
+            assert (pairs.peak_values + pairs.trough_values) / 2 == pytest.approx(OFFSET, abs=tolerance * AMPLITUDE), (freq, name)
+
+def test_peak_amplitudes_match_the_schedule_above_half_hertz(synthetic_store):
+    # Deteksi puncak langsung tidak andal untuk sinus < 0.5 Hz dengan noise 2000 count
+    store, keys, reference, _ = synthetic_store
+    _, results = analyze(store, keys, reference, "ratio", method="peaks")
+    for freq, per_component in results.items():
+        if freq < 0.5: continue
+        for name, pairs in per_component.items():
+            assert pairs.amplitudes == pytest.approx(2 * AMPLITUDE * GAINS[name], rel=0.15), (freq, name)
+
+def test_batch_writes_only_to_output_from_any_cwd(synthetic_seed, tmp_path, monkeypatch):
+    source, output, elsewhere = tmp_path / "sumber", tmp_path / "hasil", tmp_path / "lain"
+    source.mkdir(); elsewhere.mkdir()
+    shutil.copy(synthetic_seed[0], source / "sensor.mseed")
+    # Template default diambil dari folder aplikasi, bukan dari cwd
+    monkeypatch.chdir(elsewhere)
+
+    assert main(["batch", str(source), "-o", str(output), "-w", "1", "--no-pdf"]) == 0
+    assert os.listdir(source) == ["sensor.mseed"]
+    assert os.listdir(elsewhere) == []
+    assert os.path.isdir(output / SEED_CACHE_FOLDER / "sensor.mseed.kcache")
+    with open(output / "summary.json") as f: report = json.load(f)
+    assert report['n_failed'] == 0 and report['n_incomplete'] == 1
+    assert report['files'][0]['status'] == 'incomplete'
+    assert report['files'][0]['missing'] == ["admin", "digitizer"]
+    assert report['files'][0]['workbook'] == str(output / "sensor_mseed.xlsx")
+    # Isi sheet administrasi/digitizer template (sisa sesi GUI) tidak ikut ke sertifikat
+    wb = openpyxl.load_workbook(report['files'][0]['workbook'])
+    assert read_admin_sheet(wb) == {} and wb[DIGITIZER_SHEET].max_row == 1 and wb[DIGITIZER_SHEET]['A1'].value is None
+
+def test_batch_keeps_outputs_of_files_with_the_same_stem_apart(synthetic_seed, tmp_path):
+    source, output = tmp_path / "sumber", tmp_path / "hasil"
+    source.mkdir()
+    for name in ("a.mseed", "a.seed"):
+        shutil.copy(synthetic_seed[0], source / name)
+    admin_path = tmp_path / "admin.json"
+    admin_path.write_text(json.dumps({"Nama Alat": "Seismometer uji"}))
+
+    assert main(["batch", str(source), "-o", str(output), "-w", "2", "--no-pdf", "--admin", str(admin_path), "--digitizer", "alpha"]) == 0
+    with open(output / "summary.json") as f: report = json.load(f)
+    assert [summary['status'] for summary in report['files']] == ['ok', 'ok']
+    assert sorted(os.path.basename(summary['workbook']) for summary in report['files']) == ["a_mseed.xlsx", "a_seed.xlsx"]
+    wb = openpyxl.load_workbook(report['files'][0]['workbook'])
+    assert read_admin_sheet(wb) == {"Nama Alat": "Seismometer uji"}
+
+def test_batch_records_crashed_workers_as_errors(synthetic_seed, tmp_path, monkeypatch):
+    source = tmp_path / "sumber"
+    source.mkdir()
+    shutil.copy(synthetic_seed[0], source / "sensor.mseed")
+
+    def crash(*args, **kwargs):
+        raise RuntimeError("proses pekerja mati")
+    # Exception dari future.result() (mis. BrokenProcessPool) tidak menghentikan batch
+    monkeypatch.setattr(cli, "ProcessPoolExecutor", ThreadPoolExecutor)
+    monkeypatch.setattr(cli, "calibrate_file", crash)
+    assert main(["batch", str(source), "-o", str(tmp_path / "hasil"), "-w", "1"]) == 1
+    with open(tmp_path / "hasil" / "summary.json") as f: report = json.load(f)
+    assert report['n_failed'] == 1
+    assert report['files'][0]['file'] == str(source / "sensor.mseed")
+    assert report['files'][0]['error'] == "RuntimeError: proses pekerja mati"
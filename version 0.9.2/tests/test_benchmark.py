@@ -0,0 +1,30 @@
+# kalibrasi_app/tests/test_benchmark.py
+
+from modules.benchmark import compare_with_baseline
+
+def stage(time_median, peak_bytes=10 * 2**20):
+    return {'time_median': time_median, 'time_min': time_median, 'peak_bytes': peak_bytes, 'repeat': 3}
+
+def run(stages, selected=None):
+    return {'config': {}, 'selected_stages': selected, 'stages': stages}
+
+def by_stage(comparison):
+    return {item['stage']: item for item in comparison}
+
+def test_regression_above_threshold_and_noise_floor():
+    comparison = by_stage(compare_with_baseline(run({'a': stage(0.2), 'b': stage(0.101), 'c': stage(0.1, 20 * 2**20)}),
+                                                run({'a': stage(0.1), 'b': stage(0.1), 'c': stage(0.1)})))
+    assert comparison['a']['regression'] and comparison['a']['time_ratio'] == 2.0
+    assert not comparison['b']['regression']
+    assert comparison['c']['regression'] and comparison['c']['reasons'] == ["memori x2.00"]
+
+def test_missing_stage_is_a_regression_in_a_full_run():
+    comparison = by_stage(compare_with_baseline(run({'a': stage(0.1)}), run({'a': stage(0.1), 'certificate_pdf': stage(0.2)})))
+    assert comparison['certificate_pdf']['regression']
+    assert comparison['certificate_pdf']['time_ratio'] is None
+    assert not comparison['a']['regression']
+
+def test_unselected_stage_is_only_a_warning(capsys):
+    comparison = by_stage(compare_with_baseline(run({'a': stage(0.1)}, selected=['a']), run({'a': stage(0.1), 'b': stage(0.2)})))
+    assert not comparison['b']['regression'] and comparison['b']['reasons'] == ["tidak dipilih"]
+    assert "[WARNING]" in capsys.readouterr().out
@@ -0,0 +1,41 @@
+# kalibrasi_app/tests/test_channel_store.py
+
+import numpy as np
+from obspy import Stream, Trace, UTCDateTime
+
+from modules.channel_store import ChannelStore
+from modules.seed_loader import open_seed_file
+from modules.synthetic_seed import generate_stepped_sine
+
+def gapped_stream():
+    start = UTCDateTime(2025, 1, 1)
+    header = {'station': 'SYN', 'channel': 'SHZ', 'sampling_rate': 10.0}
+    return Stream([Trace(np.arange(100, dtype=np.int32), header=dict(header, starttime=start)),
+                   Trace(np.arange(50, dtype=np.int32), header=dict(header, starttime=start + 15.0))])
+
+def test_masked_samples_become_gaps():
+    merged = gapped_stream().merge(method=1)
+    assert np.ma.isMaskedArray(merged[0].data)
+    store = ChannelStore.from_stream(merged)
+    data = store.data("SYN..SHZ")
+    assert not np.ma.isMaskedArray(data)
+    assert store.gap_index("SYN..SHZ").gaps.tolist() == [[100, 150]]
+    assert np.all(data[100:150] == 0) and data[150] == 0 and data[199] == 49
+
+def test_put_masked_array_records_gaps():
+    store = ChannelStore.from_stream(gapped_stream())
+    masked = np.ma.masked_array(np.ones(200, dtype=np.int32), mask=np.r_[np.zeros(20), np.ones(10), np.zeros(170)].astype(bool))
+    store.put("SYN..SHZ", masked)
+    assert store.gap_index("SYN..SHZ").gaps.tolist() == [[20, 30], [100, 150]]
+
+def test_eviction_releases_channels_opened_without_lazy(tmp_path):
+    path = str(tmp_path / "syn.mseed")
+    generate_stepped_sine([(0.0, 200.0, 1.0)]).write(path, format="MSEED")
+    store, stream = open_seed_file(path, lazy=False)
+    # Store dibuka ulang dari sidecar: tidak ada stream yang masih memegang sampel
+    assert stream is None
+    store.memory_budget = 1
+    keys = store.keys()
+    for key in keys:
+        store.data(key)
+    assert [store.is_loaded(key) for key in keys] == [False] * (len(keys) - 1) + [True]
@@ -0,0 +1,95 @@
+# kalibrasi_app/tests/test_formula_eval.py
+
+import os
+
+import openpyxl
+import pytest
+
+from modules.certificate_pdf import render_certificate_pdf
+from modules.excel_sheets import AMPLITUDE_WORKBOOK
+from modules.formula_eval import ExcelError, FormulaEvaluator, format_value
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+# Workbook hasil kalibrasi yang disimpan Excel: setiap formula punya nilai cache dari Excel
+EXCEL_WORKBOOK = os.path.join(DATA_DIR, "F.G.2023.121.xlsx")
+
+@pytest.fixture(scope="module")
+def excel_workbooks():
+    if not os.path.exists(EXCEL_WORKBOOK):
+        pytest.skip("workbook referensi Excel tidak ada")
+    return openpyxl.load_workbook(EXCEL_WORKBOOK), openpyxl.load_workbook(EXCEL_WORKBOOK, data_only=True)
+
+def formula_cells(ws):
+    for row in ws.iter_rows():
+        for cell in row:
+            text = getattr(cell.value, 'text', cell.value)
+            if isinstance(text, str) and text.startswith('='):
+                yield cell.coordinate, text
+
+def same_value(got, expected):
+    if isinstance(got, ExcelError): return got.code == expected
+    # openpyxl membaca hasil teks kosong dari cache Excel sebagai None
+    if expected is None: return got == ""
+    if isinstance(got, (int, float)) and isinstance(expected, (int, float)):
+        return got == pytest.approx(expected, rel=1e-9, abs=1e-12)
+    return got == expected
+
+@pytest.mark.parametrize("sheet_name", ["SERTIF SEISMO", "LAP SEISMO ", "LHKS SEISMO", "UNC Seismo", "Suhu dan Kelembaban", "INPUT PARAMETER"])
+def test_formulas_match_excel_cached_values(excel_workbooks, sheet_name):
+    workbook, cached = excel_workbooks
+    evaluator = FormulaEvaluator(workbook)
+    checked, mismatches = 0, []
+    for coordinate, formula in formula_cells(workbook[sheet_name]):
+        # Referensi ke workbook eksternal ([1]...) dihitung Excel dari salinannya sendiri
+        if "[" in formula: continue
+        got, expected = evaluator.value(sheet_name, coordinate), cached[sheet_name][coordinate].value
+        checked += 1
+        if not same_value(got, expected): mismatches.append((coordinate, formula, got, expected))
+    assert checked > 0
+    assert mismatches == []
+    assert evaluator.unsupported == set()
+
+def test_certificate_sheet_is_fully_covered(excel_workbooks):
+    workbook, _ = excel_workbooks
+    assert len(list(formula_cells(workbook["SERTIF SEISMO"]))) == 128
+
+def make_workbook(**cells):
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = "S"
+    for coordinate, value in cells.items():
+        ws[coordinate] = value
+    return wb
+
+def test_excel_rounding_and_empty_reference():
+    wb = make_workbook(A1=79.75, A2=77.2, B1="=ROUND(A1-A2,1)", B2="=C9", B3='="x"&B2', B4="=CONCATENATE(A1/10)")
+    evaluator = FormulaEvaluator(wb)
+    assert evaluator.value("S", "B1") == 2.6
+    assert evaluator.value("S", "B2") == 0.0
+    assert evaluator.value("S", "B3") == "x0"
+    assert evaluator.value("S", "B4") == "7,975"
+    assert format_value(1234.5, "#,##0.00") == "1.234,50"
+
+def test_unsupported_function_is_reported():
+    wb = make_workbook(A1="=XLOOKUP(1,B1:B2,C1:C2)", A2="=A1+1", A3="=1/0")
+    evaluator = FormulaEvaluator(wb)
+    assert evaluator.value("S", "A1").code == "#NAME?"
+    assert evaluator.value("S", "A2").code == "#NAME?"
+    assert evaluator.value("S", "A3").code == "#DIV/0!"
+    assert evaluator.unsupported == {"XLOOKUP"}
+
+def test_render_warns_about_error_cells(tmp_path, capsys):
+    wb = make_workbook(A1="Nilai", B1="=XLOOKUP(1,C1:C2,D1:D2)", B2="=1/0", B3="=2*3")
+    render_certificate_pdf(wb, str(tmp_path / "s.pdf"), sheet_name="S")
+    out = capsys.readouterr().out
+    assert "[WARNING]" in out and "B1=#NAME?" in out and "B2=#DIV/0!" in out and "B3" not in out
+    assert "XLOOKUP" in out
+
+def test_render_keeps_template_images_saveable(tmp_path):
+    if not os.path.exists(AMPLITUDE_WORKBOOK):
+        pytest.skip("template tidak ada")
+    wb = openpyxl.load_workbook(AMPLITUDE_WORKBOOK)
+    assert render_certificate_pdf(wb, str(tmp_path / "sertifikat.pdf")) > 0
+    # image_bytes mengembalikan sumber gambar, jadi workbook yang sama tetap bisa disimpan
+    wb.save(str(tmp_path / "salinan.xlsx"))
+    assert render_certificate_pdf(wb, str(tmp_path / "sertifikat2.pdf")) > 0
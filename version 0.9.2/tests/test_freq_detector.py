@@ -0,0 +1,45 @@
+# kalibrasi_app/tests/test_freq_detector.py
+
+import numpy as np
+import pytest
+from obspy import read
+
+from modules.freq_detector import (BOUNDARY_RULES, STANDARD_FREQUENCIES, DecimationPyramid, band_frequencies,
+                                   boundaries_from_band_power, change_point_boundaries_from_band_power,
+                                   compute_band_power_track, dominant_standard_track)
+from modules.segment_table import SegmentTable
+
+@pytest.fixture(scope="module")
+def reference_channel(synthetic_seed):
+    path, schedule = synthetic_seed
+    trace = read(path).select(component="Z")[0]
+    return trace.data, trace.stats.sampling_rate, schedule
+
+def boundaries(track, rule):
+    if rule == "changepoint":
+        return [t for t, _ in change_point_boundaries_from_band_power(*track)]
+    return boundaries_from_band_power(*track)
+
+@pytest.mark.parametrize("rule", BOUNDARY_RULES)
+@pytest.mark.parametrize("use_pyramid", [True, False])
+def test_synthetic_file_recovers_all_standard_frequencies(reference_channel, rule, use_pyramid):
+    data, fs, schedule = reference_channel
+    track = compute_band_power_track(data, fs, pyramid=DecimationPyramid(data, fs) if use_pyramid else None)
+    table = SegmentTable(data, fs, band_track=track)
+    table.set_boundaries(boundaries(track, rule))
+    assert sorted({float(segment.freq) for segment in table.segments()}) == STANDARD_FREQUENCIES.tolist()
+
+def test_ratio_rule_finds_every_step(reference_channel):
+    data, fs, schedule = reference_channel
+    found = np.array(boundaries_from_band_power(*compute_band_power_track(data, fs, pyramid=DecimationPyramid(data, fs))))
+    expected = np.array([t_start for t_start, _, _ in schedule[1:]])
+    assert len(found) == len(expected)
+    # Jendela band terendah (2 periode 0.02 Hz) menggeser boundary paling banyak setengah jendelanya
+    assert np.all(np.abs(found - expected) <= 50)
+
+def test_neighbour_bands_never_become_dominant():
+    freqs = band_frequencies()
+    power = np.zeros((len(freqs), 3))
+    power[np.flatnonzero(np.isclose(freqs, np.sqrt(0.5)))[0]] = 10.0   # band titik tengah 0.707 Hz paling kuat
+    power[np.flatnonzero(freqs == 1.0)[0]] = [1.0, 2.0, 3.0]
+    assert dominant_standard_track(freqs, power).tolist() == [1.0, 1.0, 1.0]
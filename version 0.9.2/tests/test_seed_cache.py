@@ -0,0 +1,95 @@
+# kalibrasi_app/tests/test_seed_cache.py
+
+import os
+
+import numpy as np
+from obspy import Stream, Trace, UTCDateTime
+
+from modules.channel_store import ChannelStore
+from modules.seed_cache import (file_signature, is_channel_cached, load_sidecar, read_sidecar_header, save_sidecar_channel,
+                                write_sidecar)
+from modules.seed_loader import decode_channel, open_seed_file
+from modules.synthetic_seed import generate_stepped_sine
+
+def test_gapped_file_round_trips_through_sidecar(tmp_path):
+    path = str(tmp_path / "gap.mseed")
+    generate_stepped_sine([(0.0, 300.0, 1.0)], gaps=[(100.0, 20.0)]).write(path, format="MSEED")
+    store, _ = open_seed_file(path)
+    first = {key: (np.array(store.data(key)), store.gap_index(key).gaps.tolist()) for key in store.keys()}
+
+    reopened = load_sidecar(path)
+    assert reopened is not None
+    for key, (data, gaps) in first.items():
+        assert gaps == [[10000, 12000]]
+        assert reopened.gap_index(key).gaps.tolist() == gaps
+        assert np.array_equal(reopened.data(key), data)
+        assert not np.any(reopened.data(key)[10000:12000])
+
+def test_masked_channels_keep_their_gaps_in_the_sidecar(tmp_path):
+    path = str(tmp_path / "merged.mseed")
+    start = UTCDateTime(2025, 1, 1)
+    header = {'station': 'SYN', 'channel': 'SHZ', 'sampling_rate': 10.0}
+    stream = Stream([Trace(np.arange(1, 101, dtype=np.int32), header=dict(header, starttime=start)),
+                     Trace(np.arange(1, 51, dtype=np.int32), header=dict(header, starttime=start + 15.0))])
+    stream.write(path, format="MSEED")
+    assert write_sidecar(path, ChannelStore.from_stream(stream.merge(method=1)))
+
+    reopened = load_sidecar(path)
+    assert reopened.gap_index("SYN..SHZ").gaps.tolist() == [[100, 150]]
+    assert not np.ma.isMaskedArray(reopened.data("SYN..SHZ"))
+    assert not np.any(reopened.data("SYN..SHZ")[100:150])
+
+def test_save_channel_records_mask_as_gap(tmp_path):
+    path = str(tmp_path / "x.mseed")
+    open(path, "wb").write(b"x" * 10)
+    header = {'version': 4, 'signature': file_signature(path), 'channels': {"SYN..SHZ": {'gaps': [[0, 2]]}}}
+    data = np.ma.masked_array(np.arange(10), mask=[0, 0, 0, 1, 1, 0, 0, 0, 0, 0])
+    assert save_sidecar_channel(path, header, "SYN..SHZ", data)
+    assert read_sidecar_header(path, file_signature(path))['channels']["SYN..SHZ"]['gaps'] == [[0, 2], [3, 5]]
+
+def test_signature_reads_only_head_and_tail(tmp_path):
+    path = str(tmp_path / "big.bin")
+    block = 1024
+    payload = bytearray(os.urandom(10 * block))
+    open(path, "wb").write(payload)
+    stat = os.stat(path)
+    signature = file_signature(path, block_size=block)
+
+    payload[-1] ^= 0xFF                      # ekor berubah -> hash berubah
+    open(path, "wb").write(payload)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert file_signature(path, block_size=block)['hash'] != signature['hash']
+
+    payload[-1] ^= 0xFF
+    payload[5 * block] ^= 0xFF               # tengah berubah -> hanya mtime yang membedakan
+    open(path, "wb").write(payload)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert file_signature(path, block_size=block) == signature
+
+def test_cache_dir_keeps_the_source_folder_untouched(tmp_path):
+    source, cache = tmp_path / "sumber", tmp_path / "cache"
+    source.mkdir()
+    path = str(source / "a.mseed")
+    generate_stepped_sine([(0.0, 60.0, 1.0)]).write(path, format="MSEED")
+    store, _ = open_seed_file(path, cache_dir=str(cache))
+    data = {key: np.array(store.data(key)) for key in store.keys()}
+
+    assert sorted(os.listdir(source)) == ["a.mseed"]
+    assert os.path.isdir(cache / "a.mseed.kcache")
+    assert load_sidecar(path) is None
+    reopened = load_sidecar(path, cache_dir=str(cache))
+    assert all(np.array_equal(reopened.data(key), values) for key, values in data.items())
+
+def test_lazily_saved_channels_are_reported_as_cached(tmp_path):
+    path = str(tmp_path / "lazy.mseed")
+    generate_stepped_sine([(0.0, 60.0, 1.0)]).write(path, format="MSEED")
+    store, _ = open_seed_file(path)
+    first, second = store.keys()[:2]
+    assert not is_channel_cached(store, first)
+
+    # Channel yang di-decode lalu disimpan ke sidecar tercatat di metadata store, jadi tetap
+    # dianggap ter-cache setelah dikeluarkan dari memori (tidak di-decode ulang)
+    store.data(first)
+    assert store.metadata[first]['file'] == read_sidecar_header(path, file_signature(path))['channels'][first]['file']
+    store.put(second, decode_channel(path, second))
+    assert store.metadata[second].get('file')
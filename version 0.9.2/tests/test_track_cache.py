@@ -0,0 +1,26 @@
+# kalibrasi_app/tests/test_track_cache.py
+
+import os
+
+import numpy as np
+
+from modules.track_cache import TrackCache
+
+def test_disk_cache_stays_within_budget(tmp_path):
+    entry = (np.zeros(10_000),)                      # ~80 kB per file .npz
+    cache = TrackCache(max_entries=1, cache_dir=str(tmp_path), max_disk_bytes=300_000)
+    for i in range(10):
+        cache.get_or_compute(np.array([i]), lambda: entry)
+    assert sum(size for _, size, _ in cache.disk_files()) <= 300_000
+    assert 1 <= len(cache.disk_files()) < 10
+
+def test_recently_read_entries_are_kept(tmp_path):
+    cache = TrackCache(max_entries=1, cache_dir=str(tmp_path), max_disk_bytes=250_000)
+    first = np.array([0])
+    cache.get_or_compute(first, lambda: (np.zeros(10_000),))
+    first_path = cache.disk_files()[0][0]
+    for i in range(1, 6):
+        os.utime(first_path, ns=(0, 0))              # tanpa dibaca: file pertama paling tua
+        cache.get_or_compute(first, lambda: (np.ones(10_000),))
+        cache.get_or_compute(np.array([i]), lambda: (np.zeros(10_000),))
+    assert os.path.exists(first_path)
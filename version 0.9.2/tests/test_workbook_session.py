@@ -0,0 +1,21 @@
+# kalibrasi_app/tests/test_workbook_session.py
+
+import openpyxl
+
+from modules.workbook_session import WorkbookSession
+
+def write_value(ws, value):
+    ws["A1"] = value
+
+def test_flush_waits_for_queued_writes_before_reading(tmp_path):
+    path = str(tmp_path / "data.xlsx")
+    session = WorkbookSession(path, flush_delay=60.0)
+    try:
+        session.write_sheet("data_auto", write_value, 42)
+        # Alur ekspor sertifikat: flush lalu read; keduanya mengikuti tulisan yang masih antre
+        assert session.flush()
+        assert session.read(lambda wb: wb["data_auto"]["A1"].value) == 42
+        assert openpyxl.load_workbook(path)["data_auto"]["A1"].value == 42
+        assert not session.flush()
+    finally:
+        session.close()